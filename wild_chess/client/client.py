@@ -1,9 +1,17 @@
 """client functions"""
 
 
+from __future__ import annotations
+
+import json
+import typing
+import urllib.parse
+
 import requests
+import websockets
 
 url = "https://sassy-server.herokuapp.com"
+ws_url = url.replace("https://", "wss://", 1)
 
 
 def host_game(username: str) -> dict:
@@ -32,11 +40,97 @@ def get_board(code: str, username: str) -> dict:
     return requests.get(f"{url}/game/{code}?username={username}").json()
 
 
-def post_board(code: str, username: str, board: dict) -> dict:
+def post_move(code: str, username: str, origin: str, target: str, seq: int, promotion: typing.Optional[str] = None) -> dict:
     """
     :param code:
     :param username:
-    :param board:
-    :return:
+    :param origin: Square the piece moves from, such as ``e2``
+    :param target: Square the piece moves to, such as ``e4``
+    :param seq: Number of plies played so far, as the client knows it
+    :param promotion: Piece letter a pawn promotes to (a queen if not given)
+    :return: The squares the move changed, or why it was refused
+    """
+    move = {"from": origin, "to": target, "promotion": promotion, "seq": seq}
+    return requests.post(f"{url}/game/{code}", params={"username": username}, json=move).json()
+
+
+def resign_game(code: str, username: str) -> dict:
+    """
+    :param code:
+    :param username:
+    :return: The status of each player, or why the game could not be resigned
+    """
+    return requests.post(f"{url}/game/{code}/resign", params={"username": username}).json()
+
+
+class GameChannel:
+    """
+    The WebSocket channel of a game: moves are pushed as they happen, so nothing needs to poll :func:`get_board`.
+
+    Use it as an async context manager, and iterate over it for the answers to :meth:`send_move` and the moves the
+    other player makes.
     """
-    return requests.post(f"{url}/game/{code}?username={username}&board={board}").json()
+
+    code: str
+    username: str
+    connection: typing.Optional[websockets.WebSocketClientProtocol]
+
+    def __init__(self, code: str, username: str) -> None:
+        self.code = code
+        self.username = username
+        self.connection = None
+
+    async def __aenter__(self) -> GameChannel:
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *_: typing.Any) -> None:
+        await self.close()
+
+    def __aiter__(self) -> GameChannel:
+        return self
+
+    async def __anext__(self) -> dict:
+        try:
+            return await self.receive()
+        except websockets.ConnectionClosedOK:
+            raise StopAsyncIteration from None
+
+    async def connect(self) -> None:
+        """Open the channel. The server answers with the current position."""
+        query = urllib.parse.urlencode({"username": self.username})
+        self.connection = await websockets.connect(f"{ws_url}/game/{self.code}/ws?{query}")
+
+    async def close(self) -> None:
+        """Close the channel."""
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+
+    async def receive(self) -> dict:
+        """
+        Wait for the next message: the position on connecting, then moves with the squares they changed.
+
+        :return:
+        :rtype: dict
+        """
+        if self.connection is None:
+            raise RuntimeError("the channel is not open")
+        return json.loads(await self.connection.recv())
+
+    async def send_move(self, origin: str, target: str, seq: int, promotion: typing.Optional[str] = None) -> None:
+        """
+        Play a move; see :func:`post_move`.
+
+        :param origin:
+        :type origin: str
+        :param target:
+        :type target: str
+        :param seq:
+        :type seq: int
+        :param promotion:
+        :type promotion: typing.Optional[str]
+        """
+        if self.connection is None:
+            raise RuntimeError("the channel is not open")
+        await self.connection.send(json.dumps({"from": origin, "to": target, "promotion": promotion, "seq": seq}))
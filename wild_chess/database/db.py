@@ -3,20 +3,84 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import os
+import time
 import typing
 
-import asyncpg
-
 from wild_chess.database import postgres
-from wild_chess.utils import data
+from wild_chess.utils import data, gamerecord
+
+if typing.TYPE_CHECKING:
+    import asyncpg
+
+__all__: tuple[str, ...] = ("LEADERBOARD_SIZE", "LEADERBOARD_TTL", "LeaderboardCache", "PlayerDB")
+
+LEADERBOARD_SIZE: typing.Final[int] = 10
+# Seconds a cached leaderboard may be served for, which bounds how stale it gets when another process writes.
+LEADERBOARD_TTL: typing.Final[float] = float(os.getenv("WILD_CHESS_LEADERBOARD_TTL", "30"))
+
+
+class LeaderboardCache:
+    """
+    The top players, kept in memory for up to *ttl* seconds or until :meth:`invalidate` is called.
+
+    Each leaderboard has an ETag computed from its content, so a reload that changes nothing keeps the same tag.
+    """
+
+    __slots__ = ("ttl", "entries", "etag", "expires", "version", "lock")
 
-__all__: tuple[str, ...] = ("PlayerDB",)
+    ttl: float
+    entries: list[data.LeaderboardEntry]
+    etag: str
+    expires: float
+    version: int
+    lock: asyncio.Lock
+
+    def __init__(self, ttl: float = LEADERBOARD_TTL) -> None:
+        self.ttl = ttl
+        self.entries = []
+        self.etag = ""
+        self.expires = 0.0
+        self.version = 0
+        self.lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        """Make the next read reload the leaderboard."""
+        self.expires = 0.0
+        self.version += 1
+
+    async def get(
+        self, load: typing.Callable[[], typing.Awaitable[list[data.LeaderboardEntry]]]
+    ) -> tuple[list[data.LeaderboardEntry], str]:
+        """
+        The cached leaderboard, calling *load* first if it has expired. Concurrent readers share a single reload.
+
+        :param load:
+        :type load: typing.Callable[[], typing.Awaitable[list[data.LeaderboardEntry]]]
+        :return: The entries and their ETag
+        :rtype: tuple[list[data.LeaderboardEntry], str]
+        """
+        if time.monotonic() >= self.expires:
+            async with self.lock:
+                if time.monotonic() >= self.expires:
+                    version, expires = self.version, time.monotonic() + self.ttl
+                    self.entries = await load()
+                    self.etag = '"' + hashlib.sha1(repr(self.entries).encode()).hexdigest()[:20] + '"'
+                    # A write during the load may not be in what was loaded, so the next read loads again.
+                    self.expires = expires if version == self.version else 0.0
+        return self.entries, self.etag
 
 
 class PlayerDB(postgres.DatabaseModel):
     """All abstract methods for using player database."""
 
     pool: asyncpg.pool.Pool
+    leaderboard_cache: LeaderboardCache
+
+    def __init__(self) -> None:
+        self.leaderboard_cache = LeaderboardCache()
 
     async def set_table(self, pool: asyncpg.pool.Pool) -> None:
         """
@@ -77,6 +141,7 @@ async def create_player(self, username: str, password: str) -> typing.Optional[d
                 [],
             ),
         )
+        self.leaderboard_cache.invalidate()
         return await self.find_player(username)
 
     async def try_exec_write_query(self, username: str, query: str, query_data: typing.Optional[tuple] = None) -> bool:
@@ -109,7 +174,9 @@ async def remove_player(self, username: str) -> bool:
         :return:
         :rtype: bool
         """
-        return await self.try_exec_write_query(username, "DELETE FROM players WHERE name = $1", (username,))
+        updated = await self.try_exec_write_query(username, "DELETE FROM players WHERE name = $1", (username,))
+        self.leaderboard_cache.invalidate()
+        return updated
 
     async def update_player_win(self, username: str) -> bool:
         """
@@ -120,7 +187,9 @@ async def update_player_win(self, username: str) -> bool:
         :return:
         :rtype: bool
         """
-        return await self.try_exec_write_query(username, "UPDATE players SET wins = wins + 1 WHERE name = $1", (username,))
+        updated = await self.try_exec_write_query(username, "UPDATE players SET wins = wins + 1 WHERE name = $1", (username,))
+        self.leaderboard_cache.invalidate()
+        return updated
 
     async def update_player_loss(self, username: str) -> bool:
         """
@@ -131,7 +200,11 @@ async def update_player_loss(self, username: str) -> bool:
         :return:
         :rtype: bool
         """
-        return await self.try_exec_write_query(username, "UPDATE players SET losses = losses + 1 WHERE name = $1", (username,))
+        updated = await self.try_exec_write_query(
+            username, "UPDATE players SET losses = losses + 1 WHERE name = $1", (username,)
+        )
+        self.leaderboard_cache.invalidate()
+        return updated
 
     async def update_player_tie(self, username: str) -> bool:
         """
@@ -142,32 +215,41 @@ async def update_player_tie(self, username: str) -> bool:
         :return:
         :rtype bool:
         """
-        return await self.try_exec_write_query(username, "UPDATE players SET ties = ties + 1 WHERE name = $1", (username,))
+        updated = await self.try_exec_write_query(username, "UPDATE players SET ties = ties + 1 WHERE name = $1", (username,))
+        self.leaderboard_cache.invalidate()
+        return updated
 
-    async def update_player_history(self, username: str, player_name: str, moves: list, status: str) -> bool:
+    async def update_player_history(self, username: str, record: gamerecord.GameRecord) -> bool:
         """
-        Update a player's history.
+        Append a game to a player's history, packed by :func:`gamerecord.to_text`.
 
         :param username:
         :type username: str
-        :param player_name:
-        :type player_name: str
-        :param moves:
-        :type moves: list
-        :param status:
-        :type status: str
+        :param record:
+        :type record: gamerecord.GameRecord
         :return:
         :rtype: bool
         """
-        player = await self.find_player(username)
-
-        if player is None:
-            return False
+        return await self.try_exec_write_query(
+            username,
+            "UPDATE players SET history = array_append(history, $1) WHERE name = $2",
+            (gamerecord.to_text(record), username),
+        )
 
-        player.history.append(str({"opponent": player_name, "moves": moves, "status": status}))
+    async def player_history(self, username: str) -> typing.Optional[list[str]]:
+        """
+        Get a player's history, as the base64 records of :mod:`gamerecord`.
 
-        await self.exec_write_query("UPDATE players SET history = $1 WHERE name = $2", (player.history, username))
-        return True
+        :param username:
+        :type username: str
+        :return: None if there is no such player
+        :rtype: typing.Optional[list[str]]
+        """
+        record = await self.exec_fetchone("SELECT history FROM players WHERE name = $1", (username,))
+        if record is None:
+            return None
+        # Games saved before game records existed are str() of a dict; they cannot be replayed, so they are left out.
+        return [entry for entry in record[0] or () if entry and not entry.startswith("{")]
 
     async def all_players(self) -> list[data.PlayerRecord]:
         """Get all players."""
@@ -192,12 +274,23 @@ async def check_password(self, username: str, password: str) -> bool:
 
         return player.password == password
 
-    async def leaderboard(self) -> list[data.PlayerRecord]:
+    async def leaderboard(self) -> tuple[list[data.LeaderboardEntry], str]:
+        """
+        Get the leaderboard, from :attr:`leaderboard_cache` unless it has expired or a result was recorded since.
+
+        :return: The top players and the leaderboard's ETag
+        :rtype: tuple[list[data.LeaderboardEntry], str]
         """
-        Get the leaderboard.
+        return await self.leaderboard_cache.get(self.load_leaderboard)
+
+    async def load_leaderboard(self) -> list[data.LeaderboardEntry]:
+        """
+        Read the leaderboard from the database, without the players' passwords and histories.
 
         :return:
-        :rtype: list[data.PlayerRecord]
+        :rtype: list[data.LeaderboardEntry]
         """
-        records = await self.exec_fetchall("SELECT * FROM players ORDER BY wins DESC LIMIT 10")
-        return [data.PlayerRecord(*record) for record in records]
+        records = await self.exec_fetchall(
+            f"SELECT name, wins, losses, ties FROM players ORDER BY wins DESC, name LIMIT {LEADERBOARD_SIZE}"
+        )
+        return [data.LeaderboardEntry(*record) for record in records]
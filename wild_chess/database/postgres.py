@@ -1,9 +1,12 @@
 """Base database model."""
 
 
+from __future__ import annotations
+
 import typing
 
-import asyncpg
+if typing.TYPE_CHECKING:
+    import asyncpg
 
 __all__: tuple[str, ...] = ("DatabaseModel",)
 
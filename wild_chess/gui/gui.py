@@ -6,8 +6,8 @@
 
 import pygame
 
-from wild_chess.logic import pieces
-from wild_chess.server.routes.multiplayer import active_game
+from wild_chess.logic import bitboard, pieces
+from wild_chess.server.games import active_game
 
 
 class Game:
@@ -216,7 +216,7 @@ def __gameflow(self, base, old, new):
             print("En passant")
         if base.check_check(base.current_player):
             print("Check")
-            if base.check_checkmate(base.current_player, new):
+            if base.check_checkmate(base.current_player):
                 print("Checkmate")
                 checkmate = True
 
@@ -244,6 +244,7 @@ def init(self, base) -> None:  # noqa: C901
         game_code = ""  # Game Code from textbox
         piece_selected: tuple[int, int] = ()  # Current position of selected piece
         possible_moves: list[tuple[int, int]] = []  # Possible moves for the selected piece
+        legal_moves: list[int] | None = None  # Every legal move of the current player, generated once per turn
         while running:
             mouse_x, mouse_y = pygame.mouse.get_pos()
             for event in pygame.event.get():
@@ -273,8 +274,16 @@ def init(self, base) -> None:  # noqa: C901
                                 ]
                                 if current_piece in player_pieces:
                                     piece_selected = grid
-                                    possible_moves = base.board[grid_y][grid_x].possible_moves(base.board)  # type: ignore
-                                    possible_moves = [m[::-1] for m in possible_moves]
+                                    if legal_moves is None:
+                                        legal_moves = base.legal_moves(base.current_player)
+                                    origin = current_piece.square
+                                    possible_moves = list(
+                                        dict.fromkeys(
+                                            bitboard.COORDS[(move >> 6) & 63][::-1]
+                                            for move in legal_moves
+                                            if move & 63 == origin
+                                        )
+                                    )
                                     self.__update(possible_moves, base.board)
                                     self.__draw_pieces(base.board)
                                     piece_active = True
@@ -284,6 +293,7 @@ def init(self, base) -> None:  # noqa: C901
                                 self.__draw_board()
                                 self.__draw_pieces(base.board)
                                 self.__gameflow(base, piece_selected, grid[::-1])
+                                legal_moves = None
                                 base.turns[base.total_turns] = {
                                     current_player.name: (piece_selected[::-1], grid[::-1], current_player.color)
                                 }
@@ -0,0 +1,99 @@
+"""Vectorized evaluation of many positions at once (needs the optional numpy dependency)."""
+
+
+from __future__ import annotations
+
+import array
+import typing
+
+from wild_chess.logic import bitboard, evaluation, fen
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore[assignment]
+
+__all__: tuple[str, ...] = ("HAS_NUMPY", "encode", "evaluate_records", "evaluate_many")
+
+HAS_NUMPY: typing.Final[bool] = numpy is not None
+
+# evaluation.SCORES flattened, so a record's square i holding code c scores TABLE[c * 64 + i].
+TABLE: typing.Final[typing.Any] = None if numpy is None else numpy.array(evaluation.SCORES, dtype=numpy.int32).ravel()
+
+
+class HasPosition(typing.Protocol):
+    """Anything that wraps a bitboard position, such as a board."""
+
+    position: bitboard.Position
+
+
+# Boards, positions, or FEN strings such as the ones initial_pos() returns.
+Positionable = typing.Union[bitboard.Position, str, HasPosition]
+
+
+def _position_of(item: Positionable) -> bitboard.Position:
+    """The bitboard position behind *item*."""
+    if isinstance(item, bitboard.Position):
+        return item
+    if isinstance(item, str):
+        return fen.parse(item)
+    return item.position
+
+
+def encode(items: typing.Iterable[Positionable]) -> array.array[int]:
+    """
+    Pack positions into records laid out like the ones of :func:`fen.read_array`.
+
+    FEN strings are packed straight from their text, without building a position.
+
+    :param items:
+    :type items: typing.Iterable[Positionable]
+    :return:
+    :rtype: array.array[int]
+    """
+    records = array.array("b")
+    for item in items:
+        if isinstance(item, str):
+            fen.pack(item, records)
+            continue
+        position = _position_of(item)
+        records.extend(position.mailbox)
+        records.append(position.side)
+        records.append(position.ep)
+    return records
+
+
+def evaluate_records(records: typing.Any) -> typing.Any:
+    """
+    Score packed records in one go, each from its side to move's point of view.
+
+    Gives the same numbers as :func:`evaluation.evaluate`, but sums the piece-square tables with numpy instead of
+    walking the bitboards one piece at a time.
+
+    :param records: Output of :func:`encode` or :func:`fen.read_array`, or an int8 array of shape (n, 66)
+    :type records: typing.Any
+    :return: One int32 score per record
+    :rtype: numpy.ndarray
+    """
+    if numpy is None:
+        raise ImportError("vectorized evaluation needs numpy, install it with the 'fast' extra")
+    rows = numpy.frombuffer(records, dtype=numpy.int8) if isinstance(records, array.array) else numpy.asarray(records)
+    rows = rows.reshape(-1, fen.RECORD_SIZE)
+    scores = TABLE[rows[:, :64].astype(numpy.intp) * 64 + numpy.arange(64)].sum(axis=1, dtype=numpy.int32)
+    return numpy.where(rows[:, 64] == bitboard.BLACK, -scores, scores)
+
+
+def evaluate_many(items: typing.Iterable[Positionable]) -> list[int]:
+    """
+    Score many boards, positions or FEN strings, each from its side to move's point of view.
+
+    Uses numpy when it is installed and falls back to :func:`evaluation.evaluate` otherwise.
+
+    :param items:
+    :type items: typing.Iterable[Positionable]
+    :return:
+    :rtype: list[int]
+    """
+    if numpy is None:
+        return [evaluation.evaluate(_position_of(item)) for item in items]
+    return typing.cast(list[int], evaluate_records(encode(items)).tolist())
@@ -0,0 +1,730 @@
+"""Bitboard position core shared by the board, the pieces and the rules."""
+
+
+from __future__ import annotations
+
+import random
+import typing
+
+__all__: tuple[str, ...] = (
+    "WHITE",
+    "BLACK",
+    "COLOR_NAMES",
+    "PAWN",
+    "KNIGHT",
+    "BISHOP",
+    "ROOK",
+    "QUEEN",
+    "KING",
+    "PIECE_NAMES",
+    "EMPTY",
+    "Position",
+    "Undo",
+    "encode_move",
+    "decode_move",
+    "square",
+    "coords",
+    "iter_squares",
+    "piece_code",
+    "COORDS",
+    "KNIGHT_ATTACKS",
+    "KING_ATTACKS",
+    "PAWN_ATTACKS",
+    "knight_attacks",
+    "king_attacks",
+    "pawn_attacks",
+    "rook_attacks",
+    "bishop_attacks",
+    "queen_attacks",
+)
+
+WHITE: typing.Final[int] = 0
+BLACK: typing.Final[int] = 1
+COLOR_NAMES: typing.Final[tuple[str, str]] = ("white", "black")
+
+PAWN: typing.Final[int] = 0
+KNIGHT: typing.Final[int] = 1
+BISHOP: typing.Final[int] = 2
+ROOK: typing.Final[int] = 3
+QUEEN: typing.Final[int] = 4
+KING: typing.Final[int] = 5
+PIECE_NAMES: typing.Final[tuple[str, ...]] = ("Pawn", "Knight", "Bishop", "Rook", "Queen", "King")
+
+# Piece codes are ``color * 6 + piece type``, so 0-5 are white pieces, 6-11 black pieces and 12 an empty square.
+EMPTY: typing.Final[int] = 12
+
+FULL: typing.Final[int] = (1 << 64) - 1
+RANK_1: typing.Final[int] = 0xFF
+RANK_8: typing.Final[int] = RANK_1 << 56
+
+ROOK_DIRECTIONS: typing.Final[tuple[tuple[int, int], ...]] = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRECTIONS: typing.Final[tuple[tuple[int, int], ...]] = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+def square(row: int, column: int) -> int:
+    """
+    Convert a (row, column) grid position to a square index.
+
+    Row 0 is white's back rank, so the index matches the usual a1 = 0, h8 = 63 layout.
+
+    :param row:
+    :type row: int
+    :param column:
+    :type column: int
+    :return:
+    :rtype: int
+    """
+    return row * 8 + column
+
+
+def coords(sq: int) -> tuple[int, int]:
+    """
+    Convert a square index back to a (row, column) grid position.
+
+    :param sq:
+    :type sq: int
+    :return:
+    :rtype: tuple[int, int]
+    """
+    return sq >> 3, sq & 7
+
+
+def iter_squares(bb: int) -> typing.Iterator[int]:
+    """
+    Yield the index of every set bit of a bitboard, lowest first.
+
+    :param bb:
+    :type bb: int
+    :return:
+    :rtype: typing.Iterator[int]
+    """
+    while bb:
+        lsb = bb & -bb
+        yield lsb.bit_length() - 1
+        bb ^= lsb
+
+
+def encode_move(origin: int, target: int, promotion: int = 0) -> int:
+    """
+    Pack a move into an int: 6 bits each for the two squares, then the piece type a pawn promotes to (0 for none).
+
+    :param origin:
+    :type origin: int
+    :param target:
+    :type target: int
+    :param promotion:
+    :type promotion: int
+    :return:
+    :rtype: int
+    """
+    return origin | (target << 6) | (promotion << 12)
+
+
+def decode_move(move: int) -> tuple[int, int, int]:
+    """
+    Unpack a move made by :func:`encode_move` into (origin, target, promotion).
+
+    :param move:
+    :type move: int
+    :return:
+    :rtype: tuple[int, int, int]
+    """
+    return move & 63, (move >> 6) & 63, move >> 12
+
+
+class Undo(typing.NamedTuple):
+    """Everything :meth:`Position.unmake_move` needs that the move itself does not say."""
+
+    moved: int
+    captured: int
+    capture_square: int
+    ep: int
+    halfmove: int
+
+
+def piece_code(piece_type: int, color: int) -> int:
+    """
+    Pack a piece type and a color into a piece code.
+
+    :param piece_type:
+    :type piece_type: int
+    :param color:
+    :type color: int
+    :return:
+    :rtype: int
+    """
+    return color * 6 + piece_type
+
+
+def _leaper_attacks(sq: int, jumps: tuple[tuple[int, int], ...]) -> int:
+    """Squares reached from *sq* by each (row, column) jump that stays on the board."""
+    attacks = 0
+    row, column = coords(sq)
+    for d_row, d_column in jumps:
+        r, c = row + d_row, column + d_column
+        if 0 <= r < 8 and 0 <= c < 8:
+            attacks |= 1 << (r * 8 + c)
+    return attacks
+
+
+def _ray(sq: int, direction: tuple[int, int]) -> int:
+    """Squares from *sq* (exclusive) to the edge of the board in *direction*."""
+    ray = 0
+    row, column = coords(sq)
+    r, c = row + direction[0], column + direction[1]
+    while 0 <= r < 8 and 0 <= c < 8:
+        ray |= 1 << (r * 8 + c)
+        r += direction[0]
+        c += direction[1]
+    return ray
+
+
+# Everything below is computed once at import time, so move generation is a handful of table lookups per piece.
+COORDS: typing.Final[tuple[tuple[int, int], ...]] = tuple(coords(sq) for sq in range(64))
+KNIGHT_ATTACKS: typing.Final[tuple[int, ...]] = tuple(
+    _leaper_attacks(sq, ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2))) for sq in range(64)
+)
+KING_ATTACKS: typing.Final[tuple[int, ...]] = tuple(
+    _leaper_attacks(sq, ((1, 1), (1, 0), (1, -1), (0, 1), (0, -1), (-1, 1), (-1, 0), (-1, -1))) for sq in range(64)
+)
+PAWN_ATTACKS: typing.Final[tuple[tuple[int, ...], tuple[int, ...]]] = (
+    tuple(_leaper_attacks(sq, ((1, 1), (1, -1))) for sq in range(64)),
+    tuple(_leaper_attacks(sq, ((-1, 1), (-1, -1))) for sq in range(64)),
+)
+# Rays pointing towards higher square indices are blocked by their lowest set bit, the others by their highest.
+ROOK_RAYS: typing.Final[tuple[tuple[tuple[int, ...], bool], ...]] = tuple(
+    (tuple(_ray(sq, direction) for sq in range(64)), direction[0] * 8 + direction[1] > 0) for direction in ROOK_DIRECTIONS
+)
+BISHOP_RAYS: typing.Final[tuple[tuple[tuple[int, ...], bool], ...]] = tuple(
+    (tuple(_ray(sq, direction) for sq in range(64)), direction[0] * 8 + direction[1] > 0) for direction in BISHOP_DIRECTIONS
+)
+
+
+def _between(origin: int, target: int) -> int:
+    """Squares strictly between *origin* and *target* if they share a line, else 0."""
+    for table, _ in ROOK_RAYS + BISHOP_RAYS:
+        if table[origin] >> target & 1:
+            return table[origin] ^ table[target] ^ (1 << target)
+    return 0
+
+
+BETWEEN: typing.Final[tuple[tuple[int, ...], ...]] = tuple(
+    tuple(_between(origin, target) for target in range(64)) for origin in range(64)
+)
+PROMOTIONS: typing.Final[tuple[int, ...]] = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+# Zobrist keys come from a fixed seed so a position hashes the same in every process and in files written earlier.
+_zobrist = random.Random(0x5A55_1E5)
+ZOBRIST_PIECES: typing.Final[tuple[tuple[int, ...], ...]] = tuple(
+    tuple(_zobrist.getrandbits(64) for _ in range(64)) for _ in range(12)
+)
+ZOBRIST_SIDE: typing.Final[int] = _zobrist.getrandbits(64)
+ZOBRIST_EP: typing.Final[tuple[int, ...]] = tuple(_zobrist.getrandbits(64) for _ in range(8))
+
+
+def _slide(sq: int, occupied: int, rays: tuple[tuple[tuple[int, ...], bool], ...]) -> int:
+    """Combine the *rays* from *sq*, cutting each one off behind its first blocker."""
+    attacks = 0
+    for table, positive in rays:
+        ray = table[sq]
+        blockers = ray & occupied
+        if blockers:
+            first = (blockers & -blockers).bit_length() - 1 if positive else blockers.bit_length() - 1
+            ray ^= table[first]
+        attacks |= ray
+    return attacks
+
+
+def knight_attacks(sq: int) -> int:
+    """Squares attacked by a knight on *sq*."""
+    return KNIGHT_ATTACKS[sq]
+
+
+def king_attacks(sq: int) -> int:
+    """Squares attacked by a king on *sq*."""
+    return KING_ATTACKS[sq]
+
+
+def pawn_attacks(sq: int, color: int) -> int:
+    """Squares attacked by a pawn of *color* on *sq*."""
+    return PAWN_ATTACKS[color][sq]
+
+
+def rook_attacks(sq: int, occupied: int) -> int:
+    """Squares attacked by a rook on *sq* given the *occupied* squares."""
+    return _slide(sq, occupied, ROOK_RAYS)
+
+
+def bishop_attacks(sq: int, occupied: int) -> int:
+    """Squares attacked by a bishop on *sq* given the *occupied* squares."""
+    return _slide(sq, occupied, BISHOP_RAYS)
+
+
+def queen_attacks(sq: int, occupied: int) -> int:
+    """Squares attacked by a queen on *sq* given the *occupied* squares."""
+    return _slide(sq, occupied, ROOK_RAYS) | _slide(sq, occupied, BISHOP_RAYS)
+
+
+class Position:
+    """
+    A chess position stored as bitboards.
+
+    ``pieces`` holds one 64-bit integer per piece code, ``occupancy`` one per color and ``mailbox`` the piece code
+    of every square, so both "which squares hold white knights" and "what is on e4" are single lookups.
+
+    ``attacks`` keeps the attack set of the piece on every square. :meth:`put` and :meth:`remove` only refresh the
+    square they touch and the sliders whose rays cross it, and the per-color union in ``attacked`` is rebuilt from
+    those sets on the next query, so "is this square attacked" never regenerates any moves.
+
+    ``key`` is the Zobrist hash of the pieces, side to move and en passant file, kept up to date by every change.
+    """
+
+    __slots__ = ("pieces", "occupancy", "mailbox", "attacks", "attacked", "side", "ep", "halfmove", "fullmove", "key")
+
+    pieces: list[int]
+    occupancy: list[int]
+    mailbox: list[int]
+    attacks: list[int]
+    attacked: list[int]
+    side: int
+    ep: int
+    halfmove: int
+    fullmove: int
+    key: int
+
+    def __init__(self) -> None:
+        self.pieces = [0] * 12
+        self.occupancy = [0, 0]
+        self.mailbox = [EMPTY] * 64
+        self.attacks = [0] * 64
+        self.attacked = [0, 0]
+        self.side = WHITE
+        self.ep = -1
+        self.halfmove = 0
+        self.fullmove = 1
+        self.key = 0
+
+    @classmethod
+    def from_grid(cls, grid: typing.Iterable[typing.Iterable[typing.Any]]) -> Position:
+        """
+        Build a position from an 8x8 grid of pieces.
+
+        Every non-empty cell must have a ``code`` attribute holding its piece code.
+
+        :param grid:
+        :type grid: typing.Iterable[typing.Iterable[typing.Any]]
+        :return:
+        :rtype: Position
+        """
+        position = cls()
+        for row, cells in enumerate(grid):
+            for column, piece in enumerate(cells):
+                if piece is not None:
+                    position.put(square(row, column), piece.code)
+        return position
+
+    def copy(self) -> Position:
+        """
+        Get an independent copy of this position.
+
+        :return:
+        :rtype: Position
+        """
+        position = Position.__new__(Position)
+        position.pieces = list(self.pieces)
+        position.occupancy = list(self.occupancy)
+        position.mailbox = list(self.mailbox)
+        position.attacks = list(self.attacks)
+        position.attacked = list(self.attacked)
+        position.side = self.side
+        position.ep = self.ep
+        position.halfmove = self.halfmove
+        position.fullmove = self.fullmove
+        position.key = self.key
+        return position
+
+    def refresh(self) -> None:
+        """
+        Rebuild occupancy, attack sets and the key from ``pieces`` and ``mailbox``.
+
+        Lets bulk loaders fill the bitboards directly instead of paying for :meth:`put` on every piece.
+        """
+        self.occupancy = [0, 0]
+        for code, bb in enumerate(self.pieces):
+            self.occupancy[code // 6] |= bb
+        self.attacks = [0] * 64
+        for sq in iter_squares(self.occupancy[WHITE] | self.occupancy[BLACK]):
+            self.attacks[sq] = self.attacks_from(sq)
+        self.attacked = [-1, -1]
+        self.key = self.compute_key()
+
+    def compute_key(self) -> int:
+        """
+        Compute the Zobrist key from scratch, which ``key`` always equals.
+
+        :return:
+        :rtype: int
+        """
+        key = ZOBRIST_SIDE if self.side == BLACK else 0
+        if self.ep >= 0:
+            key ^= ZOBRIST_EP[self.ep & 7]
+        for sq, code in enumerate(self.mailbox):
+            if code != EMPTY:
+                key ^= ZOBRIST_PIECES[code][sq]
+        return key
+
+    @property
+    def occupied(self) -> int:
+        """All occupied squares."""
+        return self.occupancy[WHITE] | self.occupancy[BLACK]
+
+    def put(self, sq: int, code: int) -> None:
+        """
+        Place the piece *code* on the empty square *sq*.
+
+        :param sq:
+        :type sq: int
+        :param code:
+        :type code: int
+        """
+        bit = 1 << sq
+        self.pieces[code] |= bit
+        self.occupancy[code // 6] |= bit
+        self.mailbox[sq] = code
+        self.key ^= ZOBRIST_PIECES[code][sq]
+        self.update_attacks(sq)
+
+    def remove(self, sq: int) -> int:
+        """
+        Remove whatever stands on *sq* and return its piece code.
+
+        :param sq:
+        :type sq: int
+        :return:
+        :rtype: int
+        """
+        code = self.mailbox[sq]
+        if code != EMPTY:
+            bit = 1 << sq
+            self.pieces[code] ^= bit
+            self.occupancy[code // 6] ^= bit
+            self.mailbox[sq] = EMPTY
+            self.key ^= ZOBRIST_PIECES[code][sq]
+            self.update_attacks(sq)
+        return code
+
+    def update_attacks(self, sq: int) -> None:
+        """
+        Refresh the attack sets affected by a change on *sq*.
+
+        Those are the set of the piece on *sq* itself and of every slider whose rays reach *sq*, since they now stop
+        at (or run through) it.
+
+        :param sq:
+        :type sq: int
+        """
+        pieces = self.pieces
+        occupied = self.occupancy[WHITE] | self.occupancy[BLACK]
+        queens = pieces[QUEEN] | pieces[6 + QUEEN]
+        diagonal = pieces[BISHOP] | pieces[6 + BISHOP] | queens
+        straight = pieces[ROOK] | pieces[6 + ROOK] | queens
+        sliders = 0
+        if diagonal:
+            sliders |= _slide(sq, occupied, BISHOP_RAYS) & diagonal
+        if straight:
+            sliders |= _slide(sq, occupied, ROOK_RAYS) & straight
+        attacks = self.attacks
+        for slider in iter_squares(sliders):
+            attacks[slider] = self.attacks_from(slider)
+        attacks[sq] = self.attacks_from(sq)
+        self.attacked[WHITE] = self.attacked[BLACK] = -1
+
+    def attacked_by(self, color: int) -> int:
+        """
+        All squares attacked by *color*.
+
+        :param color:
+        :type color: int
+        :return:
+        :rtype: int
+        """
+        attacked = self.attacked[color]
+        if attacked < 0:
+            attacked = 0
+            attacks = self.attacks
+            for sq in iter_squares(self.occupancy[color]):
+                attacked |= attacks[sq]
+            self.attacked[color] = attacked
+        return attacked
+
+    def piece_at(self, sq: int) -> int:
+        """Return the piece code on *sq* (``EMPTY`` if there is none)."""
+        return self.mailbox[sq]
+
+    def king_square(self, color: int) -> int:
+        """Return the square of *color*'s king, or -1 if it has none."""
+        king = self.pieces[piece_code(KING, color)]
+        return (king & -king).bit_length() - 1
+
+    def attacks_from(self, sq: int, code: typing.Optional[int] = None) -> int:
+        """
+        Squares attacked by the piece standing on *sq*, or by a *code* piece if one were standing there.
+
+        :param sq:
+        :type sq: int
+        :param code:
+        :type code: typing.Optional[int]
+        :return:
+        :rtype: int
+        """
+        if code is None:
+            code = self.mailbox[sq]
+        if code == EMPTY:
+            return 0
+        piece_type = code % 6
+        if piece_type == PAWN:
+            return PAWN_ATTACKS[code // 6][sq]
+        if piece_type == KNIGHT:
+            return KNIGHT_ATTACKS[sq]
+        if piece_type == KING:
+            return KING_ATTACKS[sq]
+        occupied = self.occupancy[WHITE] | self.occupancy[BLACK]
+        if piece_type == BISHOP:
+            return _slide(sq, occupied, BISHOP_RAYS)
+        if piece_type == ROOK:
+            return _slide(sq, occupied, ROOK_RAYS)
+        return _slide(sq, occupied, ROOK_RAYS) | _slide(sq, occupied, BISHOP_RAYS)
+
+    def attackers_to(self, sq: int, color: int) -> int:
+        """
+        All pieces of *color* attacking *sq*.
+
+        :param sq:
+        :type sq: int
+        :param color:
+        :type color: int
+        :return:
+        :rtype: int
+        """
+        return self._attackers(sq, color, self.occupancy[WHITE] | self.occupancy[BLACK])
+
+    def _attackers(self, sq: int, color: int, occupied: int) -> int:
+        """Pieces of *color* attacking *sq* if only the *occupied* squares blocked sliders."""
+        offset = color * 6
+        pieces = self.pieces
+        queens = pieces[offset + QUEEN]
+        attackers = (
+            (PAWN_ATTACKS[color ^ 1][sq] & pieces[offset + PAWN])
+            | (KNIGHT_ATTACKS[sq] & pieces[offset + KNIGHT])
+            | (KING_ATTACKS[sq] & pieces[offset + KING])
+        )
+        if pieces[offset + BISHOP] | queens:
+            attackers |= _slide(sq, occupied, BISHOP_RAYS) & (pieces[offset + BISHOP] | queens)
+        if pieces[offset + ROOK] | queens:
+            attackers |= _slide(sq, occupied, ROOK_RAYS) & (pieces[offset + ROOK] | queens)
+        return attackers
+
+    def is_attacked(self, sq: int, color: int) -> bool:
+        """Whether any piece of *color* attacks *sq*."""
+        return (self.attacked_by(color) >> sq) & 1 == 1
+
+    def in_check(self, color: int) -> bool:
+        """Whether *color*'s king is attacked."""
+        king = self.king_square(color)
+        return king >= 0 and self.is_attacked(king, color ^ 1)
+
+    def targets(self, sq: int, code: typing.Optional[int] = None) -> int:
+        """
+        Squares the piece on *sq* (or a *code* piece standing there) may move to.
+
+        Whether the mover's own king is left in check is not considered. Like the grid rules, kings can never be
+        captured.
+
+        :param sq:
+        :type sq: int
+        :param code:
+        :type code: typing.Optional[int]
+        :return:
+        :rtype: int
+        """
+        if code is None:
+            code = self.mailbox[sq]
+        if code == EMPTY:
+            return 0
+        color = code // 6
+        enemy = self.occupancy[color ^ 1] & ~self.pieces[piece_code(KING, color ^ 1)]
+        if code % 6 != PAWN:
+            return self.attacks_from(sq, code) & ~self.occupancy[color] & ~self.pieces[piece_code(KING, color ^ 1)]
+
+        empty = FULL ^ self.occupied
+        captures = PAWN_ATTACKS[color][sq] & enemy
+        if self.ep >= 0:
+            captures |= PAWN_ATTACKS[color][sq] & (1 << self.ep)
+        bit = 1 << sq
+        if color == WHITE:
+            single = (bit << 8) & empty
+            double = ((single << 8) & empty) if sq >> 3 == 1 else 0
+        else:
+            single = (bit >> 8) & empty
+            double = ((single >> 8) & empty) if sq >> 3 == 6 else 0
+        return single | double | captures
+
+    def legal_moves(self, color: typing.Optional[int] = None) -> list[int]:  # noqa: C901
+        """
+        Every fully legal move for *color* (the side to move by default), packed with :func:`encode_move`.
+
+        Pinned pieces are held to the line between their king and the pinning slider, and while in check only
+        captures of the checker, blocks and king moves are generated, so no move has to be tried and taken back
+        except the rare en passant capture.
+
+        :param color:
+        :type color: typing.Optional[int]
+        :return:
+        :rtype: list[int]
+        """
+        us = self.side if color is None else color
+        them = us ^ 1
+        pieces = self.pieces
+        mailbox = self.mailbox
+        attacks = self.attacks
+        own = self.occupancy[us]
+        enemy = self.occupancy[them]
+        occupied = own | enemy
+        enemy_king = pieces[them * 6 + KING]
+        capturable = enemy & ~enemy_king
+        moves: list[int] = []
+
+        king = self.king_square(us)
+        evasions = FULL
+        pinned: dict[int, int] = {}
+        if king >= 0:
+            checkers = self.attackers_to(king, them)
+            king_bit = 1 << king
+            danger = self.attacked_by(them)
+            for target in iter_squares(KING_ATTACKS[king] & ~own & ~enemy_king):
+                if checkers:
+                    if self._attackers(target, them, occupied ^ king_bit):
+                        continue
+                elif danger >> target & 1:
+                    continue
+                moves.append(king | (target << 6))
+            if checkers & (checkers - 1):
+                return moves
+            if checkers:
+                checker = checkers.bit_length() - 1
+                evasions = checkers | BETWEEN[king][checker]
+
+            queens = pieces[them * 6 + QUEEN]
+            snipers = (_slide(king, enemy, ROOK_RAYS) & (pieces[them * 6 + ROOK] | queens)) | (
+                _slide(king, enemy, BISHOP_RAYS) & (pieces[them * 6 + BISHOP] | queens)
+            )
+            for sniper in iter_squares(snipers):
+                between = BETWEEN[king][sniper] & occupied
+                if between and not between & (between - 1) and between & own:
+                    pinned[between.bit_length() - 1] = BETWEEN[king][sniper] | (1 << sniper)
+
+        empty = FULL ^ occupied
+        last_rank = RANK_8 if us == WHITE else RANK_1
+        ep = self.ep
+        for origin in iter_squares(own & ~pieces[us * 6 + KING]):
+            allowed = evasions & pinned.get(origin, FULL)
+            if mailbox[origin] % 6 != PAWN:
+                for target in iter_squares(attacks[origin] & ~own & ~enemy_king & allowed):
+                    moves.append(origin | (target << 6))
+                continue
+
+            if us == WHITE:
+                single = (1 << (origin + 8)) & empty if origin < 56 else 0
+                double = ((single << 8) & empty) if origin >> 3 == 1 else 0
+            else:
+                single = (1 << (origin - 8)) & empty if origin >= 8 else 0
+                double = ((single >> 8) & empty) if origin >> 3 == 6 else 0
+            for target in iter_squares((single | double | (PAWN_ATTACKS[us][origin] & capturable)) & allowed):
+                if (1 << target) & last_rank:
+                    moves.extend(origin | (target << 6) | (promotion << 12) for promotion in PROMOTIONS)
+                else:
+                    moves.append(origin | (target << 6))
+            if ep >= 0 and PAWN_ATTACKS[us][origin] >> ep & 1:
+                move = origin | (ep << 6)
+                undo = self.make_move(move)
+                if king < 0 or not self._attackers(king, them, self.occupancy[WHITE] | self.occupancy[BLACK]):
+                    moves.append(move)
+                self.unmake_move(move, undo)
+        return moves
+
+    def make_move(self, move: int) -> Undo:
+        """
+        Play a packed *move* and return the record needed to take it back.
+
+        En passant captures, double pawn pushes and promotions are worked out here, so a move only names its two
+        squares and, optionally, the piece a pawn promotes to (a queen if it names none).
+
+        :param move:
+        :type move: int
+        :return:
+        :rtype: Undo
+        """
+        origin, target, promotion = move & 63, (move >> 6) & 63, move >> 12
+        code = self.remove(origin)
+        color = code // 6
+        pawn_move = code % 6 == PAWN
+        capture_square = target
+        if pawn_move and target == self.ep and (target - origin) % 8:
+            capture_square = target - 8 if color == WHITE else target + 8
+        captured = self.remove(capture_square)
+        undo = Undo(code, captured, capture_square, self.ep, self.halfmove)
+        if self.ep >= 0:
+            self.key ^= ZOBRIST_EP[self.ep & 7]
+            self.ep = -1
+        if pawn_move:
+            if abs(target - origin) == 16:
+                self.ep = (origin + target) // 2
+                self.key ^= ZOBRIST_EP[self.ep & 7]
+            if (1 << target) & (RANK_8 if color == WHITE else RANK_1):
+                code = piece_code(promotion or QUEEN, color)
+        self.put(target, code)
+        self.halfmove = 0 if captured != EMPTY or pawn_move else self.halfmove + 1
+        if color == BLACK:
+            self.fullmove += 1
+        self.side = color ^ 1
+        self.key ^= ZOBRIST_SIDE
+        return undo
+
+    def unmake_move(self, move: int, undo: Undo) -> None:
+        """
+        Take back *move*, which must be the last move played, using the *undo* record it returned.
+
+        :param move:
+        :type move: int
+        :param undo:
+        :type undo: Undo
+        """
+        self.remove((move >> 6) & 63)
+        self.put(move & 63, undo.moved)
+        if undo.captured != EMPTY:
+            self.put(undo.capture_square, undo.captured)
+        if self.ep >= 0:
+            self.key ^= ZOBRIST_EP[self.ep & 7]
+        if undo.ep >= 0:
+            self.key ^= ZOBRIST_EP[undo.ep & 7]
+        self.key ^= ZOBRIST_SIDE
+        self.ep = undo.ep
+        self.halfmove = undo.halfmove
+        self.side = undo.moved // 6
+        if self.side == BLACK:
+            self.fullmove -= 1
+
+    def move(self, origin: int, target: int, promotion: int = QUEEN) -> int:
+        """
+        Play the move *origin* -> *target* and return the code of the captured piece.
+
+        :param origin:
+        :type origin: int
+        :param target:
+        :type target: int
+        :param promotion:
+        :type promotion: int
+        :return:
+        :rtype: int
+        """
+        return self.make_move(encode_move(origin, target, promotion)).captured
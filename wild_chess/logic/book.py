@@ -0,0 +1,294 @@
+"""Precomputed evaluations of wild start positions, read from a memory-mapped file."""
+
+
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import pathlib
+import random
+import struct
+import typing
+
+from wild_chess.logic import bitboard, fen, initial_position
+
+__all__: tuple[str, ...] = (
+    "BOOK_PATH",
+    "BookEntry",
+    "Book",
+    "start_key",
+    "ranks_of",
+    "key_of",
+    "build",
+    "write",
+    "default",
+    "main",
+)
+
+BOOK_PATH: typing.Final[pathlib.Path] = pathlib.Path(
+    os.getenv("WILD_CHESS_BOOK", pathlib.Path(__file__).parent / "wild_book.bin")
+)
+MAGIC: typing.Final[bytes] = b"WCB1"
+# Header: magic and number of records. Records: key, score for white, best move, search depth, sorted by key.
+HEADER: typing.Final[struct.Struct] = struct.Struct("<4sI")
+RECORD: typing.Final[struct.Struct] = struct.Struct("<QhHB3x")
+# Every square of both generated ranks but the king's holds one of these five letters.
+ALPHABET: typing.Final[str] = initial_position.WILD_PIECES
+KING_FILE: typing.Final[int] = 4
+# 5 ** 15 distinct starts: far too many to enumerate, so books are built from samples.
+KEYS: typing.Final[int] = len(ALPHABET) ** 15
+
+
+class BookEntry(typing.NamedTuple):
+    """What the book knows about a start position."""
+
+    key: int
+    score: int
+    move: int
+    depth: int
+
+
+def start_key(back: str, pawns: str) -> int:
+    """
+    Number a start of ``Board.generate_pieces`` by reading its non-king letters as base-5 digits.
+
+    :param back: Back rank from white's side, a to h, with the king on the e-file
+    :type back: str
+    :param pawns: Pawn rank from white's side, a to h
+    :type pawns: str
+    :return: A key in ``range(KEYS)``
+    :rtype: int
+    """
+    key = 0
+    for letter in pawns + back[:KING_FILE] + back[KING_FILE + 1 :]:
+        key = key * len(ALPHABET) + ALPHABET.index(letter)
+    return key
+
+
+def ranks_of(key: int) -> tuple[str, str]:
+    """
+    Undo :func:`start_key`.
+
+    :param key:
+    :type key: int
+    :return: (back rank, pawn rank)
+    :rtype: tuple[str, str]
+    """
+    letters = ""
+    for _ in range(15):
+        key, digit = divmod(key, len(ALPHABET))
+        letters = ALPHABET[digit] + letters
+    back = letters[8:]
+    return back[:KING_FILE] + "K" + back[KING_FILE:], letters[:8]
+
+
+def key_of(position: bitboard.Position) -> typing.Optional[int]:
+    """
+    The start key of *position*, or None unless it is an untouched ``Board.generate_pieces`` start.
+
+    :param position:
+    :type position: bitboard.Position
+    :return:
+    :rtype: typing.Optional[int]
+    """
+    if position.side != bitboard.WHITE or position.fullmove != 1 or position.halfmove:
+        return None
+    mailbox = position.mailbox
+    if any(code != bitboard.EMPTY for code in mailbox[16:48]):
+        return None
+    back = pawns = ""
+    for col in range(8):
+        for row, rank in ((0, 7), (1, 6)):
+            code = mailbox[row * 8 + col]
+            if code == bitboard.EMPTY or code >= 6 or mailbox[rank * 8 + col] != code + 6:
+                return None
+        back += fen.LETTERS[mailbox[col]]
+        pawns += fen.LETTERS[mailbox[8 + col]]
+    if back[KING_FILE] != "K" or any(letter not in ALPHABET for letter in pawns + back[:KING_FILE] + back[KING_FILE + 1 :]):
+        return None
+    return start_key(back, pawns)
+
+
+class Book:
+    """
+    A book file, memory-mapped so only the pages that lookups touch are ever read.
+
+    Lookups are binary searches over the sorted fixed-size records.
+    """
+
+    __slots__ = ("file", "data", "count")
+
+    file: typing.BinaryIO
+    data: mmap.mmap
+    count: int
+
+    def __init__(self, path: pathlib.Path | str = BOOK_PATH) -> None:
+        self.file = open(path, "rb")  # pylint: disable=consider-using-with
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"{path} is not a book: it is empty") from None
+        magic, self.count = HEADER.unpack_from(self.data)
+        if magic != MAGIC or len(self.data) != HEADER.size + self.count * RECORD.size:
+            self.close()
+            raise ValueError(f"{path} is not a book")
+
+    def __enter__(self) -> Book:
+        return self
+
+    def __exit__(self, *_: typing.Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        """Unmap and close the file."""
+        self.data.close()
+        self.file.close()
+
+    def entry(self, index: int) -> BookEntry:
+        """
+        The *index*-th record, in key order.
+
+        :param index:
+        :type index: int
+        :return:
+        :rtype: BookEntry
+        """
+        return BookEntry(*RECORD.unpack_from(self.data, HEADER.size + index * RECORD.size))
+
+    def get(self, key: int) -> typing.Optional[BookEntry]:
+        """
+        Look a start key up.
+
+        :param key:
+        :type key: int
+        :return: The entry, or None if the start is not in the book
+        :rtype: typing.Optional[BookEntry]
+        """
+        data = self.data
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            found = struct.unpack_from("<Q", data, HEADER.size + middle * RECORD.size)[0]
+            if found < key:
+                low = middle + 1
+            elif found > key:
+                high = middle
+            else:
+                return self.entry(middle)
+        return None
+
+    def lookup(self, position: bitboard.Position) -> typing.Optional[BookEntry]:
+        """
+        Look *position* up, if it is a start position.
+
+        :param position:
+        :type position: bitboard.Position
+        :return:
+        :rtype: typing.Optional[BookEntry]
+        """
+        key = key_of(position)
+        return None if key is None else self.get(key)
+
+
+_default: typing.Optional[Book] = None
+
+
+def default() -> typing.Optional[Book]:
+    """
+    The book at :data:`BOOK_PATH` (set ``WILD_CHESS_BOOK`` to move it), opened once, or None if there is none.
+
+    :return:
+    :rtype: typing.Optional[Book]
+    """
+    global _default  # pylint: disable=global-statement
+    if _default is None and BOOK_PATH.is_file():
+        _default = Book(BOOK_PATH)
+    return _default
+
+
+def _evaluate(key: int, depth: int, time_limit: float) -> BookEntry:
+    """Worker entry point: search the start *key* and record the result from white's point of view."""
+    # Only building the book searches; game records and the server look starts up without loading the engine.
+    from wild_chess.logic import search  # pylint: disable=import-outside-toplevel
+
+    position = fen.parse(initial_position.wild_fen(*ranks_of(key)))
+    result = search.Searcher(time_limit, depth).search(position)
+    score = max(-0x7FFF, min(0x7FFF, result.score))
+    return BookEntry(key, score, result.move, result.depth)
+
+
+def write(entries: typing.Iterable[BookEntry], path: pathlib.Path | str = BOOK_PATH) -> int:
+    """
+    Write *entries* as a book file, sorted by key and without duplicate keys.
+
+    :param entries:
+    :type entries: typing.Iterable[BookEntry]
+    :param path:
+    :type path: pathlib.Path | str
+    :return: How many records were written
+    :rtype: int
+    """
+    unique = sorted({entry.key: entry for entry in entries}.values())
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(unique)))
+        for entry in unique:
+            file.write(RECORD.pack(*entry))
+    return len(unique)
+
+
+def build(
+    count: int,
+    seed: int = 0,
+    depth: int = 4,
+    time_limit: float = 5.0,
+    workers: typing.Optional[int] = None,
+) -> list[BookEntry]:
+    """
+    Search *count* distinct seeded starts across a process pool.
+
+    :param count:
+    :type count: int
+    :param seed:
+    :type seed: int
+    :param depth: Search depth of every start
+    :type depth: int
+    :param time_limit: Cap on the seconds spent on one start
+    :type time_limit: float
+    :param workers: Number of processes, one per core if not given
+    :type workers: typing.Optional[int]
+    :return:
+    :rtype: list[BookEntry]
+    """
+    rng = random.Random(seed)
+    keys: set[int] = set()
+    while len(keys) < min(count, KEYS):
+        keys.add(start_key(*initial_position.wild_ranks(rng)))
+    import concurrent.futures  # pylint: disable=import-outside-toplevel
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(_evaluate, key, depth, time_limit) for key in sorted(keys)]
+        return [future.result() for future in futures]
+
+
+def main() -> None:
+    """Driver code."""
+    parser = argparse.ArgumentParser(description="Build an evaluation book of wild start positions.")
+    parser.add_argument("--count", type=int, default=1000, help="distinct starts to sample")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--time-limit", type=float, default=5.0, help="seconds per start at most")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", type=pathlib.Path, default=BOOK_PATH)
+    args = parser.parse_args()
+
+    entries = build(args.count, args.seed, args.depth, args.time_limit, args.workers)
+    print(f"wrote {write(entries, args.output)} starts to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Static evaluation: material plus piece-square tables."""
+
+
+from __future__ import annotations
+
+import typing
+
+from wild_chess.logic import bitboard
+
+__all__: tuple[str, ...] = ("MATERIAL", "PIECE_SQUARE", "SCORES", "evaluate")
+
+MATERIAL: typing.Final[tuple[int, ...]] = (100, 320, 330, 500, 900, 0)
+
+# Tables are written from white's side as seen on screen, rank 8 first, and flipped into square order below.
+# fmt: off
+_TABLES: typing.Final[tuple[tuple[int, ...], ...]] = (
+    (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ),
+    (
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ),
+    (
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ),
+    (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0,
+    ),
+    (
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20,
+    ),
+    (
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20,
+    ),
+)
+# fmt: on
+
+# PIECE_SQUARE[code][square] is material plus position bonus, positive for white and negative for black pieces.
+PIECE_SQUARE: typing.Final[tuple[tuple[int, ...], ...]] = tuple(
+    tuple(
+        MATERIAL[piece_type] + _TABLES[piece_type][(7 - (sq >> 3)) * 8 + (sq & 7)]
+        if color == bitboard.WHITE
+        else -(MATERIAL[piece_type] + _TABLES[piece_type][(sq >> 3) * 8 + (sq & 7)])
+        for sq in range(64)
+    )
+    for color in (bitboard.WHITE, bitboard.BLACK)
+    for piece_type in range(6)
+)
+# The same values with a zero row for EMPTY, so a mailbox can index it directly.
+SCORES: typing.Final[tuple[tuple[int, ...], ...]] = PIECE_SQUARE + ((0,) * 64,)
+
+
+def evaluate(position: bitboard.Position) -> int:
+    """
+    Score *position* in centipawns from the side to move's point of view.
+
+    :param position:
+    :type position: bitboard.Position
+    :return:
+    :rtype: int
+    """
+    score = 0
+    for code, bb in enumerate(position.pieces):
+        table = PIECE_SQUARE[code]
+        while bb:
+            lsb = bb & -bb
+            score += table[lsb.bit_length() - 1]
+            bb ^= lsb
+    return score if position.side == bitboard.WHITE else -score
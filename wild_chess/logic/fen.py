@@ -0,0 +1,272 @@
+"""FEN and EPD parsing and serialization for bitboard positions."""
+
+
+from __future__ import annotations
+
+import array
+import pathlib
+import typing
+
+from wild_chess.logic import bitboard
+
+__all__: tuple[str, ...] = (
+    "LETTERS",
+    "FILES",
+    "RECORD_SIZE",
+    "parse",
+    "serialize",
+    "parse_epd",
+    "serialize_epd",
+    "parse_many",
+    "read",
+    "read_array",
+    "pack",
+)
+
+LETTERS: typing.Final[str] = "PNBRQKpnbrqk"
+CODES: typing.Final[dict[str, int]] = {letter: code for code, letter in enumerate(LETTERS)}
+FILES: typing.Final[str] = "abcdefgh"
+# read_array() packs every position as its 64 mailbox codes, the side to move and the en passant square (-1 if none).
+RECORD_SIZE: typing.Final[int] = 66
+_EMPTY_RECORD: typing.Final[array.array[int]] = array.array("b", [bitboard.EMPTY] * 64 + [bitboard.WHITE, -1])
+
+
+def _placement(placement: str, mailbox: typing.MutableSequence[int], offset: int = 0) -> None:
+    """Fill *mailbox* (64 codes starting at *offset*) from the piece placement field of a FEN."""
+    ranks = placement.split("/")
+    if len(ranks) != 8:
+        raise ValueError(f"expected 8 ranks, got {len(ranks)}: {placement!r}")
+    for rank, cells in enumerate(ranks):
+        sq = offset + (7 - rank) * 8
+        end = sq + 8
+        for cell in cells:
+            if cell.isdigit():
+                sq += int(cell)
+                continue
+            code = CODES.get(cell)
+            if code is None:
+                raise ValueError(f"unknown piece {cell!r} in {placement!r}")
+            if sq >= end:
+                raise ValueError(f"rank {8 - rank} has more than 8 squares: {placement!r}")
+            mailbox[sq] = code
+            sq += 1
+        if sq != end:
+            raise ValueError(f"rank {8 - rank} does not have 8 squares: {placement!r}")
+
+
+def _side(name: str) -> int:
+    """Convert the side to move field of a FEN (``w`` or ``b``) to a color."""
+    if name not in ("w", "b"):
+        raise ValueError(f"invalid side to move {name!r}")
+    return bitboard.WHITE if name == "w" else bitboard.BLACK
+
+
+def _square(name: str) -> int:
+    """Convert a square name such as ``e3`` (or ``-``) to a square index (or -1)."""
+    if name == "-":
+        return -1
+    if len(name) != 2 or name[0] not in FILES or name[1] not in "12345678":
+        raise ValueError(f"invalid square {name!r}")
+    return bitboard.square(int(name[1]) - 1, FILES.index(name[0]))
+
+
+def _build(fields: list[str]) -> bitboard.Position:
+    """Build a position from the (at least one) space separated fields of a FEN or EPD."""
+    position = bitboard.Position()
+    mailbox = position.mailbox
+    _placement(fields[0], mailbox)
+    pieces = position.pieces
+    for sq, code in enumerate(mailbox):
+        if code != bitboard.EMPTY:
+            pieces[code] |= 1 << sq
+    if len(fields) > 1:
+        position.side = _side(fields[1])
+    # fields[2] holds castling rights, which wild chess does not have.
+    if len(fields) > 3:
+        position.ep = _square(fields[3])
+    position.refresh()
+    return position
+
+
+def parse(fen: str) -> bitboard.Position:
+    """
+    Build a position from a FEN string.
+
+    Only the piece placement is required; missing fields take their start-of-game values.
+
+    :param fen:
+    :type fen: str
+    :return:
+    :rtype: bitboard.Position
+    """
+    fields = fen.split()
+    if not fields:
+        raise ValueError("empty FEN")
+    position = _build(fields)
+    if len(fields) > 4:
+        position.halfmove = int(fields[4])
+    if len(fields) > 5:
+        position.fullmove = int(fields[5])
+    return position
+
+
+def _placement_of(position: bitboard.Position) -> str:
+    """The piece placement field of *position*."""
+    mailbox = position.mailbox
+    ranks = []
+    for row in range(7, -1, -1):
+        rank = ""
+        empty = 0
+        for code in mailbox[row * 8 : row * 8 + 8]:
+            if code == bitboard.EMPTY:
+                empty += 1
+                continue
+            if empty:
+                rank += str(empty)
+                empty = 0
+            rank += LETTERS[code]
+        ranks.append(rank + str(empty) if empty else rank)
+    return "/".join(ranks)
+
+
+def _state_of(position: bitboard.Position) -> str:
+    """The placement, side to move, castling and en passant fields of *position*."""
+    ep = "-" if position.ep < 0 else FILES[position.ep & 7] + str((position.ep >> 3) + 1)
+    return f"{_placement_of(position)} {'w' if position.side == bitboard.WHITE else 'b'} - {ep}"
+
+
+def serialize(position: bitboard.Position) -> str:
+    """
+    Write *position* as a FEN string.
+
+    :param position:
+    :type position: bitboard.Position
+    :return:
+    :rtype: str
+    """
+    return f"{_state_of(position)} {position.halfmove} {position.fullmove}"
+
+
+def parse_epd(epd: str) -> tuple[bitboard.Position, dict[str, str]]:
+    """
+    Build a position from an EPD line and collect its operations.
+
+    ``hmvc`` and ``fmvn`` operations set the move counters. Operands are kept as written, minus surrounding quotes.
+
+    :param epd:
+    :type epd: str
+    :return:
+    :rtype: tuple[bitboard.Position, dict[str, str]]
+    """
+    fields = epd.split(maxsplit=4)
+    if len(fields) < 4:
+        raise ValueError(f"EPD needs at least 4 fields: {epd!r}")
+    position = _build(fields[:4])
+    operations = {}
+    if len(fields) > 4:
+        for operation in fields[4].split(";"):
+            opcode, _, operand = operation.strip().partition(" ")
+            if opcode:
+                operations[opcode] = operand.strip().strip('"')
+    if "hmvc" in operations:
+        position.halfmove = int(operations["hmvc"])
+    if "fmvn" in operations:
+        position.fullmove = int(operations["fmvn"])
+    return position, operations
+
+
+def serialize_epd(position: bitboard.Position, operations: typing.Optional[dict[str, str]] = None) -> str:
+    """
+    Write *position* as an EPD line with *operations* appended.
+
+    :param position:
+    :type position: bitboard.Position
+    :param operations:
+    :type operations: typing.Optional[dict[str, str]]
+    :return:
+    :rtype: str
+    """
+    text = _state_of(position)
+    for opcode, operand in (operations or {}).items():
+        if " " in operand:
+            operand = f'"{operand}"'
+        text += f" {opcode} {operand};" if operand else f" {opcode};"
+    return text
+
+
+def parse_many(lines: typing.Iterable[str], epd: bool = False) -> list[bitboard.Position]:
+    """
+    Parse every non-empty, non-comment (``#``) line of FEN or EPD.
+
+    :param lines:
+    :type lines: typing.Iterable[str]
+    :param epd:
+    :type epd: bool
+    :return:
+    :rtype: list[bitboard.Position]
+    """
+    positions = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        positions.append(parse_epd(line)[0] if epd else parse(line))
+    return positions
+
+
+def read(path: pathlib.Path | str, epd: bool = False) -> list[bitboard.Position]:
+    """
+    Parse a whole file of FEN (or EPD) lines.
+
+    :param path:
+    :type path: pathlib.Path | str
+    :param epd:
+    :type epd: bool
+    :return:
+    :rtype: list[bitboard.Position]
+    """
+    with open(path, encoding="utf-8") as file:
+        return parse_many(file, epd)
+
+
+def read_array(path: pathlib.Path | str) -> array.array[int]:
+    """
+    Parse a whole file of FEN or EPD lines straight into a flat array, without building positions.
+
+    Every position takes :data:`RECORD_SIZE` signed bytes: its 64 mailbox codes, the side to move and the en
+    passant square (-1 if none).
+
+    :param path:
+    :type path: pathlib.Path | str
+    :return:
+    :rtype: array.array[int]
+    """
+    records = array.array("b")
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip() and not line.lstrip().startswith("#"):
+                pack(line, records)
+    return records
+
+
+def pack(text: str, records: array.array[int]) -> None:
+    """
+    Append the :data:`RECORD_SIZE` byte record of a FEN or EPD line to *records*, without building a position.
+
+    A line that :func:`parse` would reject raises the same ValueError and leaves *records* unchanged.
+
+    :param text:
+    :type text: str
+    :param records:
+    :type records: array.array[int]
+    """
+    fields = text.split(maxsplit=4)
+    if not fields:
+        raise ValueError("empty FEN")
+    record = array.array("b", _EMPTY_RECORD)
+    _placement(fields[0], record)
+    if len(fields) > 1:
+        record[64] = _side(fields[1])
+    if len(fields) > 3:
+        record[65] = _square(fields[3])
+    records.extend(record)
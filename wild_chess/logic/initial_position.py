@@ -1,9 +1,20 @@
 """wild_chess/Initial_Position.py"""
 import random
+import typing
 
+WILD_PIECES: typing.Final[str] = "RNBQP"
 
-def initial_pos() -> str:
-    """Function to Generate Random Starting Positions of the Game."""
+
+def initial_pos(rng: typing.Optional[random.Random] = None) -> str:
+    """
+    Function to Generate Random Starting Positions of the Game.
+
+    :param rng: Random number generator to draw from, the global one if not given
+    :type rng: typing.Optional[random.Random]
+    :return:
+    :rtype: str
+    """
+    choice = random.choice if rng is None else rng.choice
     pieces = ["p", "n", "b", "r", "q"]
     white = ""
     black = ""
@@ -13,11 +24,45 @@ def initial_pos() -> str:
         elif x == 8:
             white += "/"
         elif x <= 16:
-            white += random.choice(pieces).upper()
+            white += choice(pieces).upper()
         elif x == 25:
             black += "/"
         elif x == 21:
-            black += "K"
+            black += "k"
         else:
-            black += random.choice(pieces)
+            black += choice(pieces)
     return str(f"{black}/8/8/8/8/{white} w KQkq - 0 1")
+
+
+def wild_ranks(rng: typing.Optional[random.Random] = None) -> tuple[str, str]:
+    """
+    Draw the back rank and pawn rank used by ``Board.generate_pieces``, from white's side, a to h.
+
+    Both ranks are mirrored for black and the king always stands on the e-file.
+
+    :param rng: Random number generator to draw from, the global one if not given
+    :type rng: typing.Optional[random.Random]
+    :return: (back rank, pawn rank) as piece letters
+    :rtype: tuple[str, str]
+    """
+    choice = random.choice if rng is None else rng.choice
+    back = ""
+    pawns = ""
+    for i in range(8):
+        pawns += choice(WILD_PIECES)
+        back += "K" if i == 4 else choice(WILD_PIECES)
+    return back, pawns
+
+
+def wild_fen(back: str, pawns: str) -> str:
+    """
+    Build the FEN of a ``Board.generate_pieces`` start from its two ranks.
+
+    :param back:
+    :type back: str
+    :param pawns:
+    :type pawns: str
+    :return:
+    :rtype: str
+    """
+    return f"{back.lower()}/{pawns.lower()}/8/8/8/8/{pawns}/{back} w - - 0 1"
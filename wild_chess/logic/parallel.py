@@ -0,0 +1,183 @@
+"""Root-split parallel search across a process pool."""
+
+
+from __future__ import annotations
+
+import os
+import time
+import typing
+
+from wild_chess.logic import bitboard, fen, transposition
+from wild_chess.logic import search as engine
+
+if typing.TYPE_CHECKING:
+    import concurrent.futures
+
+__all__: tuple[str, ...] = ("ParallelSearcher",)
+
+# Seconds kept back from every worker's budget to cover process hand-off. Starting the pool is not charged to any
+# search: the clock starts once the pool is up.
+OVERHEAD: typing.Final[float] = 0.05
+
+# Every worker process keeps its own transposition table from one search to the next, for as long as the pool lives.
+_table: typing.Optional[transposition.TranspositionTable] = None
+
+
+def _worker_table() -> transposition.TranspositionTable:
+    """Worker entry point: the transposition table of this worker, allocated on first use."""
+    global _table  # pylint: disable=global-statement
+    if _table is None:
+        _table = transposition.TranspositionTable()
+    return _table
+
+
+def _warm_up() -> None:
+    """Worker entry point: allocate the table before the first search, so that search gets its whole budget."""
+    _worker_table()
+
+
+def _search_chunk(
+    text: str, moves: list[int], time_limit: float, max_depth: int
+) -> tuple[engine.SearchResult, list[engine.SearchResult], int, int]:
+    """
+    Worker entry point: search only *moves* of the FEN position *text*.
+
+    Returns the result, the result of every finished iteration, and the table hits and misses.
+    """
+    table = _worker_table()
+    hits, misses = table.hits, table.misses
+    searcher = engine.Searcher(time_limit, max_depth, table)
+    result = searcher.search(fen.parse(text), moves)
+    return result, searcher.iterations, table.hits - hits, table.misses - misses
+
+
+class ParallelSearcher:
+    """
+    Split the root moves of a position across a pool of worker processes.
+
+    Root moves are ordered (captures first) and dealt round-robin, so every worker gets a similar share of the
+    promising ones. Each worker runs its own iterative deepening search on its share, and the best score at the
+    deepest depth every worker finished wins, since scores of different depths do not compare.
+    Positions travel to the workers as FEN strings and moves as packed ints, never as pickled piece objects.
+
+    Workers keep their transposition tables between searches until :meth:`close`; :attr:`hits` and :attr:`misses`
+    add up their probes over every search.
+    """
+
+    workers: int
+    time_limit: float
+    max_depth: int
+    pool: typing.Optional[concurrent.futures.ProcessPoolExecutor]
+    hits: int
+    misses: int
+
+    def __init__(self, workers: typing.Optional[int] = None, time_limit: float = 1.0, max_depth: int = engine.MAX_PLY) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.pool = None
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self) -> ParallelSearcher:
+        return self
+
+    def __exit__(self, *_: typing.Any) -> None:
+        self.close()
+
+    def executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        """The process pool, started on first use with every worker's table already allocated."""
+        if self.pool is None:
+            import concurrent.futures  # pylint: disable=import-outside-toplevel
+
+            self.pool = concurrent.futures.ProcessPoolExecutor(self.workers)
+            concurrent.futures.wait([self.pool.submit(_warm_up) for _ in range(self.workers)])
+        return self.pool
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of the workers' table probes that found their position."""
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def close(self) -> None:
+        """Shut the worker processes down."""
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def split(self, position: bitboard.Position) -> list[list[int]]:
+        """
+        Deal the ordered legal moves of *position* into one chunk per worker.
+
+        :param position:
+        :type position: bitboard.Position
+        :return:
+        :rtype: list[list[int]]
+        """
+        # Ordering needs no table, so a one-bucket one spares allocating a full one on every move.
+        moves = engine.Searcher(table=transposition.TranspositionTable(0)).order(position, position.legal_moves(), 0)
+        chunks = [moves[i :: self.workers] for i in range(self.workers)]
+        return [chunk for chunk in chunks if chunk]
+
+    def merge(
+        self, answers: list[tuple[engine.SearchResult, list[engine.SearchResult], int, int]], start: float
+    ) -> engine.SearchResult:
+        """
+        Pick the best of the workers' results, total up their work and count their table probes.
+
+        Only the workers that finished an iteration take part, compared at the deepest depth all of them finished.
+        """
+        self.hits += sum(hits for _, _, hits, _ in answers)
+        self.misses += sum(misses for _, _, _, misses in answers)
+        nodes = sum(result.nodes for result, _, _, _ in answers)
+        finished = [iterations for _, iterations, _, _ in answers if iterations]
+        if not finished:
+            best = answers[0][0]
+            return engine.SearchResult(best.move, best.score, 0, nodes, time.perf_counter() - start)
+        depth = min(len(iterations) for iterations in finished)
+        best = max((iterations[depth - 1] for iterations in finished), key=lambda result: result.score)
+        return engine.SearchResult(best.move, best.score, best.depth, nodes, time.perf_counter() - start)
+
+    def search(self, position: bitboard.Position) -> engine.SearchResult:
+        """
+        Find the best move for the side to move in *position*, blocking until the workers are done.
+
+        :param position:
+        :type position: bitboard.Position
+        :return:
+        :rtype: engine.SearchResult
+        """
+        pool = self.executor()
+        start = time.perf_counter()
+        chunks = self.split(position)
+        if not chunks:
+            return engine.Searcher(self.time_limit, self.max_depth).search(position)
+        text = fen.serialize(position)
+        budget = max(self.time_limit - OVERHEAD - (time.perf_counter() - start), 0.0)
+        futures = [pool.submit(_search_chunk, text, chunk, budget, self.max_depth) for chunk in chunks]
+        return self.merge([future.result() for future in futures], start)
+
+    async def search_async(self, position: bitboard.Position) -> engine.SearchResult:
+        """
+        Like :meth:`search`, but awaits the workers so the event loop keeps running meanwhile.
+
+        :param position:
+        :type position: bitboard.Position
+        :return:
+        :rtype: engine.SearchResult
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        pool = self.executor()
+        start = time.perf_counter()
+        chunks = self.split(position)
+        if not chunks:
+            return engine.Searcher(self.time_limit, self.max_depth).search(position)
+        text = fen.serialize(position)
+        loop = asyncio.get_running_loop()
+        budget = max(self.time_limit - OVERHEAD - (time.perf_counter() - start), 0.0)
+        answers = await asyncio.gather(
+            *(loop.run_in_executor(pool, _search_chunk, text, chunk, budget, self.max_depth) for chunk in chunks)
+        )
+        return self.merge(list(answers), start)
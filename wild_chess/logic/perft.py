@@ -0,0 +1,193 @@
+"""Perft (move path enumeration) benchmark and correctness harness for the move generator."""
+
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import pathlib
+import random
+import time
+import typing
+
+from wild_chess.logic import bitboard, fen, initial_position
+
+__all__: tuple[str, ...] = (
+    "STANDARD_POSITIONS",
+    "BASELINE_PATH",
+    "PerftResult",
+    "perft",
+    "wild_positions",
+    "run",
+    "save_baseline",
+    "load_baseline",
+    "compare",
+    "main",
+)
+
+# Well known positions without castling rights, with their node counts from depth 1 upwards.
+STANDARD_POSITIONS: typing.Final[dict[str, tuple[str, tuple[int, ...]]]] = {
+    "start": ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1", (20, 400, 8902, 197281)),
+    "endgame": ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", (14, 191, 2812, 43238, 674624)),
+    "promotions": ("n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1", (24, 496, 9483, 182838)),
+}
+BASELINE_PATH: typing.Final[pathlib.Path] = pathlib.Path(__file__).parent.parent / "tests" / "perft_baseline.json"
+
+
+@dataclasses.dataclass
+class PerftResult:
+    """Node count and speed of one perft run."""
+
+    name: str
+    fen: str
+    depth: int
+    nodes: int
+    seconds: float
+
+    @property
+    def nps(self) -> float:
+        """Nodes per second."""
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+
+def perft(position: bitboard.Position, depth: int) -> int:
+    """
+    Count the leaf nodes of the legal move tree of *position* down to *depth*.
+
+    :param position:
+    :type position: bitboard.Position
+    :param depth:
+    :type depth: int
+    :return:
+    :rtype: int
+    """
+    moves = position.legal_moves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for move in moves:
+        undo = position.make_move(move)
+        nodes += perft(position, depth - 1)
+        position.unmake_move(move, undo)
+    return nodes
+
+
+def wild_positions(seed: int, count: int) -> dict[str, str]:
+    """
+    Draw *count* seeded start positions from both wild generators.
+
+    :param seed:
+    :type seed: int
+    :param count: How many positions to draw from each generator
+    :type count: int
+    :return: FEN strings keyed by a name that records how to draw them again
+    :rtype: dict[str, str]
+    """
+    rng = random.Random(seed)
+    positions = {}
+    for i in range(count):
+        positions[f"board-{seed}-{i}"] = initial_position.wild_fen(*initial_position.wild_ranks(rng))
+        positions[f"initial-{seed}-{i}"] = initial_position.initial_pos(rng)
+    return positions
+
+
+def run(positions: dict[str, str], depth: int) -> list[PerftResult]:
+    """
+    Run perft to *depth* over every named FEN position.
+
+    :param positions:
+    :type positions: dict[str, str]
+    :param depth:
+    :type depth: int
+    :return:
+    :rtype: list[PerftResult]
+    """
+    results = []
+    for name, text in positions.items():
+        position = fen.parse(text)
+        start = time.perf_counter()
+        nodes = perft(position, depth)
+        results.append(PerftResult(name, text, depth, nodes, time.perf_counter() - start))
+    return results
+
+
+def save_baseline(results: list[PerftResult], path: pathlib.Path = BASELINE_PATH) -> None:
+    """
+    Write *results* as the baseline later runs are compared to.
+
+    :param results:
+    :type results: list[PerftResult]
+    :param path:
+    :type path: pathlib.Path
+    """
+    path.write_text(json.dumps([dataclasses.asdict(result) for result in results], indent=4) + "\n", encoding="utf-8")
+
+
+def load_baseline(path: pathlib.Path = BASELINE_PATH) -> list[PerftResult]:
+    """
+    Read a baseline written by :func:`save_baseline`.
+
+    :param path:
+    :type path: pathlib.Path
+    :return:
+    :rtype: list[PerftResult]
+    """
+    return [PerftResult(**result) for result in json.loads(path.read_text(encoding="utf-8"))]
+
+
+def compare(results: list[PerftResult], baseline: list[PerftResult], tolerance: float = 0.8) -> list[str]:
+    """
+    Compare *results* against *baseline*.
+
+    :param results:
+    :type results: list[PerftResult]
+    :param baseline:
+    :type baseline: list[PerftResult]
+    :param tolerance: Lowest acceptable ratio of new to baseline nodes per second
+    :type tolerance: float
+    :return: A description of every wrong node count and speed regression
+    :rtype: list[str]
+    """
+    expected = {(result.fen, result.depth): result for result in baseline}
+    problems = []
+    for result in results:
+        base = expected.get((result.fen, result.depth))
+        if base is None:
+            continue
+        if result.nodes != base.nodes:
+            problems.append(f"{result.name}: {result.nodes} nodes, expected {base.nodes}")
+        elif base.nps and result.nps < base.nps * tolerance:
+            problems.append(f"{result.name}: {result.nps:.0f} nodes/s, baseline {base.nps:.0f} nodes/s")
+    return problems
+
+
+def main() -> None:
+    """Driver code."""
+    parser = argparse.ArgumentParser(description="Perft benchmark for the wild chess move generator.")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=9)
+    parser.add_argument("--count", type=int, default=4, help="positions drawn from each wild generator")
+    parser.add_argument("--baseline", type=pathlib.Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="overwrite the baseline with this run")
+    args = parser.parse_args()
+
+    positions = {name: text for name, (text, _) in STANDARD_POSITIONS.items()}
+    positions.update(wild_positions(args.seed, args.count))
+    results = run(positions, args.depth)
+    for result in results:
+        print(f"{result.name:<16} depth {result.depth}  {result.nodes:>10} nodes  {result.nps:>12.0f} nodes/s")
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        return
+    if args.baseline.exists():
+        problems = compare(results, load_baseline(args.baseline))
+        for problem in problems:
+            print(problem)
+        if problems:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
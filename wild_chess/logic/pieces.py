@@ -6,20 +6,43 @@
 import random
 import typing
 
+from wild_chess.logic import bitboard
+
 
 class ChessPiece:
-    """Base class for chess pieces"""
+    """
+    Base class for chess pieces
+
+    Pieces only carry their position, owner and piece code; everything shared by a (type, color) pair, like the
+    image path, lives in class-level tables.
+    """
+
+    __slots__ = ("position", "player", "color", "code")
 
     piece_type: str
+    kind: int
     PATH: typing.Final[str] = "wild_chess/assets/img/chess_pieces"
+    IMAGES: typing.Final[dict[tuple[int, str], str]] = {
+        (kind, color): f"wild_chess/assets/img/chess_pieces/{name.lower()}.{color}.png"
+        for kind, name in enumerate(bitboard.PIECE_NAMES)
+        for color in bitboard.COLOR_NAMES
+    }
+    position: tuple[int, int]
+    player: str
     color: str
+    code: int
     possible_moves: typing.Callable[[typing.Any, list[list[ChessPiece | None]], bool], list[tuple[int, int]]]
-    image: str
 
     def __init__(self, position: tuple[int, int], player: str, color: str) -> None:
         self.position = position
         self.player = player
         self.color = color
+        self.code = bitboard.piece_code(self.kind, bitboard.COLOR_NAMES.index(color))
+
+    @property
+    def image(self) -> str:
+        """Path of the image of this kind of piece."""
+        return self.IMAGES[(self.kind, self.color)]
 
     def move(
         self, new_position: tuple[int, int], board: list[list[ChessPiece | None]], en_passant: tuple[int, int] = None
@@ -27,17 +50,60 @@ def move(
         """
         Move the piece to a new position.
 
+        Boards backed by a bitboard position apply the whole move (captures, en passant and promotion) there.
+
         :param new_position:
         :param board:
         :param en_passant:
         :type new_position: tuple[int, int]
         """
+        if isinstance(getattr(board, "position", None), bitboard.Position):
+            board.move_piece(self, new_position)  # type: ignore
+            return
         board[new_position[0]][new_position[1]] = self
         board[self.position[0]][self.position[1]] = None
         if en_passant:
             board[en_passant[0]][en_passant[1]] = None
         self.position = new_position
 
+    @property
+    def square(self) -> int:
+        """The bitboard square index of this piece."""
+        return bitboard.square(*self.position)
+
+    @staticmethod
+    def bitboard_of(board: list[list[ChessPiece | None]]) -> bitboard.Position:
+        """
+        Get the bitboard position behind *board*, building one if it is a plain grid.
+
+        :param board:
+        :type board: list[list[ChessPiece | None]]
+        :return:
+        :rtype: bitboard.Position
+        """
+        position = getattr(board, "position", None)
+        if isinstance(position, bitboard.Position):
+            return position
+        return bitboard.Position.from_grid(board)
+
+    def targets(self, board: list[list[ChessPiece | None]], attacks: int) -> list[tuple[int, int]]:
+        """
+        Turn a set of attacked squares into the grid positions this piece may move to.
+
+        Squares holding one of our own pieces or the enemy king are dropped.
+
+        :param board:
+        :type board: list[list[ChessPiece | None]]
+        :param attacks:
+        :type attacks: int
+        :return:
+        :rtype: list[tuple[int, int]]
+        """
+        position = self.bitboard_of(board)
+        color = bitboard.COLOR_NAMES.index(self.color)
+        enemy_king = position.pieces[bitboard.piece_code(bitboard.KING, color ^ 1)]
+        return [bitboard.COORDS[sq] for sq in bitboard.iter_squares(attacks & ~position.occupancy[color] & ~enemy_king)]
+
     def find_diagonals(self, board: list[list[ChessPiece | None]]) -> list[tuple[int, int]]:
         """
         Finds diagonals.
@@ -47,58 +113,9 @@ def find_diagonals(self, board: list[list[ChessPiece | None]]) -> list[tuple[int
         :return:
         :rtype: list[tuple[int, int]]
         """
-        positions = []
-        # blacklist = []
-
-        def check(x: int, y: int) -> bool:
-            point = board[x][y]
-            dx = abs(x - self.position[0])
-            dy = abs(y - self.position[1])
-            """
-            nearby_positions = [(x + 1, y + 1), (x + 1, y - 1), (x - 1, y + 1), (x - 1, y - 1)]
-            near = [p for p in nearby_positions if 0 <= p[0] < 8 and 0 <= p[1] < 8]
-            for p in near:
-                d1x = abs(p[0] - self.position[0])
-                d1y = abs(p[1] - self.position[1])
-                if p in blacklist and d1x == d1y and d1x > 0:
-                    blacklist.append(p)
-                    return True
-            """
-            if (dx == dy) and (dx > 0):
-                positions.append((x, y))
-            if point and point.color != self.color and (dx == dy) and (dx > 0):
-                positions.append((x, y))
-                # blacklist.append((x, y))
-                return True
-            return False
-
-        def right(x: int) -> None:
-            for j in range(self.position[1] + 1, 8):
-                broken = check(x, j)
-                if broken:
-                    return
-            else:
-                return
-
-        def left(x: int) -> None:
-            for j in range(self.position[1] - 1, -1, -1):
-                broken = check(x, j)
-                if broken:
-                    return
-            else:
-                return
-
-        for i in range(self.position[0] + 1, 8):
-            right(i)
-            left(i)
-
-        for i in range(self.position[0] - 1, -1, -1):
-            right(i)
-            left(i)
-
-        return positions
-
-    def find_sides(self, board: list[list[ChessPiece | None]]) -> list[tuple[int, int]]:  # pylint: disable=unused-argument
+        return self.targets(board, bitboard.bishop_attacks(self.square, self.bitboard_of(board).occupied))
+
+    def find_sides(self, board: list[list[ChessPiece | None]]) -> list[tuple[int, int]]:
         """
         Finds sides.
 
@@ -107,40 +124,7 @@ def find_sides(self, board: list[list[ChessPiece | None]]) -> list[tuple[int, in
         :return:
         :rtype: list[tuple[int, int]]
         """
-        positions = []
-        for i in range(self.position[0] + 1, 8):
-            # point = board[i][self.position[1]]
-            positions.append((i, self.position[1]))
-            """
-            if point and point.color != self.color:
-                break
-            """
-
-        for i in range(self.position[0] - 1, -1, -1):
-            # point = board[i][self.position[1]]
-            positions.append((i, self.position[1]))
-            """
-            if point and point.color != self.color:
-                break
-            """
-
-        for i in range(self.position[1] + 1, 8):
-            # point = board[self.position[0]][i]
-            positions.append((self.position[0], i))
-            """
-            if point and point.color != self.color:
-                break
-            """
-
-        for i in range(self.position[1] - 1, -1, -1):
-            # point = board[self.position[0]][i]
-            positions.append((self.position[0], i))
-            """
-            if point and point.color != self.color:
-                break
-            """
-
-        return positions
+        return self.targets(board, bitboard.rook_attacks(self.square, self.bitboard_of(board).occupied))
 
     @staticmethod
     def filter_moves(
@@ -158,95 +142,30 @@ def filter_moves(
         :return:
         :rtype: list[tuple[int, int]]
         """
-        possibility = [i for i in possibility if 0 <= i[0] < 8 and 0 <= i[1] < 8]
         moves = []
 
         for move in possibility:
-            if board[move[0]][move[1]] is None:
-                moves.append(move)
-
-            elif board[move[0]][move[1]].player != player:  # type: ignore
+            if not (0 <= move[0] < 8 and 0 <= move[1] < 8):
+                continue
+            piece = board[move[0]][move[1]]
+            if piece is None or (piece.player != player and (check or not isinstance(piece, King))):
                 moves.append(move)
-        checked_moves = (
-            [i for i in moves if not isinstance((x := board[i[0]][i[1]]), King) and x and x.player != player]
-            + [i for i in moves if board[i[0]][i[1]] is None]
-            if not check
-            else None
-        )
-        if not check:
-            moves = None
-        return moves or checked_moves
+        return moves
 
 
 class Pawn(ChessPiece):
     """The pawn piece"""
 
+    __slots__ = ()
+
     piece_type: str = "Pawn"
+    kind: int = bitboard.PAWN
     takeable: bool = True
 
-    def __init__(self, position: tuple[int, int], player: str, color: str) -> None:
-        super().__init__(position, player, color)
-        self.image = f"{self.PATH}/pawn.{color}.png"
-        self.possibility: list[tuple[int, int]] = []
-        self.moves: list[tuple[int, int]] = []
-
-    # TODO: Heavily refactor and clean this method, and the whole file
     def possible_moves(self, board: list[list[ChessPiece | None]]) -> list[tuple[int, int]]:
         """Get the possible moves for the pawn."""
-        self.possibility = []
-        a = (self.position[0], self.position[1])
-
-        if self.color == "white":
-
-            if a[0] == 1:
-                self.possibility.append((a[0] + 2, a[1]))
-
-            if board[a[0] + 1][a[1]] is None:
-                self.possibility.append((a[0] + 1, a[1]))
-
-            x = (a[0] + 1, a[1] + 1)
-            if x and board[x[0]][x[1]] is not None and board[x[0]][x[1]].player != self.player:  # type: ignore
-                self.possibility.append(x)
-
-            x = (a[0] + 1, a[1] - 1)
-            if x and board[x[0]][x[1]] is not None and board[x[0]][x[1]].player != self.player:  # type: ignore
-                self.possibility.append(x)
-
-            self.possibility.append(x)
-
-            y = board[a[0]][a[1] - 1]
-            if y is not None and y.color != self.color:
-                self.possibility.append((a[0] + 1, a[1] - 1))
-
-            y = board[a[0]][a[1] + 1]
-            if y is not None and y.color != self.color:
-                self.possibility.append((a[0] + 1, a[1] + 1))
-
-        else:
-            if a[0] == 6:
-                self.possibility.append((a[0] - 2, a[1]))
-
-            if board[a[0] - 1][a[1]] is None:
-                self.possibility.append((a[0] - 1, a[1]))
-
-            x = (a[0] - 1, a[1] - 1)
-            if x and board[x[0]][x[1]] is not None and board[x[0]][x[1]].player != self.player:  # type: ignore
-                self.possibility.append(x)
-
-            x = (a[0] - 1, a[1] + 1)
-            if x and board[x[0]][x[1]] is not None and board[x[0]][x[1]].player != self.player:  # type: ignore
-                self.possibility.append(x)
-
-            y = board[a[0]][a[1] - 1]
-            if y is not None and y.color != self.color:
-                self.possibility.append((a[0] - 1, a[1] - 1))
-
-            y = board[a[0]][a[1] + 1]
-            if y is not None and y.color != self.color:
-                self.possibility.append((a[0] - 1, a[1] + 1))
-
-        self.moves = self.filter_moves(self.possibility, board, self.player)
-        return self.moves
+        position = self.bitboard_of(board)
+        return [bitboard.COORDS[sq] for sq in bitboard.iter_squares(position.targets(self.square, self.code))]
 
     def check_promotion(self) -> bool | Queen:
         """
@@ -255,11 +174,11 @@ def check_promotion(self) -> bool | Queen:
         If so, promote it to a queen.
         """
         if self.color == "white":
-            if self.position[1] == 7:
+            if self.position[0] == 7:
                 return Queen(self.position, self.player, self.color)
 
         else:
-            if self.position[1] == 0:
+            if self.position[0] == 0:
                 return Queen(self.position, self.player, self.color)
 
         return False
@@ -268,161 +187,154 @@ def check_promotion(self) -> bool | Queen:
 class Rook(ChessPiece):
     """The rook piece"""
 
+    __slots__ = ()
+
     piece_type: str = "Rook"
+    kind: int = bitboard.ROOK
     takeable: bool = True
 
-    def __init__(self, position: tuple[int, int], player: str, color: str) -> None:
-        super().__init__(position, player, color)
-        self.image = f"{self.PATH}/rook.{color}.png"
-        self.possibility: list[tuple[int, int]] = []
-        self.moves: list[tuple[int, int]] = []
-
     def possible_moves(self, board: list[list[ChessPiece | None]]) -> list[tuple[int, int]]:
         """Get the possible moves for the rook."""
-        self.possibility = []
-        self.possibility.extend(self.find_sides(board))
-        self.moves = self.filter_moves(self.possibility, board, self.player)
-        return self.moves
+        return self.find_sides(board)
 
 
 class Knight(ChessPiece):
     """The knight piece"""
 
+    __slots__ = ()
+
     piece_type: str = "Knight"
+    kind: int = bitboard.KNIGHT
     takeable: bool = True
 
-    def __init__(self, position: tuple[int, int], player: str, color: str) -> None:
-        super().__init__(position, player, color)
-        self.image = f"{self.PATH}/knight.{color}.png"
-        self.possibility: list[tuple[int, int]] = []
-        self.moves: list[tuple[int, int]] = []
-
     def possible_moves(self, board: list[list[ChessPiece | None]]) -> list[tuple[int, int]]:
         """Get the possible moves for the knight."""
-        self.possibility = []
-        self.possibility.append((self.position[0] + 2, self.position[1] + 1))
-        self.possibility.append((self.position[0] + 2, self.position[1] - 1))
-        self.possibility.append((self.position[0] - 2, self.position[1] + 1))
-        self.possibility.append((self.position[0] - 2, self.position[1] - 1))
-        self.possibility.append((self.position[0] + 1, self.position[1] + 2))
-        self.possibility.append((self.position[0] + 1, self.position[1] - 2))
-        self.possibility.append((self.position[0] - 1, self.position[1] + 2))
-        self.possibility.append((self.position[0] - 1, self.position[1] - 2))
-        self.moves = self.filter_moves(self.possibility, board, self.player)
-        return self.moves
+        return self.targets(board, bitboard.KNIGHT_ATTACKS[self.square])
 
 
 class Bishop(ChessPiece):
     """The bishop piece"""
 
+    __slots__ = ()
+
     piece_type: str = "Bishop"
+    kind: int = bitboard.BISHOP
     takeable: bool = True
 
-    def __init__(self, position: tuple[int, int], player: str, color: str) -> None:
-        super().__init__(position, player, color)
-        self.image = f"{self.PATH}/bishop.{color}.png"
-        self.possibility: list[tuple[int, int]] = []
-        self.moves: list[tuple[int, int]] = []
-
     def possible_moves(self, board: list[list[ChessPiece | None]]) -> list[tuple[int, int]]:
         """Get the possible moves for the bishop."""
-        self.possibility = []
-        self.possibility.extend(self.find_diagonals(board))
-        self.moves = self.filter_moves(self.possibility, board, self.player)
-        return self.moves
+        return self.find_diagonals(board)
 
 
 class Queen(ChessPiece):
     """The queen piece"""
 
+    __slots__ = ()
+
     piece_type: str = "Queen"
+    kind: int = bitboard.QUEEN
     takeable: bool = True
 
-    def __init__(self, position: tuple[int, int], player: str, color: str) -> None:
-        super().__init__(position, player, color)
-        self.image = f"{self.PATH}/queen.{color}.png"
-        self.possibility: list[tuple[int, int]] = []
-        self.moves: list[tuple[int, int]] = []
-
     def possible_moves(self, board: list[list[ChessPiece | None]]) -> list[tuple[int, int]]:
         """Get the possible moves for the queen."""
-        self.possibility = []
-        self.possibility.extend(self.find_sides(board))
-        self.possibility.extend(self.find_diagonals(board))
-        self.moves = self.filter_moves(self.possibility, board, self.player)
-        return self.moves
+        return self.targets(board, bitboard.queen_attacks(self.square, self.bitboard_of(board).occupied))
 
 
 class King(ChessPiece):
     """The king piece"""
 
+    __slots__ = ()
+
     piece_type: str = "King"
+    kind: int = bitboard.KING
     takeable: bool = False
 
-    def __init__(self, position: tuple[int, int], player: str, color: str) -> None:
-        super().__init__(position, player, color)
-        self.image = f"{self.PATH}/king.{color}.png"
-        self.possibility: list[tuple[int, int]] = []
-        self.moves: list[tuple[int, int]] = []
-
     def possible_moves(self, board: list[list[ChessPiece | None]]) -> list[tuple[int, int]]:
         """Get the possible moves for the king."""
-        self.possibility = []
-        self.possibility.append((self.position[0] + 1, self.position[1] + 1))
-        self.possibility.append((self.position[0] + 1, self.position[1] - 1))
-        self.possibility.append((self.position[0] - 1, self.position[1] + 1))
-        self.possibility.append((self.position[0] - 1, self.position[1] - 1))
-        self.possibility.append((self.position[0] + 1, self.position[1]))
-        self.possibility.append((self.position[0] - 1, self.position[1]))
-        self.possibility.append((self.position[0], self.position[1] + 1))
-        self.possibility.append((self.position[0], self.position[1] - 1))
-        self.moves = self.filter_moves(self.possibility, board, self.player)
-        return self.moves
+        return self.targets(board, bitboard.KING_ATTACKS[self.square])
+
+
+PIECE_CLASSES: dict[int, type[ChessPiece]] = {
+    bitboard.PAWN: Pawn,
+    bitboard.KNIGHT: Knight,
+    bitboard.BISHOP: Bishop,
+    bitboard.ROOK: Rook,
+    bitboard.QUEEN: Queen,
+    bitboard.KING: King,
+}
 
 
 class WildPiece(ChessPiece):
-    def __init__(self, piece: ChessPiece, board: list[list[ChessPiece | None]]) -> None:
+    """
+    A piece that moves like a randomly drawn piece type.
+
+    Only the move set of the drawn type is generated, and the draw comes from its own random number generator so a
+    seeded game can be replayed exactly.
+    """
+
+    __slots__ = ("kind", "board", "rng")
+
+    KINDS: typing.Final[tuple[int, ...]] = (
+        bitboard.QUEEN,
+        bitboard.ROOK,
+        bitboard.BISHOP,
+        bitboard.KNIGHT,
+        bitboard.KING,
+        bitboard.PAWN,
+    )
+
+    def __init__(
+        self, piece: ChessPiece, board: list[list[ChessPiece | None]], rng: typing.Optional[random.Random] = None
+    ) -> None:
+        self.kind = piece.kind
         super().__init__(piece.position, piece.player, piece.color)
-        self.image = piece.image
-        self.choices: list[list[tuple[int, int]]] = []
         self.board = board
+        self.rng = random.Random() if rng is None else rng
+
+    def moves_as(self, kind: int) -> list[tuple[int, int]]:
+        """
+        Get the moves this piece would have if it were a *kind* piece.
+
+        :param kind:
+        :type kind: int
+        :return:
+        :rtype: list[tuple[int, int]]
+        """
+        position = self.bitboard_of(self.board)
+        code = bitboard.piece_code(kind, bitboard.COLOR_NAMES.index(self.color))
+        return [bitboard.COORDS[sq] for sq in bitboard.iter_squares(position.targets(self.square, code))]
 
     @property
     def queen_moves(self) -> list[tuple[int, int]]:
-        piece = Queen(self.position, self.player, self.color)
-        return piece.possible_moves(self.board)
+        """Get the moves this piece would have as a queen."""
+        return self.moves_as(bitboard.QUEEN)
 
     @property
     def rook_moves(self) -> list[tuple[int, int]]:
-        piece = Rook(self.position, self.player, self.color)
-        return piece.possible_moves(self.board)
+        """Get the moves this piece would have as a rook."""
+        return self.moves_as(bitboard.ROOK)
 
     @property
     def bishop_moves(self) -> list[tuple[int, int]]:
-        piece = Bishop(self.position, self.player, self.color)
-        return piece.possible_moves(self.board)
+        """Get the moves this piece would have as a bishop."""
+        return self.moves_as(bitboard.BISHOP)
 
     @property
     def knight_moves(self) -> list[tuple[int, int]]:
-        piece = Knight(self.position, self.player, self.color)
-        return piece.possible_moves(self.board)
+        """Get the moves this piece would have as a knight."""
+        return self.moves_as(bitboard.KNIGHT)
 
     @property
     def king_moves(self) -> list[tuple[int, int]]:
-        piece = King(self.position, self.player, self.color)
-        return piece.possible_moves(self.board)
+        """Get the moves this piece would have as a king."""
+        return self.moves_as(bitboard.KING)
 
     @property
     def pawn_moves(self) -> list[tuple[int, int]]:
-        piece = Pawn(self.position, self.player, self.color)
-        return piece.possible_moves(self.board)
+        """Get the moves this piece would have as a pawn."""
+        return self.moves_as(bitboard.PAWN)
 
     @property
     def random_moves(self) -> list[tuple[int, int]]:
-        self.choices.append(self.queen_moves)
-        self.choices.append(self.rook_moves)
-        self.choices.append(self.bishop_moves)
-        self.choices.append(self.knight_moves)
-        self.choices.append(self.king_moves)
-        self.choices.append(self.pawn_moves)
-        return random.choice(self.choices)
+        """Draw a piece type from this piece's generator and get the moves it would have as that type."""
+        return self.moves_as(self.rng.choice(self.KINDS))
@@ -0,0 +1,302 @@
+"""Alpha-beta search with iterative deepening and a hard time budget."""
+
+
+from __future__ import annotations
+
+import dataclasses
+import time
+import typing
+
+from wild_chess.logic import bitboard, evaluation, transposition
+
+__all__: tuple[str, ...] = ("MATE", "SearchResult", "Searcher", "best_move", "think")
+
+MATE: typing.Final[int] = 100_000
+INFINITY: typing.Final[int] = MATE + 1
+MAX_PLY: typing.Final[int] = 64
+# How many nodes are searched between two looks at the clock: a few milliseconds of pure Python search at most.
+CHECK_EVERY: typing.Final[int] = 64
+# How many plies of captures the quiescence search may add past the nominal depth.
+QUIESCENCE_PLIES: typing.Final[int] = 4
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search once the time budget is spent."""
+
+
+@dataclasses.dataclass
+class SearchResult:
+    """The outcome of a search: the best move found (0 if there is none) and how it was found."""
+
+    move: int
+    score: int
+    depth: int
+    nodes: int
+    seconds: float
+
+
+class Searcher:
+    """
+    Negamax alpha-beta search over a bitboard position.
+
+    Every iteration searches the previous best move first. Inside the tree the transposition table move comes
+    first, then captures (most valuable victim, least valuable attacker) and killer moves, and a quiescence search
+    resolves captures at the leaves. The clock is checked every :data:`CHECK_EVERY` nodes; when the budget runs out
+    the best move of the last finished iteration is returned.
+
+    :attr:`iterations` keeps the result of every finished iteration of the last search.
+    """
+
+    time_limit: float
+    max_depth: int
+    nodes: int
+    deadline: float
+    iterations: list[SearchResult]
+    killers: list[list[int]]
+    keys: list[int]
+    table: transposition.TranspositionTable
+
+    def __init__(
+        self,
+        time_limit: float = 1.0,
+        max_depth: int = MAX_PLY,
+        table: typing.Optional[transposition.TranspositionTable] = None,
+    ) -> None:
+        self.time_limit = time_limit
+        self.max_depth = min(max_depth, MAX_PLY)
+        self.table = transposition.TranspositionTable() if table is None else table
+        self.nodes = 0
+        self.deadline = 0.0
+        self.iterations = []
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+        self.keys = []
+
+    def search(self, position: bitboard.Position, root_moves: typing.Optional[list[int]] = None) -> SearchResult:
+        """
+        Find the best move for the side to move in *position*, which is left unchanged.
+
+        :param position:
+        :type position: bitboard.Position
+        :param root_moves: Only consider these moves at the root, all legal moves if not given
+        :type root_moves: typing.Optional[list[int]]
+        :return:
+        :rtype: SearchResult
+        """
+        start = time.perf_counter()
+        self.deadline = start + self.time_limit
+        self.nodes = 0
+        self.iterations = []
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+        self.keys = [position.key]
+        self.table.new_search()
+        moves = position.legal_moves() if root_moves is None else list(root_moves)
+        if not moves:
+            score = -MATE if position.in_check(position.side) else 0
+            return SearchResult(0, score, 0, 0, time.perf_counter() - start)
+
+        result = SearchResult(moves[0], 0, 0, 0, 0.0)
+        for depth in range(1, self.max_depth + 1):
+            try:
+                move, score = self.root(position, moves, depth, result if depth == 1 else None)
+            except SearchTimeout:
+                break
+            result = SearchResult(move, score, depth, self.nodes, time.perf_counter() - start)
+            self.iterations.append(result)
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(score) >= MATE - MAX_PLY:
+                break
+        result.nodes = self.nodes
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def root(
+        self, position: bitboard.Position, moves: list[int], depth: int, partial: typing.Optional[SearchResult] = None
+    ) -> tuple[int, int]:
+        """
+        Search every root move to *depth* and return the best one with its score.
+
+        If given, *partial* is kept up to date with the best move so far, in case time runs out mid-iteration.
+        """
+        alpha = -INFINITY
+        best = moves[0]
+        for move in moves:
+            undo = position.make_move(move)
+            self.keys.append(position.key)
+            try:
+                score = -self.alpha_beta(position, depth - 1, 1, -INFINITY, -alpha)
+            finally:
+                self.keys.pop()
+                position.unmake_move(move, undo)
+            if score > alpha:
+                alpha = score
+                best = move
+                if partial is not None:
+                    partial.move, partial.score = move, score
+        return best, alpha
+
+    def tick(self) -> None:
+        """Count a node and stop the search if the time is up."""
+        self.nodes += 1
+        if not self.nodes % CHECK_EVERY and time.perf_counter() >= self.deadline:
+            raise SearchTimeout
+
+    def is_repetition(self, position: bitboard.Position) -> bool:
+        """Whether the current position already occurred since the last capture or pawn move."""
+        keys = self.keys
+        return position.key in keys[max(0, len(keys) - 1 - position.halfmove) : -1]
+
+    def order(self, position: bitboard.Position, moves: list[int], ply: int, hint: int = 0) -> list[int]:
+        """Sort *moves* so the likeliest cutoffs are searched first, starting with *hint* if given."""
+        mailbox = position.mailbox
+        killers = self.killers[ply]
+
+        def priority(move: int) -> int:
+            if move == hint:
+                return 20_000
+            victim = mailbox[(move >> 6) & 63]
+            if victim != bitboard.EMPTY:
+                return 10_000 + evaluation.MATERIAL[victim % 6] * 10 - mailbox[move & 63] % 6
+            if move >> 12:
+                return 9_000
+            if move in killers:
+                return 8_000
+            return 0
+
+        moves.sort(key=priority, reverse=True)
+        return moves
+
+    def alpha_beta(self, position: bitboard.Position, depth: int, ply: int, alpha: int, beta: int) -> int:
+        """Negamax alpha-beta search of *position* to *depth*, scored for the side to move."""
+        self.tick()
+        if position.halfmove >= 100 or self.is_repetition(position):
+            return 0
+        if depth <= 0 or ply >= MAX_PLY:
+            return self.quiescence(position, ply, alpha, beta, min(ply + QUIESCENCE_PLIES, MAX_PLY))
+
+        key = position.key
+        hint, known = self.recall(key, depth, ply, alpha, beta)
+        if known is not None:
+            return known
+
+        moves = position.legal_moves()
+        if not moves:
+            return -MATE + ply if position.in_check(position.side) else 0
+
+        mailbox = position.mailbox
+        original = alpha
+        best = 0
+        for move in self.order(position, moves, ply, hint):
+            undo = position.make_move(move)
+            self.keys.append(position.key)
+            try:
+                score = -self.alpha_beta(position, depth - 1, ply + 1, -beta, -alpha)
+            finally:
+                self.keys.pop()
+                position.unmake_move(move, undo)
+            if score >= beta:
+                if mailbox[(move >> 6) & 63] == bitboard.EMPTY and move not in self.killers[ply]:
+                    self.killers[ply] = [move, self.killers[ply][0]]
+                self.remember(key, move, depth, transposition.LOWER, beta, ply)
+                return beta
+            if score > alpha:
+                alpha = score
+                best = move
+        self.remember(key, best, depth, transposition.EXACT if alpha > original else transposition.UPPER, alpha, ply)
+        return alpha
+
+    def recall(self, key: int, depth: int, ply: int, alpha: int, beta: int) -> tuple[int, typing.Optional[int]]:
+        """Look a node up in the transposition table: the move to try first, and its score if that settles it."""
+        entry = self.table.probe(key)
+        if entry is None:
+            return 0, None
+        if entry.depth < depth:
+            return entry.move, None
+        # Mate scores are stored relative to the node, and made relative to the root again here.
+        score = entry.score
+        if score >= MATE - MAX_PLY:
+            score -= ply
+        elif score <= -MATE + MAX_PLY:
+            score += ply
+        if (
+            entry.bound == transposition.EXACT
+            or (entry.bound == transposition.LOWER and score >= beta)
+            or (entry.bound == transposition.UPPER and score <= alpha)
+        ):
+            return entry.move, min(max(score, alpha), beta)
+        return entry.move, None
+
+    def remember(self, key: int, move: int, depth: int, bound: int, score: int, ply: int) -> None:
+        """Store a result in the transposition table, with mate scores made relative to the node."""
+        if score >= MATE - MAX_PLY:
+            score += ply
+        elif score <= -MATE + MAX_PLY:
+            score -= ply
+        self.table.store(key, move, depth, bound, score)
+
+    def quiescence(self, position: bitboard.Position, ply: int, alpha: int, beta: int, horizon: int) -> int:
+        """Search captures and promotions only until the position is quiet or *horizon* is reached."""
+        self.tick()
+        stand_pat = evaluation.evaluate(position)
+        if stand_pat >= beta or ply >= horizon:
+            return beta if stand_pat >= beta else stand_pat
+        alpha = max(alpha, stand_pat)
+
+        mailbox = position.mailbox
+        captures = [
+            move
+            for move in position.legal_moves()
+            if mailbox[(move >> 6) & 63] != bitboard.EMPTY or move >> 12 == bitboard.QUEEN
+        ]
+        for move in self.order(position, captures, ply):
+            undo = position.make_move(move)
+            try:
+                score = -self.quiescence(position, ply + 1, -beta, -alpha, horizon)
+            finally:
+                position.unmake_move(move, undo)
+            if score >= beta:
+                return beta
+            if score > alpha:
+                alpha = score
+        return alpha
+
+
+def best_move(
+    position: bitboard.Position,
+    time_limit: float = 1.0,
+    max_depth: int = MAX_PLY,
+    table: typing.Optional[transposition.TranspositionTable] = None,
+) -> SearchResult:
+    """
+    Search *position* for at most *time_limit* seconds.
+
+    :param position:
+    :type position: bitboard.Position
+    :param time_limit:
+    :type time_limit: float
+    :param max_depth:
+    :type max_depth: int
+    :param table: Transposition table to share between searches, a fresh one if not given
+    :type table: typing.Optional[transposition.TranspositionTable]
+    :return:
+    :rtype: SearchResult
+    """
+    return Searcher(time_limit, max_depth, table).search(position)
+
+
+async def think(position: bitboard.Position, time_limit: float = 1.0, max_depth: int = MAX_PLY) -> SearchResult:
+    """
+    Search a copy of *position* in a worker thread, so the event loop keeps serving other games meanwhile.
+
+    :param position:
+    :type position: bitboard.Position
+    :param time_limit:
+    :type time_limit: float
+    :param max_depth:
+    :type max_depth: int
+    :return:
+    :rtype: SearchResult
+    """
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    return await asyncio.get_running_loop().run_in_executor(None, best_move, position.copy(), time_limit, max_depth)
@@ -0,0 +1,477 @@
+"""Endgame tablebases: retrograde analysis of small material signatures, probed from memory-mapped files."""
+
+
+from __future__ import annotations
+
+import argparse
+import array
+import itertools
+import mmap
+import os
+import pathlib
+import struct
+import typing
+
+from wild_chess.logic import bitboard, search
+
+__all__: tuple[str, ...] = (
+    "TABLEBASE_PATH",
+    "codes_of",
+    "signature",
+    "generate",
+    "write",
+    "Tablebase",
+    "Tablebases",
+    "default",
+    "main",
+)
+
+TABLEBASE_PATH: typing.Final[pathlib.Path] = pathlib.Path(
+    os.getenv("WILD_CHESS_TABLEBASES", pathlib.Path(__file__).parent / "tablebases")
+)
+SUFFIX: typing.Final[str] = ".wctb"
+MAGIC: typing.Final[bytes] = b"WCT1"
+# Header: magic, number of pieces and their codes (padded to 8). The table follows, one byte per index.
+HEADER: typing.Final[struct.Struct] = struct.Struct("<4sB8s3x")
+# Letters of a signature, strongest first, as in "KQvKR".
+ORDER: typing.Final[str] = "KQRBNP"
+LETTERS: typing.Final[str] = "PNBRQK"
+
+
+def codes_of(text: str) -> tuple[int, ...]:
+    """
+    The sorted piece codes of a signature such as ``KQvK``: white's pieces, ``v``, black's pieces.
+
+    :param text:
+    :type text: str
+    :return:
+    :rtype: tuple[int, ...]
+    """
+    white, separator, black = text.upper().partition("V")
+    if not separator or white.count("K") != 1 or black.count("K") != 1:
+        raise ValueError(f"a signature needs one king on each side, like KQvK: {text!r}")
+    codes = []
+    for color, letters in ((bitboard.WHITE, white), (bitboard.BLACK, black)):
+        for letter in letters:
+            if letter not in LETTERS:
+                raise ValueError(f"unknown piece {letter!r} in {text!r}")
+            codes.append(bitboard.piece_code(LETTERS.index(letter), color))
+    return tuple(sorted(codes))
+
+
+def signature(codes: typing.Iterable[int]) -> str:
+    """
+    The signature of a set of piece codes, the inverse of :func:`codes_of`.
+
+    :param codes:
+    :type codes: typing.Iterable[int]
+    :return:
+    :rtype: str
+    """
+    sides = ["", ""]
+    for code in sorted(codes, key=lambda code: ORDER.index(LETTERS[code % 6])):
+        sides[code // 6] += LETTERS[code % 6]
+    return "v".join(sides)
+
+
+def _material(position: bitboard.Position) -> tuple[int, ...]:
+    """The sorted piece codes of *position*."""
+    return tuple(code for code, bb in enumerate(position.pieces) for _ in bitboard.iter_squares(bb))
+
+
+def _index(side: int, squares: typing.Iterable[int]) -> int:
+    """
+    The index of *side* to move with the pieces on *squares*, given in the order of the table's codes.
+
+    The index is direct, not perfect: ``side * 64**n`` plus one 6-bit square per piece, so it needs no ranking, but
+    most of its ``2 * 64**n`` entries (pieces sharing a square, like pieces in both orders, the side not to move in
+    check) can never be reached and are left at 0.
+    """
+    index = side
+    for sq in squares:
+        index = index * 64 + sq
+    return index
+
+
+def _index_of(position: bitboard.Position, codes: tuple[int, ...]) -> int:
+    """The index of *position* in the table of *codes*, which must be its material."""
+    index = position.side
+    pieces = position.pieces
+    for code in sorted(set(codes)):
+        for sq in bitboard.iter_squares(pieces[code]):
+            index = index * 64 + sq
+    return index
+
+
+def _decode(index: int, count: int) -> tuple[int, list[int]]:
+    """Undo :func:`_index` for *count* pieces."""
+    squares = [0] * count
+    for i in range(count - 1, -1, -1):
+        index, squares[i] = divmod(index, 64)
+    return index, squares
+
+
+def _score(byte: int) -> int:
+    """Turn a stored byte into a search score: ``MATE - plies`` if the side to move mates, ``plies - MATE`` if it is mated."""
+    if not byte:
+        return 0
+    plies = byte - 1
+    return search.MATE - plies if plies % 2 else plies - search.MATE
+
+
+def _reach(code: int, sq: int, occupied: int) -> int:
+    """Squares a non-pawn *code* piece on *sq* attacks, which are also the squares it can have come from."""
+    piece_type = code % 6
+    if piece_type == bitboard.KNIGHT:
+        return bitboard.knight_attacks(sq)
+    if piece_type == bitboard.KING:
+        return bitboard.king_attacks(sq)
+    if piece_type == bitboard.BISHOP:
+        return bitboard.bishop_attacks(sq, occupied)
+    if piece_type == bitboard.ROOK:
+        return bitboard.rook_attacks(sq, occupied)
+    return bitboard.queen_attacks(sq, occupied)
+
+
+class _Generator:
+    """Retrograde analysis of one signature, given the finished tables of every signature it can turn into."""
+
+    codes: tuple[int, ...]
+    tables: dict[tuple[int, ...], bytearray]
+    values: bytearray
+    counts: array.array[int]
+    buckets: dict[int, list[tuple[int, bool]]]
+
+    def __init__(self, codes: tuple[int, ...], tables: dict[tuple[int, ...], bytearray]) -> None:
+        self.codes = codes
+        self.tables = tables
+        size = 2 * 64 ** len(codes)
+        self.values = bytearray(size)
+        # Legal moves not yet known to lose for the mover, 0 once resolved and -1 for illegal indices.
+        self.counts = array.array("h", [-1]) * size
+        # Events by ply: (index, True) means the index wins at that ply, (index, False) that one more of its moves
+        # leads to a position the opponent wins.
+        self.buckets = {}
+
+    def position(self, side: int, squares: list[int]) -> typing.Optional[bitboard.Position]:
+        """Set the index up as a position, or None if it cannot occur in a game."""
+        if len(set(squares)) != len(squares):
+            return None
+        position = bitboard.Position()
+        for code, sq in zip(self.codes, squares):
+            if code % 6 == bitboard.PAWN and (1 << sq) & (bitboard.RANK_8 if code < 6 else bitboard.RANK_1):
+                return None
+            position.put(sq, code)
+        position.side = side
+        if position.in_check(side ^ 1):
+            return None
+        return position
+
+    def schedule(self, ply: int, index: int, wins: bool) -> None:
+        """Queue an event for *ply*."""
+        self.buckets.setdefault(ply, []).append((index, wins))
+
+    def exit(self, position: bitboard.Position, move: int, index: int) -> None:
+        """Schedule what a capture or promotion leads to, from the finished table of the new material."""
+        undo = position.make_move(move)
+        codes = _material(position)
+        score = _score(self.tables[codes][_index_of(position, codes)])
+        position.unmake_move(move, undo)
+        if score < 0:
+            self.schedule(score + search.MATE + 1, index, True)
+        elif score > 0:
+            self.schedule(search.MATE - score + 1, index, False)
+
+    def setup(self) -> list[int]:
+        """Count the moves of every legal index, resolve mates and stalemates, and schedule every exit."""
+        count = len(self.codes)
+        mates = []
+        for side in (bitboard.WHITE, bitboard.BLACK):
+            for squares in itertools.product(range(64), repeat=count):
+                position = self.position(side, list(squares))
+                if position is None:
+                    continue
+                index = _index(side, squares)
+                moves = position.legal_moves()
+                if not moves:
+                    self.counts[index] = 0
+                    if position.in_check(side):
+                        self.values[index] = 1
+                        mates.append(index)
+                    continue
+                self.counts[index] = len(moves)
+                mailbox = position.mailbox
+                for move in moves:
+                    if mailbox[(move >> 6) & 63] != bitboard.EMPTY or move >> 12:
+                        self.exit(position, move, index)
+        return mates
+
+    def predecessors(self, index: int) -> typing.Iterator[int]:
+        """Indices from which a quiet move (no capture, no promotion) leads to *index*."""
+        side, squares = _decode(index, len(self.codes))
+        mover = side ^ 1
+        occupied = 0
+        for sq in squares:
+            occupied |= 1 << sq
+        empty = bitboard.FULL ^ occupied
+        for slot, (code, sq) in enumerate(zip(self.codes, squares)):
+            if code // 6 != mover:
+                continue
+            if code % 6 == bitboard.PAWN:
+                step = 8 if mover == bitboard.WHITE else -8
+                origins = 0
+                if 0 <= sq - step < 64 and empty >> (sq - step) & 1:
+                    origins |= 1 << (sq - step)
+                    double = sq - 2 * step
+                    if sq >> 3 == (3 if mover == bitboard.WHITE else 4) and empty >> double & 1:
+                        origins |= 1 << double
+            else:
+                origins = _reach(code, sq, occupied) & empty
+            for origin in bitboard.iter_squares(origins):
+                squares[slot] = origin
+                yield _index(mover, squares)
+            squares[slot] = sq
+
+    def run(self) -> bytearray:
+        """
+        Resolve every index.
+
+        Events are handled ply by ply, so a win is resolved at its shortest mate and a loss at its longest.
+
+        :return: One byte per index: 0 for a draw (or an illegal index), else the plies to mate plus one
+        :rtype: bytearray
+        """
+        resolved = self.setup()
+        ply = 0
+        while True:
+            counts = self.counts
+            for index in resolved:
+                # A loss of the side to move is a win for whoever moved into it, and vice versa.
+                lost = not (self.values[index] - 1) % 2
+                for predecessor in self.predecessors(index):
+                    if counts[predecessor] > 0:
+                        self.schedule(ply + 1, predecessor, lost)
+            if not self.buckets:
+                return self.values
+            ply += 1
+            if ply > 254:
+                raise OverflowError(f"{signature(self.codes)} has mates longer than 254 plies")
+            resolved = self.resolve(ply)
+
+    def resolve(self, ply: int) -> list[int]:
+        """Handle the events of *ply* and return the indices they resolve."""
+        values = self.values
+        counts = self.counts
+        resolved = []
+        for index, wins in self.buckets.pop(ply, []):
+            if counts[index] <= 0:
+                continue
+            if wins:
+                counts[index] = 0
+            else:
+                counts[index] -= 1
+                if counts[index]:
+                    continue
+            values[index] = ply + 1
+            resolved.append(index)
+        return resolved
+
+
+def _successors(codes: tuple[int, ...]) -> set[tuple[int, ...]]:
+    """The signatures a capture or promotion turns *codes* into."""
+    result = set()
+    for i, code in enumerate(codes):
+        rest = codes[:i] + codes[i + 1 :]
+        if code % 6 != bitboard.KING:
+            result.add(rest)
+        if code % 6 == bitboard.PAWN:
+            for promotion in bitboard.PROMOTIONS:
+                result.add(tuple(sorted(rest + (bitboard.piece_code(promotion, code // 6),))))
+    return result
+
+
+def generate(
+    codes: tuple[int, ...], tables: typing.Optional[dict[tuple[int, ...], bytearray]] = None
+) -> dict[tuple[int, ...], bytearray]:
+    """
+    Generate the table of *codes* and, first, of every signature it can turn into.
+
+    Positions with an en passant square are not told apart, and the fifty-move rule is not considered.
+
+    :param codes: Sorted piece codes, see :func:`codes_of`
+    :type codes: tuple[int, ...]
+    :param tables: Tables already generated, added to in place
+    :type tables: typing.Optional[dict[tuple[int, ...], bytearray]]
+    :return: Every generated table by its codes
+    :rtype: dict[tuple[int, ...], bytearray]
+    """
+    tables = {} if tables is None else tables
+    if codes not in tables:
+        for successor in _successors(codes):
+            generate(successor, tables)
+        tables[codes] = _Generator(codes, tables).run()
+    return tables
+
+
+def write(codes: tuple[int, ...], values: bytes, directory: pathlib.Path | str = TABLEBASE_PATH) -> pathlib.Path:
+    """
+    Write a table into *directory*, named after its signature.
+
+    :param codes:
+    :type codes: tuple[int, ...]
+    :param values:
+    :type values: bytes
+    :param directory:
+    :type directory: pathlib.Path | str
+    :return: The path of the file
+    :rtype: pathlib.Path
+    """
+    path = pathlib.Path(directory) / (signature(codes) + SUFFIX)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(codes), bytes(codes)))
+        file.write(values)
+    return path
+
+
+class Tablebase:
+    """One table file, memory-mapped so only the pages that probes touch are ever read."""
+
+    __slots__ = ("file", "data", "codes")
+
+    file: typing.BinaryIO
+    data: mmap.mmap
+    codes: tuple[int, ...]
+
+    def __init__(self, path: pathlib.Path | str) -> None:
+        self.file = open(path, "rb")  # pylint: disable=consider-using-with
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, codes = HEADER.unpack_from(self.data)
+        self.codes = tuple(codes[:count])
+        if magic != MAGIC or len(self.data) != HEADER.size + 2 * 64**count:
+            self.close()
+            raise ValueError(f"{path} is not a tablebase")
+
+    def close(self) -> None:
+        """Unmap and close the file."""
+        self.data.close()
+        self.file.close()
+
+    def probe(self, position: bitboard.Position) -> int:
+        """
+        Look *position* up; its material must be this table's.
+
+        :param position:
+        :type position: bitboard.Position
+        :return: ``MATE - plies`` if the side to move mates in so many plies, ``plies - MATE`` if it gets mated, else 0
+        :rtype: int
+        """
+        return _score(self.data[HEADER.size + _index_of(position, self.codes)])
+
+
+class Tablebases:
+    """Every table of a directory, each opened the first time a position with its material is probed."""
+
+    __slots__ = ("directory", "tables")
+
+    directory: pathlib.Path
+    tables: dict[tuple[int, ...], typing.Optional[Tablebase]]
+
+    def __init__(self, directory: pathlib.Path | str = TABLEBASE_PATH) -> None:
+        self.directory = pathlib.Path(directory)
+        self.tables = {}
+
+    def close(self) -> None:
+        """Close every open table."""
+        for table in self.tables.values():
+            if table is not None:
+                table.close()
+        self.tables.clear()
+
+    def table(self, position: bitboard.Position) -> typing.Optional[Tablebase]:
+        """The table for the material of *position*, or None if there is none."""
+        codes = _material(position)
+        if codes not in self.tables:
+            path = self.directory / (signature(codes) + SUFFIX)
+            self.tables[codes] = Tablebase(path) if path.is_file() else None
+        return self.tables[codes]
+
+    def probe(self, position: bitboard.Position) -> typing.Optional[int]:
+        """
+        Look *position* up.
+
+        :param position:
+        :type position: bitboard.Position
+        :return: The score :meth:`Tablebase.probe` gives, or None if no table covers the position
+        :rtype: typing.Optional[int]
+        """
+        if position.ep >= 0:
+            return None
+        return self._probe(position)
+
+    def _probe(self, position: bitboard.Position) -> typing.Optional[int]:
+        """Like :meth:`probe`, but treats an en passant square as if there were none."""
+        if position.king_square(bitboard.WHITE) < 0 or position.king_square(bitboard.BLACK) < 0:
+            return None
+        table = self.table(position)
+        return None if table is None else table.probe(position)
+
+    def best_move(self, position: bitboard.Position) -> typing.Optional[tuple[int, int]]:
+        """
+        Pick the move that mates fastest, holds the draw, or loses slowest, without searching.
+
+        :param position:
+        :type position: bitboard.Position
+        :return: The move and the score (as :meth:`probe` gives it) of the position it leads to, seen from the mover's
+            side, or None if the position has no legal move or a table is missing
+        :rtype: typing.Optional[tuple[int, int]]
+        """
+        if self.probe(position) is None:
+            return None
+        best: typing.Optional[tuple[int, int]] = None
+        for move in position.legal_moves():
+            undo = position.make_move(move)
+            reply = self._probe(position)
+            position.unmake_move(move, undo)
+            if reply is None:
+                return None
+            # One ply further from the mate than the reply, whichever side gives it.
+            score = -reply - 1 if reply < 0 else -reply + 1 if reply > 0 else 0
+            if best is None or score > best[1]:
+                best = (move, score)
+        return best
+
+
+_default: typing.Optional[Tablebases] = None
+
+
+def default() -> typing.Optional[Tablebases]:
+    """
+    The tables in :data:`TABLEBASE_PATH` (set ``WILD_CHESS_TABLEBASES`` to move them), or None if there are none.
+
+    :return:
+    :rtype: typing.Optional[Tablebases]
+    """
+    global _default  # pylint: disable=global-statement
+    if _default is None and TABLEBASE_PATH.is_dir():
+        _default = Tablebases(TABLEBASE_PATH)
+    return _default
+
+
+def main() -> None:
+    """Driver code."""
+    parser = argparse.ArgumentParser(description="Generate wild chess endgame tablebases.")
+    parser.add_argument("signatures", nargs="+", help="material to generate, like KQvK or KRvKN")
+    parser.add_argument("--output", type=pathlib.Path, default=TABLEBASE_PATH)
+    args = parser.parse_args()
+
+    tables: dict[tuple[int, ...], bytearray] = {}
+    for text in args.signatures:
+        generate(codes_of(text), tables)
+    for codes, values in tables.items():
+        won = sum(1 for byte in values if byte % 2 == 0 and byte)
+        print(f"{write(codes, values, args.output)}: {len(values)} indices, {won} won for the side to move")
+
+
+if __name__ == "__main__":
+    main()
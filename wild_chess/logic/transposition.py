@@ -0,0 +1,149 @@
+"""Fixed-size transposition table keyed by the Zobrist hash of a position."""
+
+
+from __future__ import annotations
+
+import array
+import typing
+
+__all__: tuple[str, ...] = ("EXACT", "LOWER", "UPPER", "Entry", "TranspositionTable")
+
+# Bound types of a stored score. Zero is left free so an empty slot never looks like an entry.
+EXACT: typing.Final[int] = 1
+LOWER: typing.Final[int] = 2
+UPPER: typing.Final[int] = 3
+
+# Every slot is two 64-bit words, the full key and the packed entry below; a bucket holds two slots.
+SLOT_WORDS: typing.Final[int] = 2
+BUCKET_SLOTS: typing.Final[int] = 2
+BUCKET_BYTES: typing.Final[int] = SLOT_WORDS * BUCKET_SLOTS * 8
+
+# Packed entry: move in bits 0-15, depth 16-23, bound 24-25, generation 26-33, score (offset to be >= 0) from 34.
+_DEPTH_SHIFT: typing.Final[int] = 16
+_BOUND_SHIFT: typing.Final[int] = 24
+_GENERATION_SHIFT: typing.Final[int] = 26
+_SCORE_SHIFT: typing.Final[int] = 34
+_SCORE_OFFSET: typing.Final[int] = 1 << 20
+
+
+class Entry(typing.NamedTuple):
+    """What the table knows about a position."""
+
+    move: int
+    depth: int
+    bound: int
+    score: int
+
+
+class TranspositionTable:
+    """
+    Preallocated hash table of search results.
+
+    Each bucket has a depth-preferred slot, only replaced by deeper (or newer) searches of any position, and an
+    always-replace slot that takes everything else. The size is rounded down to a power of two buckets so a bucket
+    is found by masking the key.
+    """
+
+    __slots__ = ("words", "mask", "generation", "hits", "misses", "stores")
+
+    words: array.array[int]
+    mask: int
+    generation: int
+    hits: int
+    misses: int
+    stores: int
+
+    def __init__(self, megabytes: float = 16) -> None:
+        buckets = max(1, int(megabytes * (1 << 20)) // BUCKET_BYTES)
+        buckets = 1 << (buckets.bit_length() - 1)
+        self.words = array.array("Q", bytes(buckets * BUCKET_BYTES))
+        self.mask = buckets - 1
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def __len__(self) -> int:
+        return len(self.words) // SLOT_WORDS
+
+    @property
+    def megabytes(self) -> float:
+        """The memory taken by the entries."""
+        return len(self.words) * 8 / (1 << 20)
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of probes that found their position."""
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def clear(self) -> None:
+        """Forget every entry and reset the counters."""
+        self.words = array.array("Q", bytes(len(self.words) * 8))
+        self.generation = 0
+        self.hits = self.misses = self.stores = 0
+
+    def new_search(self) -> None:
+        """Age the current entries, so the depth-preferred slots make room for the next search."""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key: int) -> typing.Optional[Entry]:
+        """
+        Look *key* up.
+
+        :param key:
+        :type key: int
+        :return: The stored entry, or None if the position is not in the table
+        :rtype: typing.Optional[Entry]
+        """
+        words = self.words
+        index = (key & self.mask) * SLOT_WORDS * BUCKET_SLOTS
+        for slot in (index, index + SLOT_WORDS):
+            data = words[slot + 1]
+            if data and words[slot] == key:
+                self.hits += 1
+                return Entry(
+                    data & 0xFFFF,
+                    (data >> _DEPTH_SHIFT) & 0xFF,
+                    (data >> _BOUND_SHIFT) & 3,
+                    (data >> _SCORE_SHIFT) - _SCORE_OFFSET,
+                )
+        self.misses += 1
+        return None
+
+    def store(self, key: int, move: int, depth: int, bound: int, score: int) -> None:
+        """
+        Record the result of searching the position *key* to *depth*.
+
+        :param key:
+        :type key: int
+        :param move: Best (or refuting) move found, 0 if none
+        :type move: int
+        :param depth:
+        :type depth: int
+        :param bound: :data:`EXACT`, :data:`LOWER` or :data:`UPPER`
+        :type bound: int
+        :param score:
+        :type score: int
+        """
+        words = self.words
+        index = (key & self.mask) * SLOT_WORDS * BUCKET_SLOTS
+        data = words[index + 1]
+        if (
+            not data
+            or words[index] == key
+            or depth >= (data >> _DEPTH_SHIFT) & 0xFF
+            or (data >> _GENERATION_SHIFT) & 0xFF != self.generation
+        ):
+            slot = index
+        else:
+            slot = index + SLOT_WORDS
+        words[slot] = key
+        words[slot + 1] = (
+            move
+            | depth << _DEPTH_SHIFT
+            | bound << _BOUND_SHIFT
+            | self.generation << _GENERATION_SHIFT
+            | (score + _SCORE_OFFSET) << _SCORE_SHIFT
+        )
+        self.stores += 1
@@ -0,0 +1,257 @@
+"""In-process store of active games, kept free of FastAPI so the GUI can share it without loading the server."""
+
+
+from __future__ import annotations
+
+import os
+import random
+import time
+import typing
+
+from wild_chess.logic import bitboard
+from wild_chess.utils import board, gamerecord
+
+__all__: tuple[str, ...] = (
+    "GAME_TTL",
+    "MAX_GAMES",
+    "GameRegistry",
+    "active_game",
+    "registry",
+    "play_move",
+    "resign",
+    "records",
+)
+
+# Seconds a hosted game may go without a request before it is evicted.
+GAME_TTL: typing.Final[float] = float(os.getenv("WILD_CHESS_GAME_TTL", "3600"))
+# Most games hosted at once; hosting more is refused until some are removed or evicted.
+MAX_GAMES: typing.Final[int] = int(os.getenv("WILD_CHESS_MAX_GAMES", "10000"))
+
+active_game: dict[typing.Any, typing.Any] = {}
+
+
+class GameRegistry:
+    """
+    Hosted games, indexed both by code and by player, so every lookup is a dict access.
+
+    Each game is a dict with its ``code``, its headless ``board`` (the host plays white), its ``players`` and the
+    ``seen`` time of its last request (from :func:`time.monotonic`), and once it is over the ``result`` of each
+    player (see :func:`records`). :meth:`sweep` evicts the games idle for longer than the TTL.
+    """
+
+    __slots__ = ("ttl", "capacity", "by_code", "by_player")
+
+    ttl: float
+    capacity: int
+    by_code: dict[str, dict[str, typing.Any]]
+    by_player: dict[str, dict[str, typing.Any]]
+
+    def __init__(self, ttl: float = GAME_TTL, capacity: int = MAX_GAMES) -> None:
+        self.ttl = ttl
+        self.capacity = capacity
+        self.by_code = {}
+        self.by_player = {}
+
+    def __len__(self) -> int:
+        return len(self.by_code)
+
+    def __contains__(self, code: object) -> bool:
+        return code in self.by_code
+
+    def host(self, code: str, username: str, rng: typing.Optional[random.Random] = None) -> dict[str, typing.Any]:
+        """
+        Host a new game from a wild start, removing the game the player hosted before, if any.
+
+        :param code: A code no live game has
+        :type code: str
+        :param username:
+        :type username: str
+        :param rng: Random number generator to draw the start from, the global one if not given
+        :type rng: typing.Optional[random.Random]
+        :return:
+        :rtype: dict[str, typing.Any]
+        """
+        if code in self.by_code:
+            raise ValueError(f"a game with code {code!r} already exists")
+        previous = self.by_player.get(username)
+        if previous is not None and previous["players"][0] == username:
+            self.remove(previous["code"])
+        if len(self.by_code) >= self.capacity:
+            raise ValueError("too many games are hosted")
+        game_board = board.Board("white", "black", headless=True)
+        game_board.generate_pieces(game_board.player1, game_board.player2, rng)
+        game = {"code": code, "board": game_board, "players": [username], "seen": time.monotonic()}
+        self.by_code[code] = game
+        self.by_player[username] = game
+        return game
+
+    def join(self, code: str, username: str) -> typing.Optional[dict[str, typing.Any]]:
+        """
+        Add a second player to a game.
+
+        :param code:
+        :type code: str
+        :param username:
+        :type username: str
+        :return: The game, or None if there is none with *code* or it cannot be joined
+        :rtype: typing.Optional[dict[str, typing.Any]]
+        """
+        game = self.by_code.get(code)
+        if game is None or len(game["players"]) != 1 or username in game["players"]:
+            return None
+        game["players"].append(username)
+        self.touch(game)
+        self.by_player[username] = game
+        return game
+
+    def find(self, code: str, username: str) -> typing.Optional[dict[str, typing.Any]]:
+        """
+        The game *username* plays with *code*, marked as just seen.
+
+        :param code:
+        :type code: str
+        :param username:
+        :type username: str
+        :return:
+        :rtype: typing.Optional[dict[str, typing.Any]]
+        """
+        game = self.by_code.get(code)
+        if game is None or username not in game["players"]:
+            return None
+        self.touch(game)
+        return game
+
+    @staticmethod
+    def touch(game: dict[str, typing.Any]) -> None:
+        """
+        Mark a game as just seen, putting its eviction off.
+
+        :param game:
+        :type game: dict[str, typing.Any]
+        """
+        game["seen"] = time.monotonic()
+
+    def of_player(self, username: str) -> typing.Optional[dict[str, typing.Any]]:
+        """
+        The latest game *username* hosted or joined.
+
+        :param username:
+        :type username: str
+        :return:
+        :rtype: typing.Optional[dict[str, typing.Any]]
+        """
+        return self.by_player.get(username)
+
+    def remove(self, code: str) -> typing.Optional[dict[str, typing.Any]]:
+        """
+        Forget a game, such as a finished one.
+
+        :param code:
+        :type code: str
+        :return: The game, or None if there was none with *code*
+        :rtype: typing.Optional[dict[str, typing.Any]]
+        """
+        game = self.by_code.pop(code, None)
+        if game is not None:
+            for username in game["players"]:
+                if self.by_player.get(username) is game:
+                    del self.by_player[username]
+        return game
+
+    def sweep(self, now: typing.Optional[float] = None) -> list[str]:
+        """
+        Evict every game idle for longer than the TTL.
+
+        :param now: A :func:`time.monotonic` time, the current one if not given
+        :type now: typing.Optional[float]
+        :return: The codes of the evicted games
+        :rtype: list[str]
+        """
+        deadline = (time.monotonic() if now is None else now) - self.ttl
+        expired = [code for code, game in self.by_code.items() if game["seen"] < deadline]
+        for code in expired:
+            self.remove(code)
+        return expired
+
+
+registry = GameRegistry()
+
+
+def play_move(game: dict[str, typing.Any], username: str, move: int, seq: int) -> list[tuple[int, int]]:
+    """
+    Play a move of *username* on the server's board of *game*, after checking it against the rules.
+
+    :param game:
+    :type game: dict[str, typing.Any]
+    :param username:
+    :type username: str
+    :param move: A packed move, see :func:`bitboard.encode_move`
+    :type move: int
+    :param seq: The number of plies played before this move, as the player knows it
+    :type seq: int
+    :return: The squares the move changed, with the piece code (:data:`bitboard.EMPTY` if none) now on each; a move
+        that mates or stalemates also sets the ``result`` of the game
+    :rtype: list[tuple[int, int]]
+    """
+    game_board: board.Board = game["board"]
+    position = game_board.position
+    if "result" in game:
+        raise ValueError("the game is over")
+    if seq != len(game_board.history):
+        raise ValueError(f"out of sync: the game is at ply {len(game_board.history)}, not {seq}")
+    if username not in game["players"] or game["players"].index(username) != position.side:
+        raise ValueError("not your turn")
+    legal = position.legal_moves()
+    if move not in legal:
+        # A pawn reaching the last rank without naming a piece becomes a queen.
+        if move >> 12 or move | bitboard.QUEEN << 12 not in legal:
+            raise ValueError("illegal move")
+        move |= bitboard.QUEEN << 12
+    before = position.mailbox[:]
+    game_board.make_move(move)
+    if not position.legal_moves():
+        checkmated = position.king_square(position.side) < 0 or position.in_check(position.side)
+        _finish(game, username if checkmated else None)
+    return [(sq, code) for sq, (old, code) in enumerate(zip(before, position.mailbox)) if old != code]
+
+
+def resign(game: dict[str, typing.Any], username: str) -> dict[str, str]:
+    """
+    End *game* as lost by *username*, who resigned or left it.
+
+    :param game:
+    :type game: dict[str, typing.Any]
+    :param username:
+    :type username: str
+    :return: The ``result`` of the game
+    :rtype: dict[str, str]
+    """
+    if "result" in game:
+        raise ValueError("the game is over")
+    if username not in game["players"] or len(game["players"]) != 2:
+        raise ValueError("nobody has joined the game")
+    return _finish(game, next(player for player in game["players"] if player != username))
+
+
+def records(game: dict[str, typing.Any]) -> list[tuple[str, gamerecord.GameRecord]]:
+    """
+    The record of a finished game for the history of each of its players.
+
+    :param game:
+    :type game: dict[str, typing.Any]
+    :return:
+    :rtype: list[tuple[str, gamerecord.GameRecord]]
+    """
+    players = game["players"]
+    return [
+        (username, gamerecord.from_board(game["board"], players[1 - index], game["result"][username]))
+        for index, username in enumerate(players)
+    ]
+
+
+def _finish(game: dict[str, typing.Any], winner: typing.Optional[str]) -> dict[str, str]:
+    """Set the ``result`` of *game*, won by *winner* or tied if None, and return it."""
+    game["result"] = {
+        username: "tie" if winner is None else "win" if username == winner else "loss" for username in game["players"]
+    }
+    return game["result"]
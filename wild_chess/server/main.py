@@ -3,13 +3,22 @@
 import fastapi
 import uvicorn
 
-from wild_chess.server.routes import authentication, leaderboard, multiplayer
+from wild_chess.server.routes import authentication, history, instrumentation, leaderboard, multiplayer
+from wild_chess.setup import setup
 
 app = fastapi.FastAPI()
+# One connection pool for the server's lifetime, instead of one per request.
+app.add_event_handler("startup", setup.start)
+app.add_event_handler("shutdown", setup.stop)
 
 app.include_router(authentication.route)
+app.include_router(history.route)
 app.include_router(leaderboard.route)
 app.include_router(multiplayer.route)
+# The rules engine is only instrumented, and its numbers only served, on servers given an admin token.
+if instrumentation.ADMIN_TOKEN is not None:
+    app.add_event_handler("startup", instrumentation.start)
+    app.include_router(instrumentation.route)
 
 
 def main() -> None:
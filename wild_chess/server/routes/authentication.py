@@ -3,37 +3,34 @@
 
 import fastapi
 
-from ...setup.setup import Setup
+from ...database import db
+from ...setup import setup
 route = fastapi.APIRouter()
 
 
 @route.post("/signup")
-async def signup(username: str, password: str) -> dict:
+async def signup(username: str, password: str, database: db.PlayerDB = fastapi.Depends(setup.database)) -> dict:
     """
     Signs a user up.
 
     :param username:
     :param password:
+    :param database:
     :return:
     """
-    setup = Setup()
-    await setup.setup()
-    player = await setup.database.create_player(username, password)
-    await setup.close()
+    player = await database.create_player(username, password)
     return {"message": "user_created"} if player else {"message": "username already exists"}
 
 
 @route.post("/login")
-async def login(username: str, password: str) -> dict:
+async def login(username: str, password: str, database: db.PlayerDB = fastapi.Depends(setup.database)) -> dict:
     """
     Logs the user in.
 
     :param username:
     :param password:
+    :param database:
     :return:
     """
-    setup = Setup()
-    await setup.setup()
-    player = await setup.database.check_password(username, password)
-    await setup.close()
+    player = await database.check_password(username, password)
     return {"message": "login_successful"} if player else {"message": "login_failed"}
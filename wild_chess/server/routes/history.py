@@ -0,0 +1,25 @@
+"""Game history functions"""
+
+
+import fastapi
+
+from ...database import db
+from ...setup import setup
+
+route = fastapi.APIRouter()
+
+
+@route.get("/history/{username}")
+async def get_history(username: str, database: db.PlayerDB = fastapi.Depends(setup.database)) -> dict[str, str | list[str]]:
+    """
+    Gets a player's games, as base64 game records (see ``wild_chess.utils.gamerecord``).
+
+    :param username:
+    :type username: str
+    :param database:
+    :type database: db.PlayerDB
+    :return:
+    :rtype: dict[str, str | list[str]]
+    """
+    history = await database.player_history(username)
+    return {"message": "error"} if history is None else {"history": history}
@@ -0,0 +1,66 @@
+"""Instrumentation switches and exports, for administrators only"""
+
+
+import os
+import secrets
+import typing
+
+import fastapi
+import fastapi.responses
+
+from wild_chess.utils import instrumentation
+
+# Token the X-Admin-Token header must carry; the server only serves these routes when it is set.
+ADMIN_TOKEN: typing.Final[typing.Optional[str]] = os.getenv("WILD_CHESS_ADMIN_TOKEN") or None
+
+
+def authorize(x_admin_token: typing.Optional[str] = fastapi.Header(default=None)) -> None:
+    """
+    Reject requests that do not carry the admin token.
+
+    :param x_admin_token:
+    :type x_admin_token: typing.Optional[str]
+    """
+    if ADMIN_TOKEN is None or x_admin_token is None or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise fastapi.HTTPException(status_code=403, detail="admin token required")
+
+
+route = fastapi.APIRouter(dependencies=[fastapi.Depends(authorize)])
+
+
+def start() -> None:
+    """Measure from the first request on if WILD_CHESS_INSTRUMENT is set, instead of waiting for an enable request."""
+    if os.getenv("WILD_CHESS_INSTRUMENT"):
+        instrumentation.enable()
+
+
+@route.post("/instrumentation/{action}")
+async def switch(action: str) -> dict[str, str | bool]:
+    """
+    Enable, disable or reset the instrumentation of the rules engine.
+
+    :param action: ``enable``, ``disable`` or ``reset``
+    :type action: str
+    :return:
+    :rtype: dict[str, str | bool]
+    """
+    actions = {"enable": instrumentation.enable, "disable": instrumentation.disable, "reset": instrumentation.reset}
+    if action not in actions:
+        raise fastapi.HTTPException(status_code=404, detail=f"unknown action {action!r}")
+    actions[action]()
+    return {"message": "ok", "enabled": instrumentation.enabled()}
+
+
+@route.get("/instrumentation")
+async def export(format: str = "json") -> fastapi.Response:  # pylint: disable=redefined-builtin
+    """
+    Export the numbers gathered so far.
+
+    :param format: ``json`` or ``prometheus``
+    :type format: str
+    :return:
+    :rtype: fastapi.Response
+    """
+    if format == "prometheus":
+        return fastapi.responses.PlainTextResponse(instrumentation.to_prometheus(), media_type="text/plain; version=0.0.4")
+    return fastapi.Response(instrumentation.to_json(), media_type="application/json")
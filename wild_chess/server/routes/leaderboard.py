@@ -1,19 +1,40 @@
 """Leaderboard function"""
 
 
+import dataclasses
+
 import fastapi
+import fastapi.responses
 
-from ...setup.setup import Setup
-from wild_chess.utils import data
+from ...database import db
+from ...setup import setup
 
 route = fastapi.APIRouter()
 
 
 @route.get("/leaderboard")
-async def get_leaderboard() -> dict[str, list[data.PlayerRecord]]:
-    """Gets the leaderboard data"""
-    setup = Setup()
-    await setup.setup()
-    board = await setup.database.leaderboard()
-    await setup.close()
-    return {"leaderboard": board}
+async def get_leaderboard(
+    if_none_match: str | None = fastapi.Header(default=None),
+    database: db.PlayerDB = fastapi.Depends(setup.database),
+) -> fastapi.Response:
+    """
+    Gets the leaderboard data, or 304 Not Modified if the client's copy (named by its ETag) is still current.
+
+    :param if_none_match:
+    :type if_none_match: str | None
+    :param database:
+    :type database: db.PlayerDB
+    :return:
+    :rtype: fastapi.Response
+    """
+    board, etag = await database.leaderboard()
+    # Clients keep their copy but ask again every time, so a game that changes the standings shows up at once.
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match is not None and (if_none_match.strip() == "*" or etag in _etags(if_none_match)):
+        return fastapi.Response(status_code=304, headers=headers)
+    return fastapi.responses.JSONResponse({"leaderboard": [dataclasses.asdict(entry) for entry in board]}, headers=headers)
+
+
+def _etags(header: str) -> list[str]:
+    """The ETags listed in an If-None-Match header, weak ones compared as strong ones."""
+    return [tag.strip().removeprefix("W/") for tag in header.split(",")]
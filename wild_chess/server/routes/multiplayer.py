@@ -1,31 +1,177 @@
 """multiplayer functions"""
 
 
+import asyncio
 import random
+import string
+import typing
 
 import fastapi
+import pydantic
+
+from wild_chess.database import db
+from wild_chess.logic import bitboard, fen
+from wild_chess.server import games
+from wild_chess.server.games import registry
+from wild_chess.setup import setup
+from wild_chess.utils import gamerecord
 
 route = fastapi.APIRouter()
-active_game: dict = {}
 
+# Seconds between two sweeps of idle games.
+SWEEP_INTERVAL: typing.Final[float] = 60.0
+# Codes drawn for a new game before giving up, which only happens when the registry is (nearly) full.
+HOST_ATTEMPTS: typing.Final[int] = 16
 
-@route.post("/host-game")
-async def host_game(username: str) -> dict[str, list[str]]:
+# Open WebSocket channels of every game, by game code.
+channels: dict[str, list[fastapi.WebSocket]] = {}
+_sweeper: typing.Optional[asyncio.Task[None]] = None
+
+
+async def sweep_games(interval: float = SWEEP_INTERVAL) -> None:
+    """
+    Evict idle games every *interval* seconds, closing their channels.
+
+    :param interval:
+    :type interval: float
+    """
+    while True:
+        await asyncio.sleep(interval)
+        sockets = [socket for code in registry.sweep() for socket in channels.pop(code, ())]
+        await asyncio.gather(
+            *(socket.close(code=fastapi.status.WS_1001_GOING_AWAY) for socket in sockets), return_exceptions=True
+        )
+
+
+@route.on_event("startup")
+async def start_sweeper() -> None:
+    """Starts evicting idle games in the background."""
+    global _sweeper  # pylint: disable=global-statement
+    _sweeper = asyncio.create_task(sweep_games())
+
+
+@route.on_event("shutdown")
+async def stop_sweeper() -> None:
+    """Stops evicting idle games."""
+    if _sweeper is not None:
+        _sweeper.cancel()
+
+
+class Move(pydantic.BaseModel):
+    """A move sent by a player: squares such as ``e2`` and ``e4``, and the number of plies the player has seen."""
+
+    origin: str = pydantic.Field(alias="from")
+    target: str = pydantic.Field(alias="to")
+    promotion: typing.Optional[str] = None
+    seq: int
+
+
+def state(game: dict[str, typing.Any]) -> dict[str, typing.Any]:
     """
-    Hosts the game.
+    The whole position of a game, and the number of plies played to reach it.
 
+    :param game:
+    :type game: dict[str, typing.Any]
+    :return:
+    :rtype: dict[str, typing.Any]
+    """
+    return {"type": "state", "fen": game["board"].fen(), "seq": len(game["board"].history)}
+
+
+async def apply(
+    game: dict[str, typing.Any],
+    username: str,
+    move: Move,
+    database: db.PlayerDB,
+    sender: typing.Optional[fastapi.WebSocket] = None,
+) -> dict[str, typing.Any]:
+    """
+    Play *move* and push its delta to the other channels of the game, recording the game if the move ends it.
+
+    :param game:
+    :type game: dict[str, typing.Any]
     :param username:
     :type username: str
-    :return:
-    :rtype: dict[str, list[str]]
+    :param move:
+    :type move: Move
+    :param database:
+    :type database: db.PlayerDB
+    :param sender: The channel the move came from, if any
+    :type sender: typing.Optional[fastapi.WebSocket]
+    :return: ``{"type": "move", "player": ..., "move": "e2e4", "seq": ..., "delta": [["e2", None], ["e4", "P"]]}``
+        with the squares the move changed and the piece now on each, and the ``result`` of each player if the move
+        ended the game; or an error message and the server's ``seq``
+    :rtype: dict[str, typing.Any]
     """
-    code = ['0', '1', '2', '3', '4', '5']
+    try:
+        packed = gamerecord.parse_move(move.origin + move.target + (move.promotion or ""))
+        changes = games.play_move(game, username, packed, move.seq)
+    except ValueError as error:
+        return {"type": "error", "message": str(error), "seq": len(game["board"].history)}
 
-    random.shuffle(code)
-    shuffled = "".join(code)
+    delta = [[gamerecord.square_name(sq), None if code == bitboard.EMPTY else fen.LETTERS[code]] for sq, code in changes]
+    message = {
+        "type": "move",
+        "player": username,
+        "move": gamerecord.move_name(game["board"].history[-1][0]),
+        "seq": len(game["board"].history),
+        "delta": delta,
+    }
+    if "result" in game:
+        message["result"] = game["result"]
+        await record(game, database)
+    await push(game["code"], message, sender)
+    return {"message": "ok", **message}
 
-    active_game[username] = {"code": shuffled, "board": None, "players": [username]}
-    return {"code": code}
+
+async def record(game: dict[str, typing.Any], database: db.PlayerDB) -> None:
+    """
+    Store a finished game in the history of each of its players, and count it towards the leaderboard.
+
+    :param game:
+    :type game: dict[str, typing.Any]
+    :param database:
+    :type database: db.PlayerDB
+    """
+    counts = {"win": database.update_player_win, "loss": database.update_player_loss, "tie": database.update_player_tie}
+    for username, game_record in games.records(game):
+        await database.update_player_history(username, game_record)
+        await counts[game_record.status](username)
+
+
+async def push(code: str, message: dict[str, typing.Any], sender: typing.Optional[fastapi.WebSocket] = None) -> None:
+    """
+    Send *message* down every open channel of the game with *code* but the sender's.
+
+    :param code:
+    :type code: str
+    :param message:
+    :type message: dict[str, typing.Any]
+    :param sender:
+    :type sender: typing.Optional[fastapi.WebSocket]
+    """
+    sockets = [socket for socket in channels.get(code, ()) if socket is not sender]
+    await asyncio.gather(*(socket.send_json(message) for socket in sockets), return_exceptions=True)
+
+
+@route.post("/host-game")
+async def host_game(username: str) -> dict[str, list[str] | str]:
+    """
+    Hosts the game, under a random six digit code.
+
+    :param username:
+    :type username: str
+    :return: The code as a list of digits, or an error message if no game can be hosted
+    :rtype: dict[str, list[str] | str]
+    """
+    for _ in range(HOST_ATTEMPTS):
+        code = random.choices(string.digits, k=6)
+        try:
+            registry.host("".join(code), username)
+        except ValueError:
+            continue
+        return {"code": code}
+    return {"message": "error"}
 
 
 @route.post("/join-game/{code}")
@@ -40,51 +186,123 @@ async def join_game(code: str, username: str) -> dict[str, str]:
     :return:
     :rtype: dict[str, str]
     """
-    for v in active_game.values():
-        if v["code"] == code:
-            if len(v["players"]) == 1 and username not in v["players"]:
-                v["players"].append(username)
-                return {"message": "ok"}
-
-    return {"message": "error"}
+    return {"message": "error"} if registry.join(code, username) is None else {"message": "ok"}
 
 
 @route.post("/game/{code}")
-async def post_game(code: str, username: str, board: list[list[str]]) -> dict[str, str]:
+async def post_game(
+    code: str, username: str, move: Move, database: db.PlayerDB = fastapi.Depends(setup.database)
+) -> dict[str, typing.Any]:
     """
-    Posts the game.
+    Plays a move on the server's board, once it is checked against the rules, and pushes it to the other player.
 
     :param code:
     :type code: str
     :param username:
     :type username: str
-    :param board:
-    :type board: list[list[str]]
-    :return:
-    :rtype: dict[str, str]
+    :param move:
+    :type move: Move
+    :param database:
+    :type database: db.PlayerDB
+    :return: The move's delta (see :func:`apply`), or an error message with the server's ``seq``
+    :rtype: dict[str, typing.Any]
     """
-    for v in active_game.values():
-        if v["code"] == code and username in v["players"]:
-            v["board"] = board
-            return {"message": "ok"}
+    game = registry.find(code, username)
+    if game is None:
+        return {"message": "error"}
 
-    return {"message": "error"}
+    return await apply(game, username, move, database)
+
+
+@route.post("/game/{code}/resign")
+async def resign_game(
+    code: str, username: str, database: db.PlayerDB = fastapi.Depends(setup.database)
+) -> dict[str, typing.Any]:
+    """
+    Resigns the game, as when a player leaves it, records it and pushes the result to the other player.
+
+    :param code:
+    :type code: str
+    :param username:
+    :type username: str
+    :param database:
+    :type database: db.PlayerDB
+    :return: ``{"type": "result", "player": ..., "result": {...}}`` with the status of each player, or an error message
+    :rtype: dict[str, typing.Any]
+    """
+    game = registry.find(code, username)
+    if game is None:
+        return {"message": "error"}
+
+    try:
+        result = games.resign(game, username)
+    except ValueError as error:
+        return {"type": "error", "message": str(error), "seq": len(game["board"].history)}
+
+    await record(game, database)
+    message = {"type": "result", "player": username, "result": result}
+    await push(code, message)
+    return {"message": "ok", **message}
 
 
 @route.get("/game/{code}")
-async def get_board(code: str, username: str) -> dict[str, str | list[list[str]]]:
+async def get_board(code: str, username: str) -> dict[str, typing.Any]:
     """
-    Gets the board.
+    Gets the whole position, to start from or to get back in sync.
 
     :param code:
     :type code: str
     :param username:
     :type username: str
     :return:
-    :rtype: dict[str, str | list[list[str]]]
+    :rtype: dict[str, typing.Any]
+    """
+    game = registry.find(code, username)
+    return {"board": "error"} if game is None else state(game)
+
+
+@route.websocket("/game/{code}/ws")
+async def game_channel(
+    websocket: fastapi.WebSocket, code: str, username: str, database: db.PlayerDB = fastapi.Depends(setup.database)
+) -> None:
+    """
+    Pushes every move of the game to its players as it happens, instead of them polling ``GET /game/{code}``.
+
+    The current position is sent on connecting, as in ``GET /game/{code}``. Moves sent by a player, as in
+    ``POST /game/{code}``, are answered and pushed to every other open channel of the game like there.
+
+    :param websocket:
+    :type websocket: fastapi.WebSocket
+    :param code:
+    :type code: str
+    :param username:
+    :type username: str
+    :param database:
+    :type database: db.PlayerDB
     """
-    for v in active_game.values():
-        if v["code"] == code and username in v["players"]:
-            return {"board": v["board"]}
+    game = registry.find(code, username)
+    if game is None:
+        await websocket.close(code=fastapi.status.WS_1008_POLICY_VIOLATION)
+        return
 
-    return {"board": "error"}
+    await websocket.accept()
+    sockets = channels.setdefault(code, [])
+    sockets.append(websocket)
+    try:
+        await websocket.send_json(state(game))
+        while True:
+            # A binary frame raises KeyError (it has no text), one that is not JSON json.JSONDecodeError and one that is
+            # not a move pydantic.ValidationError, both ValueErrors.
+            try:
+                move = Move.parse_obj(await websocket.receive_json())
+            except (KeyError, ValueError):
+                await websocket.send_json({"type": "error", "message": "expected a move"})
+                continue
+            registry.touch(game)
+            await websocket.send_json(await apply(game, username, move, database, websocket))
+    except fastapi.WebSocketDisconnect:
+        pass
+    finally:
+        sockets.remove(websocket)
+        if not sockets and channels.get(code) is sockets:
+            del channels[code]
@@ -1,13 +1,21 @@
 """Database setup."""
 
 
+from __future__ import annotations
+
 import asyncio
 import os
-
-import asyncpg
+import typing
 
 from wild_chess.database import db
 
+if typing.TYPE_CHECKING:
+    import asyncpg
+
+# Connections the pool keeps open, and the most it opens under load.
+POOL_MIN_SIZE: typing.Final[int] = int(os.getenv("WILD_CHESS_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE: typing.Final[int] = int(os.getenv("WILD_CHESS_POOL_MAX_SIZE", "10"))
+
 
 class Setup:
     """Class methods for setup."""
@@ -20,7 +28,10 @@ async def connect(self) -> None:
         Connect to and set the database.
 
         Uses asyncpg to connect to the database. Fetches keys from the environment.
+        asyncpg is only imported here, so loading the server routes stays cheap.
         """
+        import asyncpg  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
         self.pool = await asyncpg.create_pool(
             user=os.getenv("PGUSER"),
             password=os.getenv("PGPASSWORD"),
@@ -28,6 +39,8 @@ async def connect(self) -> None:
             port=os.getenv("PGPORT"),
             database=os.getenv("PGDATABASE"),
             ssl="require",
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
             loop=asyncio.get_event_loop(),
         )
 
@@ -41,3 +54,35 @@ async def setup(self) -> None:
     async def close(self) -> None:
         """Close all connections"""
         await self.pool.close()
+
+
+_shared: typing.Optional[Setup] = None
+
+
+async def start() -> None:
+    """Open the pool shared by every request and create the table, once, when the server starts."""
+    global _shared  # pylint: disable=global-statement
+    if _shared is None:
+        setup = Setup()
+        await setup.setup()
+        _shared = setup
+
+
+async def stop() -> None:
+    """Close the shared pool when the server stops."""
+    global _shared  # pylint: disable=global-statement
+    if _shared is not None:
+        await _shared.close()
+        _shared = None
+
+
+def database() -> db.PlayerDB:
+    """
+    The player database on the shared pool; server routes get it with ``fastapi.Depends(database)``.
+
+    :return:
+    :rtype: db.PlayerDB
+    """
+    if _shared is None:
+        raise RuntimeError("the database pool is not open, start() it first")
+    return _shared.database
@@ -0,0 +1,42 @@
+"""Batch evaluation agrees with the one-position evaluator."""
+
+
+import pathlib
+import random
+
+import pytest
+
+from wild_chess.logic import batch, bitboard, evaluation, fen, perft
+
+
+def _positions() -> list[bitboard.Position]:
+    """Seeded wild start positions, each a few random moves in."""
+    rng = random.Random(14)
+    positions = []
+    for text in perft.wild_positions(14, 10).values():
+        position = fen.parse(text)
+        for _ in range(rng.randrange(10)):
+            moves = position.legal_moves()
+            if not moves:
+                break
+            position.make_move(rng.choice(moves))
+        positions.append(position)
+    return positions
+
+
+def test_evaluate_many() -> None:
+    """Positions and their FEN strings score the same as with evaluation.evaluate, with or without numpy."""
+    positions = _positions()
+    expected = [evaluation.evaluate(position) for position in positions]
+    assert batch.evaluate_many(positions) == expected
+    assert batch.evaluate_many([fen.serialize(position) for position in positions]) == expected
+
+
+def test_evaluate_records(tmp_path: pathlib.Path) -> None:
+    """Records read by fen.read_array score the same as the positions they came from."""
+    pytest.importorskip("numpy")
+    positions = _positions()
+    path = tmp_path / "positions.fen"
+    path.write_text("".join(fen.serialize(position) + "\n" for position in positions), encoding="utf-8")
+    scores = batch.evaluate_records(fen.read_array(path))
+    assert scores.tolist() == [evaluation.evaluate(position) for position in positions]
@@ -0,0 +1,32 @@
+"""Start keys and book files."""
+
+
+import pathlib
+import random
+
+from wild_chess.logic import book, fen, initial_position
+
+
+def test_start_keys() -> None:
+    """Keys of generated starts are unique to them and can be turned back into the ranks."""
+    rng = random.Random(15)
+    for _ in range(100):
+        back, pawns = initial_position.wild_ranks(rng)
+        key = book.start_key(back, pawns)
+        assert 0 <= key < book.KEYS
+        assert book.ranks_of(key) == (back, pawns)
+        assert book.key_of(fen.parse(initial_position.wild_fen(back, pawns))) == key
+    assert book.key_of(fen.parse("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBN1 w - - 0 1")) is None
+
+
+def test_lookup(tmp_path: pathlib.Path) -> None:
+    """Every written entry is found again, and keys that were not written are not."""
+    entries = [book.BookEntry(key, key % 200 - 100, key % 4096, 4) for key in range(7, 70_000, 613)]
+    path = tmp_path / "book.bin"
+    assert book.write(reversed(entries), path) == len(entries)
+    with book.Book(path) as opening:
+        assert len(opening) == len(entries)
+        for entry in entries:
+            assert opening.get(entry.key) == entry
+        assert opening.get(8) is None
+        assert opening.get(book.KEYS) is None
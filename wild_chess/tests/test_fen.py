@@ -0,0 +1,32 @@
+"""FEN and EPD codec."""
+
+
+import array
+import re
+
+import pytest
+
+from wild_chess.logic import bitboard, fen
+
+
+def test_optional_fields() -> None:
+    """Each trailing FEN field is read when present, and the missing ones take their start-of-game values."""
+    text = "4k3/8/8/8/8/8/4P3/4K3 b - - 37 52"
+    assert fen.serialize(fen.parse(text)) == text
+    position = fen.parse("4k3/8/8/8/8/8/4P3/4K3 b - - 37")
+    assert (position.halfmove, position.fullmove) == (37, 1)
+    position = fen.parse("4k3/8/8/8/8/8/4P3/4K3")
+    assert (position.side, position.halfmove, position.fullmove) == (bitboard.WHITE, 0, 1)
+
+
+def test_pack_rejects_bad_lines() -> None:
+    """Packing a line parse rejects raises the same error and leaves the records already packed in place."""
+    records = array.array("b")
+    fen.pack("4k3/8/8/8/8/8/4P3/4K3 b - e3 0 1", records)
+    for text in ("4k3/8/8/8/8/8/4P3/4K3 x - - 0 1", "4k3/8/8/8/8/8/4P3/4KX2 w - - 0 1", "4k3/8/8 w - - 0 1"):
+        with pytest.raises(ValueError) as parsing:
+            fen.parse(text)
+        with pytest.raises(ValueError, match=re.escape(str(parsing.value))):
+            fen.pack(text, records)
+    assert len(records) == fen.RECORD_SIZE
+    assert (records[64], records[65]) == (bitboard.BLACK, 20)
@@ -0,0 +1,49 @@
+"""Binary game records."""
+
+
+import random
+
+import pytest
+
+from wild_chess.logic import fen
+from wild_chess.utils import board, gamerecord
+
+
+def test_roundtrip_and_replay() -> None:
+    """A recorded game reads back unchanged, stores its wild start as a key, and replays to the final position."""
+    game = board.Board("white", "black", headless=True)
+    rng = random.Random(5)
+    game.generate_pieces(game.player1, game.player2, rng)
+    for _ in range(30):
+        game.make_move(rng.choice(game.position.legal_moves()))
+    record = gamerecord.from_board(game, "black", "tie")
+    data = gamerecord.encode(record)
+    assert len(data) == gamerecord.HEADER.size + len("black") + 8 + 2 * 30
+    assert gamerecord.from_text(gamerecord.to_text(record)) == record
+    *_, last = gamerecord.replay(record)
+    assert fen.serialize(last) == game.fen()
+
+
+def test_other_starts_and_bad_records() -> None:
+    """Any start is kept as its FEN, and broken records or illegal moves are rejected."""
+    record = gamerecord.GameRecord("someone", "win", "4k3/8/8/8/8/8/8/R3K3 w - - 0 1", [0 | 56 << 6])
+    assert gamerecord.decode(gamerecord.encode(record)) == record
+    assert gamerecord.move_name(record.moves[0]) == "a1a8"
+    with pytest.raises(ValueError):
+        gamerecord.from_text("{'opponent': 'someone', 'moves': [], 'status': 'win'}")
+    with pytest.raises(ValueError):
+        list(gamerecord.replay(gamerecord.GameRecord("someone", "loss", record.start, [0 | 57 << 6])))
+
+
+def test_truncated_records() -> None:
+    """A record cut short anywhere before its moves is rejected as not a game record."""
+    game = board.Board("white", "black", headless=True)
+    game.generate_pieces(game.player1, game.player2, random.Random(3))
+    for record in (
+        gamerecord.from_board(game, "someone", "unfinished"),
+        gamerecord.GameRecord("someone", "win", "4k3/8/8/8/8/8/8/R3K3 w - - 0 1", [0 | 56 << 6]),
+    ):
+        data = gamerecord.encode(record)
+        for size in range(len(data) - 2 * len(record.moves)):
+            with pytest.raises(ValueError, match="not a game record"):
+                gamerecord.decode(data[:size])
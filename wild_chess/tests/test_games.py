@@ -0,0 +1,93 @@
+"""Registry of hosted games."""
+
+
+import pytest
+
+from wild_chess.logic import bitboard
+from wild_chess.server import games
+from wild_chess.utils import board
+
+
+def test_lookups() -> None:
+    """Games are found by code and by player, and only their players find them by code."""
+    registry = games.GameRegistry()
+    game = registry.host("012345", "a")
+    assert registry.join("012345", "a") is None and registry.join("999999", "b") is None
+    assert registry.join("012345", "b") is game
+    assert registry.join("012345", "c") is None
+    assert registry.find("012345", "b") is game and registry.find("012345", "c") is None
+    assert registry.of_player("a") is game and registry.of_player("b") is game
+    assert registry.remove("012345") is game
+    assert len(registry) == 0 and registry.of_player("a") is None
+
+
+def test_idle_games_are_evicted() -> None:
+    """Sweeping evicts only the games idle for longer than the TTL."""
+    registry = games.GameRegistry(ttl=10.0)
+    idle = registry.host("111111", "a")
+    busy = registry.host("222222", "b")
+    idle["seen"] -= 20.0
+    busy["seen"] -= 20.0
+    registry.touch(busy)
+    assert registry.sweep() == ["111111"]
+    assert "111111" not in registry and registry.of_player("a") is None
+    assert registry.find("222222", "b") is busy
+
+
+def test_moves_are_checked() -> None:
+    """Only legal moves of the player to move, at the ply the server is at, are played."""
+    registry = games.GameRegistry()
+    game = registry.host("012345", "a")
+    registry.join("012345", "b")
+    position = game["board"].position
+    move = position.legal_moves()[0]
+    origin, target, _ = bitboard.decode_move(move)
+    piece = position.mailbox[origin]
+    for username, attempt, seq in (("b", move, 0), ("a", move, 1), ("a", bitboard.encode_move(origin, 36), 0)):
+        with pytest.raises(ValueError):
+            games.play_move(game, username, attempt, seq)
+    changes = games.play_move(game, "a", move, 0)
+    assert (origin, bitboard.EMPTY) in changes and (target, piece) in changes
+    assert len(game["board"].history) == 1
+
+
+def test_finished_games_are_recorded() -> None:
+    """A mate, or a resignation, ends the game with a record of it for each player."""
+    game = {
+        "code": "012345",
+        "board": board.Board.from_fen("6k1/5ppp/8/8/8/8/8/R3K3 w - - 0 1", headless=True),
+        "players": ["a", "b"],
+        "seen": 0.0,
+    }
+    with pytest.raises(ValueError, match="nobody has joined"):
+        games.resign({**game, "players": ["a"]}, "a")
+    games.play_move(game, "a", bitboard.encode_move(0, 56), 0)
+    assert game["result"] == {"a": "win", "b": "loss"}
+    with pytest.raises(ValueError, match="over"):
+        games.resign(game, "b")
+    (first, won), (second, lost) = games.records(game)
+    assert (first, won.opponent, won.status, won.moves) == ("a", "b", "win", [bitboard.encode_move(0, 56)])
+    assert (second, lost.opponent, lost.status, lost.start) == ("b", "a", "loss", won.start)
+
+    registry = games.GameRegistry()
+    game = registry.host("012345", "a")
+    registry.join("012345", "b")
+    assert games.resign(game, "a") == {"a": "loss", "b": "win"}
+    with pytest.raises(ValueError, match="over"):
+        games.play_move(game, "a", game["board"].position.legal_moves()[0], 0)
+
+
+def test_hosting_is_bounded() -> None:
+    """Hosting again replaces the player's previous game, and a full registry refuses new games."""
+    registry = games.GameRegistry(capacity=2)
+    first = registry.host("111111", "a")
+    registry.host("222222", "a")
+    assert "111111" not in registry and len(registry) == 1
+    registry.join("222222", "b")
+    registry.host("333333", "b")
+    assert "222222" in registry and registry.of_player("b")["code"] == "333333"
+    with pytest.raises(ValueError, match="too many"):
+        registry.host("444444", "c")
+    with pytest.raises(ValueError, match="already exists"):
+        registry.host("333333", "c")
+    assert first["code"] not in registry
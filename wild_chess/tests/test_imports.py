@@ -0,0 +1,21 @@
+"""Heavy dependencies stay out of the modules that do not need them at import time."""
+
+
+import pytest
+
+from wild_chess.utils import importtime
+
+
+@pytest.mark.parametrize(
+    ("module", "heavy"),
+    [
+        ("wild_chess.utils.board", ("pygame", "fastapi", "asyncpg", "asyncio", "wild_chess.gui", "wild_chess.logic.search")),
+        ("wild_chess.server.games", ("fastapi", "wild_chess.logic.search")),
+        ("wild_chess.setup.setup", ("asyncpg",)),
+    ],
+)
+def test_lazy_imports(module: str, heavy: tuple[str, ...]) -> None:
+    """Importing the module loads none of its heavy dependencies."""
+    report = importtime.measure(module)
+    assert not report.error
+    assert [name for name in heavy if report.loaded(name)] == []
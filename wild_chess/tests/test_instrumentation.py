@@ -0,0 +1,57 @@
+"""Opt-in instrumentation of the rules engine."""
+
+
+import json
+
+import pytest
+
+from wild_chess.logic import bitboard, fen, initial_position
+from wild_chess.utils import instrumentation, selfplay
+
+LEGAL_MOVES = "wild_chess.logic.bitboard.Position.legal_moves"
+
+
+def test_enable_and_disable() -> None:
+    """Calls are counted only while enabled, and disabling puts the original methods back."""
+    original = bitboard.Position.legal_moves
+    instrumentation.reset()
+    instrumentation.enable()
+    try:
+        assert instrumentation.enabled()
+        position = fen.parse(initial_position.wild_fen("RNBQKBNR", "PPPPPPPP"))
+        position.legal_moves()
+        position.legal_moves()
+    finally:
+        instrumentation.disable()
+    assert not instrumentation.enabled()
+    assert bitboard.Position.legal_moves is original
+    position.legal_moves()
+    numbers = instrumentation.snapshot()[LEGAL_MOVES]
+    assert numbers["count"] == 2 and sum(numbers["buckets"]) == 2
+
+
+def test_exports() -> None:
+    """Snapshots of separate games add up, and export as JSON and as a Prometheus histogram."""
+    numbers = instrumentation.merge(selfplay.play(seed, max_plies=10, instrument=True).profile or {} for seed in (1, 2))
+    assert numbers[LEGAL_MOVES]["count"] >= 20
+    assert json.loads(instrumentation.to_json(numbers))["functions"] == numbers
+    text = instrumentation.to_prometheus(numbers)
+    assert f'wild_chess_call_seconds_count{{function="{LEGAL_MOVES}"}} {numbers[LEGAL_MOVES]["count"]}' in text
+    assert f'wild_chess_call_seconds_bucket{{function="{LEGAL_MOVES}",le="+Inf"}}' in text
+
+
+def test_routes_need_the_admin_token(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The switches answer only requests carrying the admin token, and unknown actions are client errors."""
+    fastapi = pytest.importorskip("fastapi")
+    testclient = pytest.importorskip("fastapi.testclient")
+    from wild_chess.server.routes import instrumentation as routes  # pylint: disable=import-outside-toplevel
+
+    monkeypatch.setattr(routes, "ADMIN_TOKEN", "secret")
+    app = fastapi.FastAPI()
+    app.include_router(routes.route)
+    client = testclient.TestClient(app)
+    assert client.post("/instrumentation/reset").status_code == 403
+    assert client.get("/instrumentation", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.post("/instrumentation/explode", headers={"X-Admin-Token": "secret"}).status_code == 404
+    answer = client.post("/instrumentation/reset", headers={"X-Admin-Token": "secret"})
+    assert answer.json() == {"message": "ok", "enabled": instrumentation.enabled()}
@@ -0,0 +1,59 @@
+"""Leaderboard cache."""
+
+
+import asyncio
+
+import pytest
+
+from wild_chess.database import db
+from wild_chess.utils import data
+
+
+def test_cache() -> None:
+    """The leaderboard is loaded once until it expires or is invalidated, and its ETag follows its content."""
+    loads: list[int] = []
+    wins = [3]
+
+    async def load() -> list[data.LeaderboardEntry]:
+        loads.append(1)
+        await asyncio.sleep(0)
+        return [data.LeaderboardEntry("a", wins[0], 0, 0)]
+
+    async def scenario() -> None:
+        cache = db.LeaderboardCache(ttl=60.0)
+        results = await asyncio.gather(*(cache.get(load) for _ in range(5)))
+        assert len(loads) == 1 and len({etag for _, etag in results}) == 1
+        entries, etag = results[0]
+        assert entries[0].wins == 3
+        cache.invalidate()
+        assert await cache.get(load) == (entries, etag) and len(loads) == 2
+        wins[0] = 4
+        cache.invalidate()
+        entries, changed = await cache.get(load)
+        assert entries[0].wins == 4 and changed != etag and len(loads) == 3
+        expired = db.LeaderboardCache(ttl=0.0)
+        await expired.get(load)
+        await expired.get(load)
+        assert len(loads) == 5
+
+    asyncio.run(scenario())
+
+
+def test_route_revalidates() -> None:
+    """Clients must revalidate every time, and get a 304 while their copy is current."""
+    fastapi = pytest.importorskip("fastapi")
+    testclient = pytest.importorskip("fastapi.testclient")
+    from wild_chess.server.routes import leaderboard  # pylint: disable=import-outside-toplevel
+    from wild_chess.setup import setup  # pylint: disable=import-outside-toplevel
+
+    class PlayerDB:
+        async def leaderboard(self) -> tuple[list[data.LeaderboardEntry], str]:
+            return [data.LeaderboardEntry("a", 3, 0, 0)], '"v1"'
+
+    app = fastapi.FastAPI()
+    app.include_router(leaderboard.route)
+    app.dependency_overrides[setup.database] = PlayerDB
+    client = testclient.TestClient(app)
+    answer = client.get("/leaderboard")
+    assert answer.headers["Cache-Control"] == "no-cache" and answer.json()["leaderboard"][0]["wins"] == 3
+    assert client.get("/leaderboard", headers={"If-None-Match": answer.headers["ETag"]}).status_code == 304
@@ -0,0 +1,105 @@
+"""Multiplayer routes."""
+
+
+import pytest
+
+from wild_chess.logic import fen
+from wild_chess.utils import gamerecord
+
+fastapi = pytest.importorskip("fastapi")
+testclient = pytest.importorskip("fastapi.testclient")
+
+from wild_chess.server.routes import multiplayer  # noqa: E402  # pylint: disable=wrong-import-position
+from wild_chess.setup import setup  # noqa: E402  # pylint: disable=wrong-import-position
+
+
+class PlayerDB:
+    """Stands in for :class:`db.PlayerDB`, keeping what the routes write."""
+
+    def __init__(self) -> None:
+        self.writes: list[tuple[str, str, str]] = []
+
+    async def update_player_history(self, username: str, record: gamerecord.GameRecord) -> bool:
+        self.writes.append(("history", username, record.status))
+        return True
+
+    async def update_player_win(self, username: str) -> bool:
+        self.writes.append(("count", username, "win"))
+        return True
+
+    async def update_player_loss(self, username: str) -> bool:
+        self.writes.append(("count", username, "loss"))
+        return True
+
+    async def update_player_tie(self, username: str) -> bool:
+        self.writes.append(("count", username, "tie"))
+        return True
+
+
+def client_of(database: PlayerDB) -> testclient.TestClient:
+    """A client of the multiplayer routes, writing to *database*."""
+    app = fastapi.FastAPI()
+    app.include_router(multiplayer.route)
+    app.dependency_overrides[setup.database] = lambda: database
+    return testclient.TestClient(app)
+
+
+def test_moves_are_checked_and_pushed() -> None:
+    """Players get the position on connecting, then the delta of every legal move the other one plays."""
+    client = client_of(PlayerDB())
+    code = "".join(client.post("/host-game", params={"username": "a"}).json()["code"])
+    assert client.post(f"/join-game/{code}", params={"username": "b"}).json() == {"message": "ok"}
+    start = fen.parse(client.get(f"/game/{code}", params={"username": "a"}).json()["fen"])
+    name = gamerecord.move_name(start.legal_moves()[0])[:4]
+    move = {"from": name[:2], "to": name[2:], "seq": 0}
+
+    with client.websocket_connect(f"/game/{code}/ws?username=a") as first, client.websocket_connect(
+        f"/game/{code}/ws?username=b"
+    ) as second:
+        assert first.receive_json()["seq"] == 0 and second.receive_json()["type"] == "state"
+        first.send_text("e2e4")
+        assert first.receive_json() == {"type": "error", "message": "expected a move"}
+        first.send_bytes(b'{"from": "e2", "to": "e4", "seq": 0}')
+        assert first.receive_json() == {"type": "error", "message": "expected a move"}
+        first.send_json({"to": "e4"})
+        assert first.receive_json() == {"type": "error", "message": "expected a move"}
+        first.send_json({"from": "e1", "to": "e5", "seq": 0})
+        assert first.receive_json()["message"] == "illegal move"
+        assert client.post(f"/game/{code}", params={"username": "b"}, json=move).json()["message"] == "not your turn"
+        first.send_json(move)
+        answer = first.receive_json()
+        assert answer["message"] == "ok" and answer["move"][:4] == name
+        pushed = second.receive_json()
+        assert pushed["seq"] == 1 and [name[:2], None] in pushed["delta"]
+        reply = client.post(f"/game/{code}", params={"username": "b"}, json=move).json()
+        assert reply == {"type": "error", "message": "out of sync: the game is at ply 1, not 0", "seq": 1}
+    assert client.get(f"/game/{code}", params={"username": "a"}).json()["seq"] == 1
+    assert code not in multiplayer.channels
+
+
+def test_finished_games_are_recorded() -> None:
+    """A resignation is pushed to the other player and stored in the history of both."""
+    database = PlayerDB()
+    client = client_of(database)
+    code = "".join(client.post("/host-game", params={"username": "a"}).json()["code"])
+    assert client.post(f"/game/{code}/resign", params={"username": "a"}).json()["message"] == "nobody has joined the game"
+    client.post(f"/join-game/{code}", params={"username": "b"})
+
+    with client.websocket_connect(f"/game/{code}/ws?username=b") as channel:
+        channel.receive_json()
+        answer = client.post(f"/game/{code}/resign", params={"username": "a"}).json()
+        assert answer == {"message": "ok", "type": "result", "player": "a", "result": {"a": "loss", "b": "win"}}
+        assert channel.receive_json()["result"] == {"a": "loss", "b": "win"}
+    assert sorted(database.writes) == [
+        ("count", "a", "loss"),
+        ("count", "b", "win"),
+        ("history", "a", "loss"),
+        ("history", "b", "win"),
+    ]
+    assert client.post(f"/game/{code}/resign", params={"username": "b"}).json()["message"] == "the game is over"
+
+
+def test_hosting_stops_when_full(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Hosting gives up with an error once every code it draws is taken, instead of drawing forever."""
+    monkeypatch.setattr(multiplayer.registry, "capacity", len(multiplayer.registry))
+    assert client_of(PlayerDB()).post("/host-game", params={"username": "c"}).json() == {"message": "error"}
@@ -0,0 +1,21 @@
+"""Root-split parallel search."""
+
+
+from wild_chess.logic import bitboard, fen, parallel, search
+
+
+def test_merge_compares_equal_depths() -> None:
+    """A shallow score of one worker is weighed against the other's score at the same depth, not its deepest one."""
+    shallow = search.SearchResult(1, 500, 1, 10, 0.0)
+    deep = [search.SearchResult(2, 600, 1, 10, 0.0), search.SearchResult(2, 100, 2, 50, 0.0)]
+    searcher = parallel.ParallelSearcher(2)
+    best = searcher.merge([(shallow, [shallow], 1, 2), (deep[-1], deep, 3, 4), (shallow, [], 0, 0)], 0.0)
+    assert (best.move, best.score, best.depth, best.nodes) == (2, 600, 1, 70)
+    assert (searcher.hits, searcher.misses) == (4, 6)
+
+
+def test_first_search() -> None:
+    """The first search of a new pool, whose start is not charged to it, finds the mate of one worker's share."""
+    with parallel.ParallelSearcher(2, 2.0, 4) as searcher:
+        result = searcher.search(fen.parse("6k1/5ppp/8/8/8/8/8/R3K3 w - - 0 1"))
+    assert result.move == bitboard.encode_move(0, 56) and result.score == search.MATE - 1
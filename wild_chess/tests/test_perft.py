@@ -0,0 +1,48 @@
+"""Perft correctness suite for the move generator."""
+
+
+import pytest
+
+from wild_chess.logic import fen, perft
+
+
+@pytest.mark.parametrize(
+    ("text", "depth", "nodes"),
+    [
+        (text, depth, nodes)
+        for text, counts in perft.STANDARD_POSITIONS.values()
+        for depth, nodes in enumerate(counts, 1)
+        if nodes < 50_000
+    ],
+)
+def test_standard_positions(text: str, depth: int, nodes: int) -> None:
+    """Node counts of well known positions match the published ones."""
+    assert perft.perft(fen.parse(text), depth) == nodes
+
+
+@pytest.mark.parametrize("result", perft.load_baseline(), ids=lambda result: result.name)
+def test_baseline(result: perft.PerftResult) -> None:
+    """Node counts of the standard and seeded wild positions match the saved baseline."""
+    assert perft.perft(fen.parse(result.fen), result.depth) == result.nodes
+
+
+def test_wild_positions_are_seeded() -> None:
+    """The same seed always draws the same wild positions, so baselines stay comparable."""
+    assert perft.wild_positions(3, 2) == perft.wild_positions(3, 2)
+    assert perft.wild_positions(3, 2) != perft.wild_positions(4, 2)
+
+
+def test_perft_restores_position() -> None:
+    """Walking the tree with make/unmake leaves the position exactly as it was."""
+    position = fen.parse(next(iter(perft.wild_positions(5, 1).values())))
+    before = (list(position.pieces), list(position.mailbox), list(position.attacks), position.side, position.ep, position.key)
+    perft.perft(position, 3)
+    assert position.key == position.compute_key()
+    assert (
+        list(position.pieces),
+        list(position.mailbox),
+        list(position.attacks),
+        position.side,
+        position.ep,
+        position.key,
+    ) == before
@@ -0,0 +1,35 @@
+"""Piece objects over the bitboard position."""
+
+
+import random
+
+import pytest
+
+from wild_chess.logic import bitboard, pieces
+from wild_chess.utils import board
+
+FEN = "4k3/8/8/8/3N4/8/8/4K3 w - - 0 1"
+
+
+def _wild(rng: random.Random) -> pieces.WildPiece:
+    """A wild piece on d4, drawn from *rng*."""
+    grid = board.Board.from_fen(FEN, headless=True).board
+    return pieces.WildPiece(grid[3][3], grid, rng)
+
+
+@pytest.mark.parametrize("kind", [bitboard.QUEEN, bitboard.ROOK, bitboard.BISHOP, bitboard.KNIGHT, bitboard.KING])
+def test_moves_as(kind: int) -> None:
+    """A wild piece moving as a kind gets exactly the moves a piece of that kind has on its square."""
+    piece = _wild(random.Random(0))
+    regular = pieces.PIECE_CLASSES[kind](piece.position, piece.player, piece.color)
+    assert sorted(piece.moves_as(kind)) == sorted(regular.possible_moves(piece.board))
+    assert piece.moves_as(kind) == getattr(piece, f"{regular.piece_type.lower()}_moves")
+
+
+def test_random_moves_are_seeded() -> None:
+    """The same seed draws the same kinds, so a seeded game replays exactly."""
+    first, second = _wild(random.Random(7)), _wild(random.Random(7))
+    draws = [first.random_moves for _ in range(20)]
+    assert draws == [second.random_moves for _ in range(20)]
+    kinds = {tuple(first.moves_as(kind)) for kind in pieces.WildPiece.KINDS}
+    assert all(tuple(moves) in kinds for moves in draws) and len({tuple(moves) for moves in draws}) > 1
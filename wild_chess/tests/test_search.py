@@ -0,0 +1,24 @@
+"""Alpha-beta search."""
+
+
+import random
+import time
+
+from wild_chess.logic import bitboard, fen, initial_position, search, transposition
+
+
+def test_mate_in_one() -> None:
+    """A back rank mate is found and scored as mate in one."""
+    result = search.best_move(fen.parse("6k1/5ppp/8/8/8/8/8/R3K3 w - - 0 1"), 10.0, 4)
+    assert result.move == bitboard.encode_move(0, 56)
+    assert result.score == search.MATE - 1
+
+
+def test_time_limit() -> None:
+    """The search of a wild start returns a legal move within its budget, give or take a few clock checks."""
+    position = fen.parse(initial_position.wild_fen(*initial_position.wild_ranks(random.Random(11))))
+    searcher = search.Searcher(0.05, table=transposition.TranspositionTable(1))
+    start = time.perf_counter()
+    result = searcher.search(position)
+    assert time.perf_counter() - start <= 0.05 + 0.03
+    assert result.move in position.legal_moves()
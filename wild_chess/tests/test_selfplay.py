@@ -0,0 +1,38 @@
+"""Headless boards and self-play."""
+
+
+import pathlib
+import sys
+
+from wild_chess.utils import board, selfplay
+
+
+def test_headless_board() -> None:
+    """Boards are set up and played without loading the GUI."""
+    game = board.Board("white", "black", headless=True)
+    game.generate_pieces(game.player1, game.player2)
+    game.make_move(game.legal_moves(game.player1)[0])
+    assert "wild_chess.gui.gui" not in sys.modules
+
+
+def test_games_are_seeded(tmp_path: pathlib.Path) -> None:
+    """The same seed plays the same game, and the results file reads back what was written."""
+    first = selfplay.play(3, max_plies=80)
+    second = selfplay.play(3, max_plies=80)
+    assert (first.plies, first.result, first.reason) == (second.plies, second.result, second.reason)
+    path = tmp_path / "games.bin"
+    selfplay.write([first], path)
+    (read,) = selfplay.read(path)
+    assert (read.seed, read.plies, read.result, read.reason) == (first.seed, first.plies, first.result, first.reason)
+
+
+def test_parallel_workers_are_kept() -> None:
+    """Parallel searches of a board reuse its worker processes until the board is closed."""
+    with board.Board("white", "black", headless=True) as game:
+        game.generate_pieces(game.player1, game.player2)
+        game.make_move(game.best_move(0.1, workers=2).move)
+        pool = game._searcher.pool  # pylint: disable=protected-access
+        assert pool is not None
+        game.make_move(game.best_move(0.1, workers=2).move)
+        assert game._searcher.pool is pool  # pylint: disable=protected-access
+    assert game._searcher is None  # pylint: disable=protected-access
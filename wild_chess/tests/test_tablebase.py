@@ -0,0 +1,51 @@
+"""Tablebase signatures, files and probes."""
+
+
+import pathlib
+
+import pytest
+
+from wild_chess.logic import bitboard, fen, search, tablebase
+
+
+@pytest.mark.parametrize("text", ["KvK", "KQvK", "KRvKN", "KPPvKQ"])
+def test_signatures(text: str) -> None:
+    """Signatures turn into piece codes and back."""
+    assert tablebase.signature(tablebase.codes_of(text)) == text
+
+
+def test_probe(tmp_path: pathlib.Path) -> None:
+    """Bare kings are always drawn, and material without a table is not probed."""
+    codes = tablebase.codes_of("KvK")
+    values = tablebase.generate(codes)[codes]
+    assert not any(values)
+    tablebase.write(codes, values, tmp_path)
+    endings = tablebase.Tablebases(tmp_path)
+    position = fen.parse("8/8/3k4/8/8/3K4/8/8 w - - 0 1")
+    assert endings.probe(position) == 0
+    move, score = endings.best_move(position)
+    assert move in position.legal_moves() and score == 0
+    assert endings.probe(fen.parse("8/8/3k4/8/8/3K4/8/7Q w - - 0 1")) is None
+    endings.close()
+
+
+@pytest.mark.slow
+def test_won_ending(tmp_path: pathlib.Path) -> None:
+    """KQvK gives the known longest mate, and mates in one, mated and stalemated positions score as such."""
+    codes = tablebase.codes_of("KQvK")
+    tables = tablebase.generate(codes)
+    # Ten moves to mate, with the losing side to move: 20 plies, stored plus one.
+    assert max(tables[codes]) == 21
+    for material, values in tables.items():
+        tablebase.write(material, values, tmp_path)
+    endings = tablebase.Tablebases(tmp_path)
+    position = fen.parse("k7/7Q/1K6/8/8/8/8/8 w - - 0 1")
+    assert endings.probe(position) == search.MATE - 1
+    move, score = endings.best_move(position)
+    assert score == search.MATE - 1
+    position.make_move(move)
+    assert not position.legal_moves() and position.in_check(bitboard.BLACK)
+    assert endings.probe(fen.parse("k7/1Q6/1K6/8/8/8/8/8 b - - 0 1")) == -search.MATE
+    assert endings.probe(fen.parse("k7/2Q5/1K6/8/8/8/8/8 b - - 0 1")) == 0
+    assert 0 < endings.probe(fen.parse("8/8/8/3k4/8/8/8/K5Q1 w - - 0 1")) < search.MATE - 1
+    endings.close()
@@ -0,0 +1,52 @@
+"""Transposition table storage, replacement and search integration."""
+
+
+from wild_chess.logic import fen, parallel, search, transposition
+
+
+def test_store_and_probe() -> None:
+    """Entries come back as stored, including negative scores, and the counters follow along."""
+    table = transposition.TranspositionTable(1)
+    key = 0xDEAD_BEEF_1234_5678
+    assert table.probe(key) is None
+    table.store(key, 1234, 5, transposition.LOWER, -99_950)
+    assert table.probe(key) == transposition.Entry(1234, 5, transposition.LOWER, -99_950)
+    assert (table.hits, table.misses, table.stores) == (1, 1, 1)
+
+
+def test_replacement() -> None:
+    """A shallower result of another position goes to the always-replace slot and keeps the deep one."""
+    table = transposition.TranspositionTable(1)
+    deep, shallow, newer = 1, 1 + len(table), 1 + 2 * len(table)
+    table.store(deep, 1, 8, transposition.EXACT, 10)
+    table.store(shallow, 2, 2, transposition.EXACT, 20)
+    table.store(newer, 3, 1, transposition.EXACT, 30)
+    assert table.probe(deep) is not None
+    assert table.probe(shallow) is None
+    assert table.probe(newer) is not None
+
+
+def test_search_agrees_without_table() -> None:
+    """A fixed depth search scores the same with a tiny and a roomy table, but visits fewer nodes with the latter."""
+    position = fen.parse("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1")
+    tiny = search.Searcher(60, 3, transposition.TranspositionTable(0)).search(position)
+    roomy = search.Searcher(60, 3, transposition.TranspositionTable(1)).search(position)
+    assert roomy.score == tiny.score
+    assert roomy.nodes <= tiny.nodes
+
+
+def test_table_is_kept_between_searches() -> None:
+    """A second fixed depth search of the same position finds the first one's entries, serially and in a worker."""
+    position = fen.parse("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1")
+    table = transposition.TranspositionTable(1)
+    first = search.Searcher(60, 3, table).search(position)
+    hits = table.hits
+    second = search.Searcher(60, 3, table).search(position)
+    assert table.hits > hits and second.nodes < first.nodes
+
+    # One worker, since the pool does not promise to hand a chunk to the worker that searched it last time.
+    with parallel.ParallelSearcher(1, 60, 2) as searcher:
+        first = searcher.search(position)
+        hits = searcher.hits
+        second = searcher.search(position)
+        assert searcher.hits > hits and second.nodes < first.nodes
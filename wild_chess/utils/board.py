@@ -1,69 +1,334 @@
 """A piece class, the parent of all pieces"""
 
 
+from __future__ import annotations
+
+import os
 import random
 import typing
+import weakref
 
-from wild_chess.gui import gui
-from wild_chess.logic import pieces
+from wild_chess.logic import bitboard, fen, initial_position, pieces
 from wild_chess.utils import data
 
+if typing.TYPE_CHECKING:
+    from wild_chess.gui import gui
+    from wild_chess.logic import parallel, search, transposition
+
+
+class Row:
+    """One row of a :class:`Grid`."""
+
+    __slots__ = ("grid", "row")
+
+    def __init__(self, grid: Grid, row: int) -> None:
+        self.grid = grid
+        self.row = row
+
+    def __len__(self) -> int:
+        return 8
+
+    def __getitem__(self, column: int) -> typing.Optional[pieces.ChessPiece]:
+        return self.grid.piece(bitboard.square(self.row, Grid.index(column)))
+
+    def __setitem__(self, column: int, piece: typing.Optional[pieces.ChessPiece]) -> None:
+        self.grid.place(bitboard.square(self.row, Grid.index(column)), piece)
+
+    def __iter__(self) -> typing.Iterator[typing.Optional[pieces.ChessPiece]]:
+        return (self.grid.piece(bitboard.square(self.row, column)) for column in range(8))
+
+
+class Grid:
+    """
+    An 8x8 ``board[row][column]`` view of a bitboard position.
+
+    The bitboards are the source of truth; piece objects are only built for the squares that get looked at, and
+    the same object is handed out for a square until the piece on it changes.
+    """
+
+    __slots__ = ("position", "players", "history", "cache")
+
+    position: bitboard.Position
+    players: tuple[str, str]
+    history: list[tuple[int, bitboard.Undo]]
+    cache: list[typing.Optional[pieces.ChessPiece]]
+
+    def __init__(
+        self, position: bitboard.Position, players: tuple[str, str], history: list[tuple[int, bitboard.Undo]]
+    ) -> None:
+        self.position = position
+        self.players = players
+        self.history = history
+        self.cache = [None] * 64
+
+    @staticmethod
+    def index(index: int) -> int:
+        """
+        Validate a row or column index, wrapping negative ones like a list would.
+
+        :param index:
+        :type index: int
+        :return:
+        :rtype: int
+        """
+        if not -8 <= index < 8:
+            raise IndexError("board index out of range")
+        return index % 8
+
+    def __len__(self) -> int:
+        return 8
+
+    def __getitem__(self, row: int) -> Row:
+        return Row(self, self.index(row))
+
+    def __iter__(self) -> typing.Iterator[Row]:
+        return (Row(self, row) for row in range(8))
+
+    def piece(self, sq: int) -> typing.Optional[pieces.ChessPiece]:
+        """
+        Get the piece object standing on *sq*.
+
+        :param sq:
+        :type sq: int
+        :return:
+        :rtype: typing.Optional[pieces.ChessPiece]
+        """
+        code = self.position.mailbox[sq]
+        if code == bitboard.EMPTY:
+            return None
+        piece = self.cache[sq]
+        if piece is None or piece.code != code or piece.square != sq:
+            color = code // 6
+            piece = pieces.PIECE_CLASSES[code % 6](bitboard.coords(sq), self.players[color], bitboard.COLOR_NAMES[color])
+            self.cache[sq] = piece
+        return piece
+
+    def place(self, sq: int, piece: typing.Optional[pieces.ChessPiece]) -> None:
+        """
+        Put *piece* on *sq*, replacing whatever was there.
+
+        :param sq:
+        :type sq: int
+        :param piece:
+        :type piece: typing.Optional[pieces.ChessPiece]
+        """
+        self.position.remove(sq)
+        self.cache[sq] = piece
+        if piece is not None:
+            piece.position = bitboard.coords(sq)
+            self.position.put(sq, piece.code)
+
+    def move_piece(self, piece: pieces.ChessPiece, new_position: tuple[int, int]) -> None:
+        """
+        Play *piece*'s move to *new_position* on the position.
+
+        :param piece:
+        :type piece: pieces.ChessPiece
+        :param new_position:
+        :type new_position: tuple[int, int]
+        """
+        origin, target = piece.square, bitboard.square(*new_position)
+        move = bitboard.encode_move(origin, target)
+        self.history.append((move, self.position.make_move(move)))
+        self.cache[origin] = None
+        self.cache[target] = piece
+        piece.position = new_position
+
 
 # Create a class board and subclass it to have two teams
 class Board:
-    """A chess board."""
+    """
+    A chess board.
+
+    The GUI (and with it pygame) is only loaded when :attr:`game` is first used, and never for headless boards, so
+    boards can be played on servers and in tests.
+    """
 
-    board: list[list[typing.Optional[pieces.ChessPiece]]]
+    position: bitboard.Position
+    board: Grid
+    history: list[tuple[int, bitboard.Undo]]
     player1: data.PlayerAttributes
     player2: data.PlayerAttributes
     current_player: data.PlayerAttributes
-    turns: dict[str, list[list[typing.Optional[pieces.ChessPiece]]]]
-
-    def __init__(self, player1: str, player2: str) -> None:
-        self.board = [
-            [None, None, None, None, None, None, None, None],
-            [None, None, None, None, None, None, None, None],
-            [None, None, None, None, None, None, None, None],
-            [None, None, None, None, None, None, None, None],
-            [None, None, None, None, None, None, None, None],
-            [None, None, None, None, None, None, None, None],
-            [None, None, None, None, None, None, None, None],
-            [None, None, None, None, None, None, None, None],
-        ]
+    turns: dict[typing.Any, typing.Any]
+    headless: bool
+
+    def __init__(
+        self, player1: str, player2: str, position: typing.Optional[bitboard.Position] = None, headless: bool = False
+    ) -> None:
+        self.position = bitboard.Position() if position is None else position
+        self.history = []
+        self.board = Grid(self.position, (player1, player2), self.history)
         self.player1 = data.PlayerAttributes(player1, "white")
         self.player2 = data.PlayerAttributes(player2, "black")
-        self.current_player = self.player1
-        self.game = gui.Game()
+        self.current_player = self.player2 if self.position.side == bitboard.BLACK else self.player1
+        self._game: typing.Optional[gui.Game] = None
+        self._table: typing.Optional[transposition.TranspositionTable] = None
+        self._searcher: typing.Optional[parallel.ParallelSearcher] = None
         self.turns = {}
         self.total_turns: int = 0
+        self.headless = headless
+
+    @property
+    def game(self) -> gui.Game:
+        """The GUI of this board, created the first time it is needed."""
+        if self.headless:
+            raise RuntimeError("a headless board has no GUI")
+        if self._game is None:
+            from wild_chess.gui import gui  # pylint: disable=import-outside-toplevel
+
+            self._game = gui.Game()
+        return self._game
+
+    @classmethod
+    def from_fen(cls, text: str, player1: str = "white", player2: str = "black", headless: bool = False) -> Board:
+        """
+        Build a board from a FEN string without creating any GUI objects.
 
-    def generate_pieces(self, player1: data.PlayerAttributes, player2: data.PlayerAttributes) -> None:
+        :param text:
+        :type text: str
+        :param player1:
+        :type player1: str
+        :param player2:
+        :type player2: str
+        :param headless:
+        :type headless: bool
+        :return:
+        :rtype: Board
+        """
+        return cls(player1, player2, fen.parse(text), headless)
+
+    def fen(self) -> str:
+        """
+        Write the current position as a FEN string.
+
+        :return:
+        :rtype: str
+        """
+        return fen.serialize(self.position)
+
+    def generate_pieces(
+        self, player1: data.PlayerAttributes, player2: data.PlayerAttributes, rng: typing.Optional[random.Random] = None
+    ) -> None:
         """
         Generate the pieces for the board.
 
         :param player1:
         :param player2:
+        :param rng: Random number generator to draw the pieces from, the global one if not given
         :return:
         """
-        all_special_pieces: list[type[pieces.ChessPiece]] = [
-            pieces.Rook,
-            pieces.Knight,
-            pieces.Bishop,
-            pieces.Queen,
-            pieces.Pawn,
-        ]
+        all_special_pieces: dict[str, type[pieces.ChessPiece]] = {
+            "R": pieces.Rook,
+            "N": pieces.Knight,
+            "B": pieces.Bishop,
+            "Q": pieces.Queen,
+            "P": pieces.Pawn,
+            "K": pieces.King,
+        }
+        back, pawns = initial_position.wild_ranks(rng)
 
         for i in range(8):
-            random_piece = random.choice(all_special_pieces)
-            if i == 4:
-                self.board[0][4] = pieces.King((0, 4), player1.name, player1.color)
-                self.board[7][4] = pieces.King((7, 4), player2.name, player2.color)
-            else:
-                random_piece2 = random.choice(all_special_pieces)
-                self.board[0][i] = random_piece2((0, i), player1.name, player1.color)
-                self.board[7][i] = random_piece2((7, i), player2.name, player2.color)
-            self.board[1][i] = random_piece((1, i), player1.name, player1.color)
-            self.board[6][i] = random_piece((6, i), player2.name, player2.color)
+            self.board[0][i] = all_special_pieces[back[i]]((0, i), player1.name, player1.color)
+            self.board[7][i] = all_special_pieces[back[i]]((7, i), player2.name, player2.color)
+            self.board[1][i] = all_special_pieces[pawns[i]]((1, i), player1.name, player1.color)
+            self.board[6][i] = all_special_pieces[pawns[i]]((6, i), player2.name, player2.color)
+
+    @property
+    def key(self) -> int:
+        """
+        The 64-bit Zobrist key of the current position.
+
+        Equal positions (same pieces, side to move and en passant file) always share a key, so it can be used for
+        caching, repetition detection and deduplication.
+
+        :return:
+        :rtype: int
+        """
+        return self.position.key
+
+    def make_move(self, move: int) -> None:
+        """
+        Play a packed move (see :func:`bitboard.encode_move`) and push its undo record.
+
+        :param move:
+        :type move: int
+        """
+        self.history.append((move, self.position.make_move(move)))
+
+    def unmake_move(self) -> int:
+        """
+        Take back the last move played and return it.
+
+        :return:
+        :rtype: int
+        """
+        move, undo = self.history.pop()
+        self.position.unmake_move(move, undo)
+        return move
+
+    def legal_moves(self, player: data.PlayerAttributes) -> list[int]:
+        """
+        Get every legal move for the player as packed ints (see :func:`bitboard.encode_move`).
+
+        :param player:
+        :type player: data.PlayerAttributes
+        :return:
+        :rtype: list[int]
+        """
+        return self.position.legal_moves(bitboard.COLOR_NAMES.index(player.color))
+
+    def best_move(self, time_limit: float = 1.0, workers: int = 1) -> search.SearchResult:
+        """
+        Search for the best move of the side to move within *time_limit* seconds.
+
+        Start positions found in the evaluation book, and endings covered by the tablebases, are answered from them
+        without searching.
+
+        :param time_limit:
+        :type time_limit: float
+        :param workers: Split the search across this many processes (0 for one per core); the processes are kept
+            for the next moves until :meth:`close`
+        :type workers: int
+        :return:
+        :rtype: search.SearchResult
+        """
+        # The engine, and the process pool behind parallel searches, load with the first search rather than with the
+        # board, which the GUI and the server build without ever searching.
+        # pylint: disable-next=import-outside-toplevel
+        from wild_chess.logic import book, parallel, search, tablebase, transposition
+
+        opening = book.default()
+        entry = None if opening is None else opening.lookup(self.position)
+        if entry is not None and entry.move in self.position.legal_moves():
+            return search.SearchResult(entry.move, entry.score, entry.depth, 0, 0.0)
+        endings = tablebase.default()
+        found = None if endings is None else endings.best_move(self.position)
+        if found is not None:
+            return search.SearchResult(found[0], found[1], 0, 0, 0.0)
+        if workers == 1:
+            if self._table is None:
+                self._table = transposition.TranspositionTable()
+            return search.best_move(self.position, time_limit, table=self._table)
+        if self._searcher is None or self._searcher.workers != (workers or os.cpu_count() or 1):
+            self.close()
+            self._searcher = parallel.ParallelSearcher(workers or None, time_limit)
+            # Shut the workers down with the board if it is dropped without being closed.
+            weakref.finalize(self, self._searcher.close)
+        self._searcher.time_limit = time_limit
+        return self._searcher.search(self.position)
+
+    def close(self) -> None:
+        """Shut down the worker processes of parallel searches, once the game is over."""
+        if self._searcher is not None:
+            self._searcher.close()
+            self._searcher = None
+
+    def __enter__(self) -> Board:
+        return self
+
+    def __exit__(self, *_: typing.Any) -> None:
+        self.close()
 
     def check_check(self, player: data.PlayerAttributes) -> bool:
         """
@@ -73,36 +338,28 @@ def check_check(self, player: data.PlayerAttributes) -> bool:
         :param board:
         :return:
         """
-        board = self.board
-        enemy_pieces = [j for i in self.board for j in i if j and j.color != player.color]
-        for piece in enemy_pieces:
-            for move in piece.possible_moves(board):
-                try:
-                    if board[move[0]][move[1]].piece_type == "King":
-                        return True
-                except:
-                    pass
-        return False
+        return self.position.in_check(bitboard.COLOR_NAMES.index(player.color))
 
     def check_checkmate(self, player: data.PlayerAttributes) -> bool:
         """
         Check if the player is in checkmate.
 
+        A player without a king has lost as well.
+
         :param player:
         :return:
         """
-        player_pieces = [j for i in self.board for j in i if j and j.color == player.color]
-        for piece in player_pieces:
-            if piece.piece_type == "King":
-                return False
-        return True
+        color = bitboard.COLOR_NAMES.index(player.color)
+        if self.position.king_square(color) < 0:
+            return True
+        return self.position.in_check(color) and not self.position.legal_moves(color)
 
     def check_en_passant(
         self,
         player: data.PlayerAttributes,
         old: typing.Tuple[int, int],
         new: typing.Tuple[int, int],
-        board: typing.List[typing.List[typing.Optional[pieces.ChessPiece]]] = None,
+        board: typing.Optional[typing.List[typing.List[typing.Optional[pieces.ChessPiece]]]] = None,
     ) -> tuple[int, int] | None:
         """
         Check if the player is in el passant.
@@ -113,25 +370,12 @@ def check_en_passant(
         :param board:
         :return:
         """
-        if not board:
-            board = self.board
-        if not isinstance(self.board[old[0]][old[1]], pieces.Pawn):
+        position = self.position if board is None else pieces.ChessPiece.bitboard_of(board)
+        origin, target = bitboard.square(*old), bitboard.square(*new)
+        color = bitboard.COLOR_NAMES.index(player.color)
+        if position.piece_at(origin) != bitboard.piece_code(bitboard.PAWN, color) or target != position.ep:
             return None
-        if (x := board[old[0]][old[1] - 1]) is not None and isinstance(x, pieces.Pawn) and x.color != player.color:
-            if player.color == "white":
-                if (old[0] + 1, old[1] - 1) == new:
-                    return old[0], old[1] - 1
-            else:
-                if (old[0] - 1, old[1] - 1) == new:
-                    return old[0], old[1] - 1
-        if (x := board[old[0]][old[1] + 1]) is not None and isinstance(x, pieces.Pawn) and x.color != player.color:
-            if player.color == "white":
-                if (old[0] + 1, old[1] + 1) == new:
-                    return old[0], old[1] + 1
-            else:
-                if (old[0] - 1, old[1] + 1) == new:
-                    return old[0], old[1] + 1
-        return None
+        return bitboard.coords(target - 8 if color == bitboard.WHITE else target + 8)
 
     @staticmethod
     def start(player1: str, player2: str) -> None:
@@ -22,6 +22,16 @@ class PlayerRecord:
     history: list[str | None]
 
 
+@dataclasses.dataclass(frozen=True)
+class LeaderboardEntry:
+    """LeaderboardEntry is a dataclass that represents a player's row on the leaderboard, without private fields."""
+
+    player_name: str
+    wins: int
+    losses: int
+    ties: int
+
+
 @dataclasses.dataclass
 class PlayerAttributes:
     """PlayerAttributes is a dataclass that represents a player's attributes."""
@@ -0,0 +1,250 @@
+"""
+Compact binary game records, as stored in a player's history and sent by the server.
+
+A record is a small header, the opponent's name, the start position (its book key if it is a ``Board.generate_pieces``
+start, its FEN otherwise) and every move as 16 bits, base64-encoded wherever text is needed.
+"""
+
+
+from __future__ import annotations
+
+import argparse
+import array
+import base64
+import binascii
+import dataclasses
+import struct
+import sys
+import typing
+
+from wild_chess.logic import bitboard, book, fen, initial_position
+
+if typing.TYPE_CHECKING:
+    from wild_chess.utils import board
+
+__all__: tuple[str, ...] = (
+    "STATUSES",
+    "GameRecord",
+    "from_board",
+    "encode",
+    "decode",
+    "to_text",
+    "from_text",
+    "replay",
+    "square_name",
+    "move_name",
+    "parse_move",
+    "main",
+)
+
+MAGIC: typing.Final[bytes] = b"WG"
+# Header: magic, flags, status index, length of the opponent's name.
+HEADER: typing.Final[struct.Struct] = struct.Struct("<2sBBB")
+# Flags: the start is stored as its 8-byte book key rather than as a length-prefixed FEN.
+WILD_START: typing.Final[int] = 1
+STATUSES: typing.Final[tuple[str, ...]] = ("win", "loss", "tie", "unfinished")
+
+
+@dataclasses.dataclass
+class GameRecord:
+    """One game of a player's history, seen from that player's side."""
+
+    opponent: str
+    status: str
+    start: str
+    moves: list[int]
+
+
+def from_board(game: board.Board, opponent: str, status: str) -> GameRecord:
+    """
+    Record the game played on *game* so far.
+
+    :param game:
+    :type game: board.Board
+    :param opponent:
+    :type opponent: str
+    :param status: One of :data:`STATUSES`
+    :type status: str
+    :return:
+    :rtype: GameRecord
+    """
+    position = game.position.copy()
+    for move, undo in reversed(game.history):
+        position.unmake_move(move, undo)
+    return GameRecord(opponent, status, fen.serialize(position), [move for move, _ in game.history])
+
+
+def encode(record: GameRecord) -> bytes:
+    """
+    Pack a record.
+
+    :param record:
+    :type record: GameRecord
+    :return:
+    :rtype: bytes
+    """
+    if record.status not in STATUSES:
+        raise ValueError(f"unknown status {record.status!r}, expected one of {STATUSES}")
+    name = record.opponent.encode("utf-8")
+    if len(name) > 0xFF:
+        raise ValueError(f"opponent name is too long: {record.opponent!r}")
+    key = book.key_of(fen.parse(record.start))
+    if key is not None:
+        start = struct.pack("<Q", key)
+    else:
+        text = record.start.encode("ascii")
+        start = struct.pack("<B", len(text)) + text
+    moves = array.array("H", record.moves)
+    if sys.byteorder == "big":
+        moves.byteswap()
+    flags = WILD_START if key is not None else 0
+    return HEADER.pack(MAGIC, flags, STATUSES.index(record.status), len(name)) + name + start + moves.tobytes()
+
+
+def decode(data: bytes) -> GameRecord:
+    """
+    Unpack a record made by :func:`encode`.
+
+    :param data:
+    :type data: bytes
+    :return:
+    :rtype: GameRecord
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("not a game record: too short")
+    magic, flags, status, length = HEADER.unpack_from(data)
+    if magic != MAGIC or status >= len(STATUSES):
+        raise ValueError("not a game record")
+    offset = HEADER.size + length
+    if len(data) < offset:
+        raise ValueError("not a game record: the opponent's name is cut short")
+    opponent = data[HEADER.size : offset].decode("utf-8")
+    if flags & WILD_START:
+        if len(data) < offset + 8:
+            raise ValueError("not a game record: the start key is cut short")
+        (key,) = struct.unpack_from("<Q", data, offset)
+        start = initial_position.wild_fen(*book.ranks_of(key))
+        offset += 8
+    else:
+        if len(data) < offset + 1 or len(data) < offset + 1 + data[offset]:
+            raise ValueError("not a game record: the start position is cut short")
+        length = data[offset]
+        start = data[offset + 1 : offset + 1 + length].decode("ascii")
+        offset += 1 + length
+    if (len(data) - offset) % 2:
+        raise ValueError("not a game record: the move stream is cut short")
+    moves = array.array("H", data[offset:])
+    if sys.byteorder == "big":
+        moves.byteswap()
+    return GameRecord(opponent, STATUSES[status], start, moves.tolist())
+
+
+def to_text(record: GameRecord) -> str:
+    """
+    Pack a record as base64, for text columns and JSON.
+
+    :param record:
+    :type record: GameRecord
+    :return:
+    :rtype: str
+    """
+    return base64.b64encode(encode(record)).decode("ascii")
+
+
+def from_text(text: str) -> GameRecord:
+    """
+    Unpack a record made by :func:`to_text`.
+
+    :param text:
+    :type text: str
+    :return:
+    :rtype: GameRecord
+    """
+    try:
+        data = base64.b64decode(text, validate=True)
+    except binascii.Error:
+        raise ValueError("not a game record: not base64") from None
+    return decode(data)
+
+
+def replay(record: GameRecord) -> typing.Iterator[bitboard.Position]:
+    """
+    Play a record through, checking every move.
+
+    :param record:
+    :type record: GameRecord
+    :return: The start position, then the position after every move (the same object, updated in place)
+    :rtype: typing.Iterator[bitboard.Position]
+    """
+    position = fen.parse(record.start)
+    yield position
+    for ply, move in enumerate(record.moves):
+        if move not in position.legal_moves():
+            raise ValueError(f"illegal move {move_name(move)} at ply {ply + 1}")
+        position.make_move(move)
+        yield position
+
+
+def square_name(sq: int) -> str:
+    """
+    Name a square, such as ``e4``.
+
+    :param sq:
+    :type sq: int
+    :return:
+    :rtype: str
+    """
+    return fen.FILES[sq % 8] + str(sq // 8 + 1)
+
+
+def move_name(move: int) -> str:
+    """
+    Name a packed move in coordinate notation, such as ``e2e4`` or ``b7b8n``.
+
+    :param move:
+    :type move: int
+    :return:
+    :rtype: str
+    """
+    origin, target, promotion = bitboard.decode_move(move)
+    return square_name(origin) + square_name(target) + ("" if not promotion else fen.LETTERS[promotion].lower())
+
+
+def parse_move(text: str) -> int:
+    """
+    Undo :func:`move_name`.
+
+    :param text:
+    :type text: str
+    :return:
+    :rtype: int
+    """
+    squares = (text[:2], text[2:4])
+    if len(text) not in (4, 5) or any(
+        len(name) != 2 or name[0] not in fen.FILES or name[1] not in "12345678" for name in squares
+    ):
+        raise ValueError(f"invalid move {text!r}")
+    origin, target = (fen.FILES.index(name[0]) + 8 * (int(name[1]) - 1) for name in squares)
+    promotion = text[4:].upper()
+    if promotion and promotion not in "NBRQ":
+        raise ValueError(f"invalid promotion in {text!r}")
+    return bitboard.encode_move(origin, target, fen.LETTERS.index(promotion) if promotion else 0)
+
+
+def main() -> None:
+    """Driver code."""
+    parser = argparse.ArgumentParser(description="Replay base64 game records, such as those of a player's history.")
+    parser.add_argument("records", nargs="*", help="records to replay, read one per line from stdin if none are given")
+    args = parser.parse_args()
+
+    for text in args.records or (line.strip() for line in sys.stdin if line.strip()):
+        record = from_text(text)
+        print(f"{record.status} against {record.opponent}, {len(record.moves)} plies")
+        positions = replay(record)
+        print(f"    {fen.serialize(next(positions))}")
+        for move, position in zip(record.moves, positions):
+            print(f"    {move_name(move):<6} {fen.serialize(position)}")
+
+
+if __name__ == "__main__":
+    main()
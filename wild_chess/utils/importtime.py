@@ -0,0 +1,113 @@
+"""Import-time report of the entry points, built on ``python -X importtime``."""
+
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import subprocess
+import sys
+import typing
+
+__all__: tuple[str, ...] = ("FORBIDDEN", "ImportReport", "measure", "main")
+
+# Entry point modules and the heavy dependencies each of them must not load at import time. The search engine is
+# one of them (wild_chess.logic.parallel imports it too): it loads with the first search.
+FORBIDDEN: typing.Final[dict[str, tuple[str, ...]]] = {
+    "wild_chess.__main__": ("pygame", "fastapi", "asyncpg", "uvicorn", "wild_chess.logic.search", "multiprocessing"),
+    "wild_chess.server.main": ("pygame", "asyncpg", "wild_chess.gui", "wild_chess.logic.search"),
+    "wild_chess.gui.gui": ("fastapi", "asyncpg", "uvicorn", "wild_chess.server.routes", "wild_chess.logic.search"),
+}
+
+
+@dataclasses.dataclass
+class ImportReport:
+    """What importing one module cost, in microseconds, and what it loaded."""
+
+    module: str
+    cumulative: dict[str, int]
+    self_time: dict[str, int]
+    error: str
+
+    @property
+    def total(self) -> int:
+        """Microseconds spent importing the module and everything it loaded."""
+        return self.cumulative.get(self.module, sum(self.self_time.values()))
+
+    def loaded(self, name: str) -> bool:
+        """
+        Whether the package or module *name* (or anything inside it) was loaded.
+
+        :param name:
+        :type name: str
+        :return:
+        :rtype: bool
+        """
+        return any(module == name or module.startswith(name + ".") for module in self.cumulative)
+
+    def violations(self) -> list[str]:
+        """
+        The :data:`FORBIDDEN` dependencies this module loaded.
+
+        :return:
+        :rtype: list[str]
+        """
+        return [name for name in FORBIDDEN.get(self.module, ()) if self.loaded(name)]
+
+
+def measure(module: str) -> ImportReport:
+    """
+    Import *module* in a fresh interpreter with ``-X importtime`` and collect its timings.
+
+    :param module:
+    :type module: str
+    :return:
+    :rtype: ImportReport
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    cumulative: dict[str, int] = {}
+    self_time: dict[str, int] = {}
+    error = ""
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            error = line
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].strip()
+        self_time[name] = int(fields[0])
+        cumulative[name] = int(fields[1])
+    return ImportReport(module, cumulative, self_time, error if process.returncode else "")
+
+
+def main() -> None:
+    """Driver code."""
+    parser = argparse.ArgumentParser(description="Report how long the wild chess entry points take to import.")
+    parser.add_argument("modules", nargs="*", default=list(FORBIDDEN), help="modules to import, the entry points by default")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list per module")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        report = measure(module)
+        print(f"{module}: {report.total / 1000:.1f} ms, {len(report.cumulative)} modules")
+        slowest = sorted(report.cumulative.items(), key=lambda item: item[1], reverse=True)
+        for name, micros in [item for item in slowest if item[0] != module][: args.top]:
+            print(f"    {micros / 1000:>8.1f} ms  {name}")
+        if report.error:
+            print(f"    failed: {report.error}")
+        for name in report.violations():
+            print(f"    loads {name} at import time")
+            failed = True
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Opt-in call counters, timings and histograms for the rules engine hot paths.
+
+Nothing is measured until :func:`enable` swaps timing wrappers in for the functions in :data:`TARGETS`;
+:func:`disable` puts the originals back, so instrumentation costs nothing while it is off.
+"""
+
+
+from __future__ import annotations
+
+import bisect
+import functools
+import importlib
+import json
+import time
+import typing
+
+__all__: tuple[str, ...] = (
+    "TARGETS",
+    "BUCKETS",
+    "Stat",
+    "enable",
+    "disable",
+    "enabled",
+    "reset",
+    "snapshot",
+    "merge",
+    "to_json",
+    "to_prometheus",
+)
+
+# (module, attribute path) of every instrumented function.
+TARGETS: typing.Final[tuple[tuple[str, str], ...]] = (
+    ("wild_chess.logic.pieces", "Pawn.possible_moves"),
+    ("wild_chess.logic.pieces", "Rook.possible_moves"),
+    ("wild_chess.logic.pieces", "Knight.possible_moves"),
+    ("wild_chess.logic.pieces", "Bishop.possible_moves"),
+    ("wild_chess.logic.pieces", "Queen.possible_moves"),
+    ("wild_chess.logic.pieces", "King.possible_moves"),
+    ("wild_chess.logic.pieces", "WildPiece.moves_as"),
+    ("wild_chess.logic.pieces", "WildPiece.random_moves"),
+    ("wild_chess.logic.pieces", "ChessPiece.filter_moves"),
+    ("wild_chess.logic.pieces", "ChessPiece.find_diagonals"),
+    ("wild_chess.logic.pieces", "ChessPiece.find_sides"),
+    ("wild_chess.logic.bitboard", "Position.legal_moves"),
+    ("wild_chess.logic.bitboard", "Position.make_move"),
+    ("wild_chess.logic.evaluation", "evaluate"),
+    ("wild_chess.logic.search", "Searcher.search"),
+    ("wild_chess.utils.board", "Board.check_check"),
+    ("wild_chess.utils.board", "Board.check_checkmate"),
+    ("wild_chess.utils.board", "Board.check_en_passant"),
+    ("wild_chess.utils.board", "Board.legal_moves"),
+    ("wild_chess.utils.board", "Board.best_move"),
+)
+# Upper bounds, in seconds, of the histogram buckets; one more bucket takes everything slower.
+BUCKETS: typing.Final[tuple[float, ...]] = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0)
+
+
+class Stat:
+    """Calls, total seconds and a duration histogram of one function."""
+
+    __slots__ = ("count", "seconds", "buckets")
+
+    count: int
+    seconds: float
+    buckets: list[int]
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def record(self, seconds: float) -> None:
+        """
+        Count one call that took *seconds*.
+
+        :param seconds:
+        :type seconds: float
+        """
+        self.count += 1
+        self.seconds += seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def clear(self) -> None:
+        """Forget every call."""
+        self.count = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+
+_stats: dict[str, Stat] = {}
+# The attribute each wrapper replaced: name -> (owner, attribute, original).
+_originals: dict[str, tuple[typing.Any, str, typing.Any]] = {}
+
+
+def _timed(name: str, func: typing.Callable[..., typing.Any]) -> typing.Callable[..., typing.Any]:
+    """Wrap *func* so every call is recorded under *name*."""
+    stat = _stats.setdefault(name, Stat())
+    clock = time.perf_counter
+
+    @functools.wraps(func)
+    def wrapper(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        start = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stat.record(clock() - start)
+
+    return wrapper
+
+
+def enable(targets: typing.Iterable[tuple[str, str]] = TARGETS) -> None:
+    """
+    Start measuring *targets*; those already measured are left alone.
+
+    :param targets: (module, attribute path) pairs
+    :type targets: typing.Iterable[tuple[str, str]]
+    """
+    for module, path in targets:
+        name = f"{module}.{path}"
+        if name in _originals:
+            continue
+        owner = importlib.import_module(module)
+        *parents, attribute = path.split(".")
+        for parent in parents:
+            owner = getattr(owner, parent)
+        original = owner.__dict__[attribute] if isinstance(owner, type) else getattr(owner, attribute)
+        if isinstance(original, staticmethod):
+            wrapped: typing.Any = staticmethod(_timed(name, original.__func__))
+        elif isinstance(original, property):
+            wrapped = property(_timed(name, typing.cast(typing.Callable[..., typing.Any], original.fget)))
+        else:
+            wrapped = _timed(name, original)
+        setattr(owner, attribute, wrapped)
+        _originals[name] = (owner, attribute, original)
+
+
+def disable() -> None:
+    """Put every original function back. The numbers gathered so far are kept."""
+    for owner, attribute, original in _originals.values():
+        setattr(owner, attribute, original)
+    _originals.clear()
+
+
+def enabled() -> bool:
+    """
+    Whether anything is being measured.
+
+    :return:
+    :rtype: bool
+    """
+    return bool(_originals)
+
+
+def reset() -> None:
+    """Forget every call measured so far."""
+    for stat in _stats.values():
+        stat.clear()
+
+
+def snapshot() -> dict[str, dict[str, typing.Any]]:
+    """
+    The numbers gathered so far, by function.
+
+    :return: ``count``, ``seconds`` and ``buckets`` (calls per :data:`BUCKETS` bound, not cumulative) of every
+        function called at least once
+    :rtype: dict[str, dict[str, typing.Any]]
+    """
+    return {
+        name: {"count": stat.count, "seconds": stat.seconds, "buckets": list(stat.buckets)}
+        for name, stat in sorted(_stats.items())
+        if stat.count
+    }
+
+
+def merge(snapshots: typing.Iterable[dict[str, dict[str, typing.Any]]]) -> dict[str, dict[str, typing.Any]]:
+    """
+    Add up snapshots, such as the ones taken in several worker processes.
+
+    :param snapshots:
+    :type snapshots: typing.Iterable[dict[str, dict[str, typing.Any]]]
+    :return:
+    :rtype: dict[str, dict[str, typing.Any]]
+    """
+    total: dict[str, dict[str, typing.Any]] = {}
+    for part in snapshots:
+        for name, numbers in part.items():
+            into = total.setdefault(name, {"count": 0, "seconds": 0.0, "buckets": [0] * (len(BUCKETS) + 1)})
+            into["count"] += numbers["count"]
+            into["seconds"] += numbers["seconds"]
+            into["buckets"] = [a + b for a, b in zip(into["buckets"], numbers["buckets"])]
+    return dict(sorted(total.items()))
+
+
+def to_json(numbers: typing.Optional[dict[str, dict[str, typing.Any]]] = None) -> str:
+    """
+    Export a snapshot (the current one by default) as JSON.
+
+    :param numbers:
+    :type numbers: typing.Optional[dict[str, dict[str, typing.Any]]]
+    :return:
+    :rtype: str
+    """
+    return json.dumps({"buckets": list(BUCKETS), "functions": snapshot() if numbers is None else numbers}, indent=4)
+
+
+def to_prometheus(numbers: typing.Optional[dict[str, dict[str, typing.Any]]] = None) -> str:
+    """
+    Export a snapshot (the current one by default) in the Prometheus text format, as one histogram.
+
+    :param numbers:
+    :type numbers: typing.Optional[dict[str, dict[str, typing.Any]]]
+    :return:
+    :rtype: str
+    """
+    metric = "wild_chess_call_seconds"
+    lines = [
+        f"# HELP {metric} Time spent in instrumented wild chess functions.",
+        f"# TYPE {metric} histogram",
+    ]
+    for name, stat in (snapshot() if numbers is None else numbers).items():
+        running = 0
+        for bound, count in zip(BUCKETS + (float("inf"),), stat["buckets"]):
+            running += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{metric}_bucket{{function="{name}",le="{le}"}} {running}')
+        lines.append(f'{metric}_sum{{function="{name}"}} {stat["seconds"]!r}')
+        lines.append(f'{metric}_count{{function="{name}"}} {stat["count"]}')
+    return "\n".join(lines) + "\n"
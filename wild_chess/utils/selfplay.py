@@ -0,0 +1,211 @@
+"""Seeded self-play of headless boards across a process pool, for soak tests and capacity planning."""
+
+
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import dataclasses
+import pathlib
+import random
+import struct
+import time
+import typing
+
+from wild_chess.logic import bitboard
+from wild_chess.utils import board, instrumentation
+
+__all__: tuple[str, ...] = ("PLAYERS", "REASONS", "GameStats", "play", "run", "write", "read", "main")
+
+PLAYERS: typing.Final[tuple[str, ...]] = ("random", "bot")
+REASONS: typing.Final[tuple[str, ...]] = ("checkmate", "stalemate", "fifty moves", "repetition", "move limit")
+# One record per game: seed, plies, result (1 white won, -1 black won, 0 draw), reason index, seconds.
+RECORD: typing.Final[struct.Struct] = struct.Struct("<IHbBf")
+
+
+@dataclasses.dataclass
+class GameStats:
+    """How one self-play game went."""
+
+    seed: int
+    plies: int
+    result: int
+    reason: str
+    seconds: float
+    # Instrumentation snapshot of the game, if it was instrumented; not written to results files.
+    profile: typing.Optional[dict[str, typing.Any]] = dataclasses.field(default=None, repr=False)
+
+    @property
+    def moves_per_second(self) -> float:
+        """Plies played per second of wall time, search included."""
+        return self.plies / self.seconds if self.seconds else 0.0
+
+
+def _choose(game: board.Board, player: str, rng: random.Random, time_limit: float) -> int:
+    """Pick the next move for *player*."""
+    if player == "bot":
+        return game.best_move(time_limit).move
+    return rng.choice(game.position.legal_moves())
+
+
+def play(
+    seed: int,
+    white: str = "random",
+    black: str = "random",
+    max_plies: int = 400,
+    time_limit: float = 0.05,
+    instrument: bool = False,
+) -> GameStats:
+    """
+    Play one game from the ``Board.generate_pieces`` start drawn with *seed*.
+
+    :param seed: Seeds both the start position and the random players
+    :type seed: int
+    :param white: One of :data:`PLAYERS`
+    :type white: str
+    :param black: One of :data:`PLAYERS`
+    :type black: str
+    :param max_plies: The game is drawn after this many plies
+    :type max_plies: int
+    :param time_limit: Seconds a bot may think per move
+    :type time_limit: float
+    :param instrument: Measure the rules engine while playing, see :mod:`wild_chess.utils.instrumentation`
+    :type instrument: bool
+    :return:
+    :rtype: GameStats
+    """
+    if instrument:
+        instrumentation.reset()
+        instrumentation.enable()
+        try:
+            stats = play(seed, white, black, max_plies, time_limit)
+        finally:
+            instrumentation.disable()
+        stats.profile = instrumentation.snapshot()
+        return stats
+
+    rng = random.Random(seed)
+    game = board.Board("white", "black", headless=True)
+    game.generate_pieces(game.player1, game.player2, rng)
+    position = game.position
+    players = (white, black)
+    seen = {position.key: 1}
+    start = time.perf_counter()
+    result, reason = 0, "move limit"
+    while len(game.history) < max_plies:
+        if not position.legal_moves():
+            checkmated = position.king_square(position.side) < 0 or position.in_check(position.side)
+            result = (1 if position.side == bitboard.BLACK else -1) if checkmated else 0
+            reason = "checkmate" if checkmated else "stalemate"
+            break
+        if position.halfmove >= 100:
+            reason = "fifty moves"
+            break
+        if seen[position.key] >= 3:
+            reason = "repetition"
+            break
+        game.make_move(_choose(game, players[position.side], rng, time_limit))
+        seen[position.key] = seen.get(position.key, 0) + 1
+    game.close()
+    return GameStats(seed, len(game.history), result, reason, time.perf_counter() - start)
+
+
+def run(
+    seeds: typing.Iterable[int],
+    white: str = "random",
+    black: str = "random",
+    max_plies: int = 400,
+    time_limit: float = 0.05,
+    workers: typing.Optional[int] = None,
+    instrument: bool = False,
+) -> list[GameStats]:
+    """
+    Play a game for every seed across a process pool.
+
+    :param seeds:
+    :type seeds: typing.Iterable[int]
+    :param white:
+    :type white: str
+    :param black:
+    :type black: str
+    :param max_plies:
+    :type max_plies: int
+    :param time_limit:
+    :type time_limit: float
+    :param workers: Number of processes, one per core if not given
+    :type workers: typing.Optional[int]
+    :param instrument:
+    :type instrument: bool
+    :return: The stats of every game, in seed order
+    :rtype: list[GameStats]
+    """
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(play, seed, white, black, max_plies, time_limit, instrument) for seed in seeds]
+        return [future.result() for future in futures]
+
+
+def write(stats: typing.Iterable[GameStats], path: pathlib.Path | str) -> None:
+    """
+    Write game stats as fixed-size binary records.
+
+    :param stats:
+    :type stats: typing.Iterable[GameStats]
+    :param path:
+    :type path: pathlib.Path | str
+    """
+    with open(path, "wb") as file:
+        for game in stats:
+            file.write(RECORD.pack(game.seed, game.plies, game.result, REASONS.index(game.reason), game.seconds))
+
+
+def read(path: pathlib.Path | str) -> list[GameStats]:
+    """
+    Read game stats written by :func:`write`.
+
+    :param path:
+    :type path: pathlib.Path | str
+    :return:
+    :rtype: list[GameStats]
+    """
+    data = pathlib.Path(path).read_bytes()
+    return [
+        GameStats(seed, plies, result, REASONS[reason], seconds)
+        for seed, plies, result, reason, seconds in RECORD.iter_unpack(data)
+    ]
+
+
+def main() -> None:
+    """Driver code."""
+    parser = argparse.ArgumentParser(description="Play seeded wild chess games without a GUI.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game, the others follow")
+    parser.add_argument("--white", choices=PLAYERS, default="random")
+    parser.add_argument("--black", choices=PLAYERS, default="random")
+    parser.add_argument("--max-plies", type=int, default=400)
+    parser.add_argument("--time-limit", type=float, default=0.05, help="seconds per bot move")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", type=pathlib.Path, default=pathlib.Path("selfplay.bin"))
+    parser.add_argument(
+        "--profile", type=pathlib.Path, help="instrument the games and write the numbers here (.prom or .json)"
+    )
+    args = parser.parse_args()
+
+    seeds = range(args.seed, args.seed + args.games)
+    stats = run(seeds, args.white, args.black, args.max_plies, args.time_limit, args.workers, args.profile is not None)
+    write(stats, args.output)
+    if args.profile is not None:
+        numbers = instrumentation.merge(game.profile or {} for game in stats)
+        export = instrumentation.to_prometheus if args.profile.suffix == ".prom" else instrumentation.to_json
+        args.profile.write_text(export(numbers), encoding="utf-8")
+
+    plies = sum(game.plies for game in stats)
+    seconds = sum(game.seconds for game in stats)
+    outcomes = {score: sum(game.result == score for game in stats) for score in (1, 0, -1)}
+    print(f"{len(stats)} games, {plies} plies, {plies / seconds if seconds else 0:.0f} moves/s per worker")
+    print(f"white won {outcomes[1]}, black won {outcomes[-1]}, drawn {outcomes[0]}")
+    for reason in REASONS:
+        print(f"{reason:<12} {sum(game.reason == reason for game in stats)}")
+
+
+if __name__ == "__main__":
+    main()